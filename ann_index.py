@@ -0,0 +1,288 @@
+import argparse
+import itertools
+import json
+import os
+import time
+import numpy as np
+
+ID_DTYPE = "S32"  # Spotify ids are 22 ASCII characters
+
+
+class LSHIndex:
+    """Approximate nearest-neighbour index using random-projection LSH.
+
+    Each of n_tables tables hashes a vector to an n_bits signature (the
+    signs of its projections on random hyperplanes), so vectors with a
+    small angle between them tend to share buckets. A query collects the
+    rows in its bucket of every table, plus every bucket within probes
+    bits of it (multi-probe LSH), and reranks those candidates by exact
+    cosine similarity. Rows found in more tables and nearer buckets rank
+    first when max_candidates cuts the candidate list short.
+
+    More tables or probes raise recall, more bits make buckets smaller
+    and queries faster. When path is given the arrays live in .npy files
+    opened with memory mapping, so a saved index opens instantly; rows
+    added since the last compact() sit in an unsorted tail that is
+    scanned linearly until it is merged.
+    """
+
+    def __init__(self, dims, n_tables=8, n_bits=16, seed=0, path=None, capacity=1024):
+        if n_bits > 32:
+            raise ValueError("n_bits must be at most 32")
+        self.dims = dims
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.seed = seed
+        self.path = path
+        self.count = 0
+        self.n_sorted = 0
+        self.planes = np.random.default_rng(seed).standard_normal((n_tables * n_bits, dims)).astype(np.float32)
+        self.bit_weights = (np.uint64(1) << np.arange(n_bits, dtype=np.uint64)).astype(np.uint32)
+        if path:
+            os.makedirs(path, exist_ok=True)
+        self.vectors = self._alloc("vectors", (capacity, dims), np.float32)
+        self.ids = self._alloc("ids", (capacity,), ID_DTYPE)
+        self.codes = self._alloc("codes", (capacity, n_tables), np.uint32)
+        self.sorted_codes = np.zeros((n_tables, 0), dtype=np.uint32)
+        self.order = np.zeros((n_tables, 0), dtype=np.uint32)
+
+    # Storage
+
+    def _file(self, name):
+        return os.path.join(self.path, f"{name}.npy")
+
+    def _alloc(self, name, shape, dtype):
+        if self.path:
+            return np.lib.format.open_memmap(self._file(name), mode="w+", dtype=dtype, shape=shape)
+        return np.zeros(shape, dtype=dtype)
+
+    def _grow(self, needed):
+        capacity = len(self.vectors)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        for name in ("vectors", "ids", "codes"):
+            old = getattr(self, name)
+            shape, dtype = (new_capacity,) + old.shape[1:], old.dtype
+            data = np.array(old[:self.count])
+            # Drop the old mapping before its file is recreated
+            del old
+            setattr(self, name, None)
+            new = self._alloc(name, shape, dtype)
+            new[:self.count] = data
+            setattr(self, name, new)
+
+    def save(self):
+        """Flush arrays and write metadata; only meaningful with a path"""
+        if not self.path:
+            return
+        for array in (self.vectors, self.ids, self.codes):
+            array.flush()
+        # Replace rather than overwrite, so readers mapping the old files keep working
+        for name in ("sorted_codes", "order"):
+            tmp_path = self._file(name) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.asarray(getattr(self, name)))
+            os.replace(tmp_path, self._file(name))
+        tmp_path = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"dims": self.dims, "n_tables": self.n_tables, "n_bits": self.n_bits,
+                       "seed": self.seed, "count": self.count, "n_sorted": self.n_sorted}, f)
+        os.replace(tmp_path, os.path.join(self.path, "meta.json"))
+
+    @classmethod
+    def open(cls, path, writable=False):
+        """Open a saved index; arrays are memory mapped, nothing is read up front"""
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        index = cls.__new__(cls)
+        index.dims = meta["dims"]
+        index.n_tables = meta["n_tables"]
+        index.n_bits = meta["n_bits"]
+        index.seed = meta["seed"]
+        index.path = path
+        index.count = meta["count"]
+        index.n_sorted = meta["n_sorted"]
+        index.planes = np.random.default_rng(index.seed).standard_normal(
+            (index.n_tables * index.n_bits, index.dims)).astype(np.float32)
+        index.bit_weights = (np.uint64(1) << np.arange(index.n_bits, dtype=np.uint64)).astype(np.uint32)
+        mode = "r+" if writable else "r"
+        for name in ("vectors", "ids", "codes", "sorted_codes", "order"):
+            setattr(index, name, np.load(index._file(name), mmap_mode=mode))
+        return index
+
+    # Building
+
+    @staticmethod
+    def normalize(vectors):
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return vectors / norms
+
+    def hash(self, vectors):
+        """(n, n_tables) uint32 bucket codes for unit vectors"""
+        bits = (vectors @ self.planes.T > 0).reshape(len(vectors), self.n_tables, self.n_bits)
+        return (bits * self.bit_weights).sum(axis=2, dtype=np.uint32)
+
+    def add(self, ids, vectors, batch_size=65536):
+        """Append vectors (incremental insert); they are searchable immediately"""
+        vectors = self.normalize(vectors)
+        ids = np.asarray(ids, dtype=ID_DTYPE)
+        self._grow(self.count + len(vectors))
+        for start in range(0, len(vectors), batch_size):
+            chunk = vectors[start:start + batch_size]
+            rows = slice(self.count, self.count + len(chunk))
+            self.vectors[rows] = chunk
+            self.ids[rows] = ids[start:start + batch_size]
+            self.codes[rows] = self.hash(chunk)
+            self.count += len(chunk)
+        # Keep the linearly scanned tail small
+        if self.count - self.n_sorted > max(4096, self.count // 10):
+            self.compact()
+
+    def compact(self):
+        """Sort every table's codes so bucket lookups are binary searches"""
+        codes = np.asarray(self.codes[:self.count])
+        self.order = np.argsort(codes, axis=0, kind="stable").T.astype(np.uint32)
+        self.sorted_codes = np.take_along_axis(codes.T, self.order.astype(np.int64), axis=1)
+        self.n_sorted = self.count
+
+    @classmethod
+    def build(cls, ids, vectors, path=None, **kwargs):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        index = cls(vectors.shape[1], path=path, capacity=max(len(vectors), 1), **kwargs)
+        index.add(ids, vectors)
+        index.compact()
+        index.save()
+        return index
+
+    # Querying
+
+    def _probe_masks(self, probes):
+        """XOR masks of every code within probes bits, nearest first, with their distances"""
+        cache = getattr(self, "_masks", None)
+        if cache is None:
+            cache = self._masks = {}
+        if probes not in cache:
+            masks, distances = [], []
+            for distance in range(probes + 1):
+                for bits in itertools.combinations(self.bit_weights.tolist(), distance):
+                    masks.append(sum(bits))
+                    distances.append(distance)
+            cache[probes] = (np.array(masks, dtype=np.uint32), np.array(distances, dtype=np.int64))
+        return cache[probes]
+
+    def probe_codes(self, code, probes):
+        """(codes, distances) of the buckets within probes bits of code"""
+        if probes < 0:
+            raise ValueError("probes must not be negative")
+        masks, distances = self._probe_masks(min(probes, self.n_bits))
+        return np.uint32(code) ^ masks, distances
+
+    def candidates(self, vector, probes=1, max_candidates=None):
+        """Candidate rows; with max_candidates, the best by table collisions
+
+        Each table a row shares a bucket with the query scores probes + 1,
+        less one per bit between the buckets, so rows close to the query
+        in many tables are kept when the list is truncated.
+        """
+        codes = self.hash(vector[None, :])[0]
+        found, weights = [], []
+        for table in range(self.n_tables):
+            keys, distances = self.probe_codes(codes[table], probes)
+            sorted_codes = self.sorted_codes[table]
+            lo = np.searchsorted(sorted_codes, keys, side="left")
+            hi = np.searchsorted(sorted_codes, keys, side="right")
+            for a, b, distance in zip(lo, hi, distances):
+                if b > a:
+                    found.append(self.order[table][a:b])
+                    weights.append(np.full(b - a, probes + 1 - distance))
+            if self.count > self.n_sorted:
+                tail = np.asarray(self.codes[self.n_sorted:self.count, table])
+                key_order = np.argsort(keys)
+                pos = np.minimum(np.searchsorted(keys[key_order], tail), len(keys) - 1)
+                hits = np.nonzero(keys[key_order[pos]] == tail)[0]
+                found.append(hits.astype(np.uint32) + np.uint32(self.n_sorted))
+                weights.append(probes + 1 - distances[key_order[pos[hits]]])
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        rows, inverse = np.unique(np.concatenate(found), return_inverse=True)
+        rows = rows.astype(np.int64)
+        if max_candidates is None or len(rows) <= max_candidates:
+            return rows
+        scores = np.bincount(inverse, weights=np.concatenate(weights))
+        return rows[np.argsort(-scores, kind="stable")[:max_candidates]]
+
+    def search(self, vector, k=10, probes=1, max_candidates=None):
+        """[(id, score), ...] for the approximate top k by cosine similarity"""
+        vector = self.normalize(vector)[0]
+        rows = self.candidates(vector, probes, max_candidates)
+        if not len(rows):
+            return []
+        scores = np.asarray(self.vectors[rows]) @ vector
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[rows[i]].decode("ascii"), float(scores[i])) for i in top]
+
+    def exact_search(self, vector, k=10, batch_size=262144):
+        """Brute-force top k, used as the reference for recall"""
+        vector = self.normalize(vector)[0]
+        scores = np.empty(self.count, dtype=np.float32)
+        for start in range(0, self.count, batch_size):
+            stop = min(start + batch_size, self.count)
+            scores[start:stop] = np.asarray(self.vectors[start:stop]) @ vector
+        k = min(k, self.count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i].decode("ascii"), float(scores[i])) for i in top]
+
+
+def benchmark(n=100000, dims=128, queries=100, k=10, n_tables=8, n_bits=16, probes=1, clusters=1000, seed=1):
+    """Compare LSH search against exact search on clustered random vectors"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dims)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + 0.3 * rng.standard_normal((n, dims)).astype(np.float32)
+    ids = [f"t{i}" for i in range(n)]
+
+    start = time.perf_counter()
+    index = LSHIndex.build(ids, vectors, n_tables=n_tables, n_bits=n_bits)
+    build_s = time.perf_counter() - start
+
+    query_vectors = vectors[rng.integers(0, n, queries)] + 0.1 * rng.standard_normal((queries, dims)).astype(np.float32)
+    ann_time = exact_time = 0.0
+    hits = 0
+    for vector in query_vectors:
+        start = time.perf_counter()
+        approx = index.search(vector, k, probes=probes)
+        ann_time += time.perf_counter() - start
+        start = time.perf_counter()
+        exact = index.exact_search(vector, k)
+        exact_time += time.perf_counter() - start
+        hits += len({i for i, _ in approx} & {i for i, _ in exact})
+
+    return {
+        "n": n, "dims": dims, "n_tables": n_tables, "n_bits": n_bits, "probes": probes,
+        "build_s": build_s,
+        "ann_ms": ann_time / queries * 1000,
+        "exact_ms": exact_time / queries * 1000,
+        "recall_at_k": hits / (queries * k),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark LSH search against exact search")
+    parser.add_argument("--n", type=int, default=100000)
+    parser.add_argument("--dims", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--tables", type=int, default=8)
+    parser.add_argument("--bits", type=int, default=16)
+    parser.add_argument("--probes", type=int, default=1, help="also search buckets up to this many bits away")
+    args = parser.parse_args()
+    result = benchmark(args.n, args.dims, args.queries, n_tables=args.tables, n_bits=args.bits, probes=args.probes)
+    print(f"{result['n']} vectors x {result['dims']} dims, {result['n_tables']} tables x {result['n_bits']} bits, probes={result['probes']}")
+    print(f"build:  {result['build_s']:.2f} s")
+    print(f"exact:  {result['exact_ms']:.2f} ms/query")
+    print(f"ann:    {result['ann_ms']:.2f} ms/query ({result['exact_ms'] / result['ann_ms']:.1f}x faster)")
+    print(f"recall@10: {result['recall_at_k']:.3f}")
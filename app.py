@@ -2,7 +2,6 @@ from PyQt6.QtWidgets import QWidget, QApplication
 from PyQt6.QtCore import QPoint, Qt  # Added Qt import
 import sys
 
-import scipy as sp
 from ui_setup import setup_ui
 from theme_manager import ThemeManager
 from player_controls import PlayerControls 
@@ -0,0 +1,238 @@
+from collections import deque
+import json
+import os
+import threading
+
+from image_urls import best_image_url
+from rate_limit import TokenBucket
+
+# numpy and scipy are imported where they are used: importing them takes
+# about 0.3 s, which would otherwise hold up the first paint
+
+
+class ArtistGraph:
+    """Related-artist graph crawled from Spotify and cached on disk.
+
+    Nodes are artists (with their genres and a few top tracks), edges come
+    from the related-artists endpoint. The graph is stored as a sparse
+    adjacency matrix (adjacency.npz) next to a JSON file of node metadata
+    and the crawl frontier, so crawling resumes where it stopped.
+    recommend() runs a personalised PageRank from seed artists using
+    sparse matrix-vector products once load_edges() has read the matrix.
+    """
+
+    def __init__(self, path="artist_graph", requests_per_second=2, load=True):
+        self.path = path
+        self.rate_budget = TokenBucket(requests_per_second)
+        self.artist_ids = []  # row -> artist id
+        self.row_of = {}  # artist id -> row
+        self.artists = {}  # artist id -> {"name", "genres", "image_url", "top_tracks"}
+        self.crawled = set()
+        self.frontier = deque()
+        self.edges = set()  # (row, row) pairs
+        self.walk = None  # transposed random-walk matrix, CSR
+        self.edges_loaded = False
+        # crawl() changes the graph on a worker thread while the GUI thread queries it
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        if load:
+            self.load()
+
+    def __len__(self):
+        return len(self.artist_ids)
+
+    # Storage
+
+    def load(self):
+        """Read the node metadata; safe to call from a worker thread"""
+        meta_path = os.path.join(self.path, "graph.json")
+        if not os.path.exists(meta_path):
+            return
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with self._lock:
+                self.artist_ids = meta["artist_ids"]
+                self.row_of = {artist_id: row for row, artist_id in enumerate(self.artist_ids)}
+                self.artists = meta["artists"]
+                self.crawled = set(meta["crawled"])
+                self.frontier = deque(meta["frontier"])
+        except Exception as e:
+            print(f"Error loading artist graph: {e}")
+
+    def load_edges(self):
+        """Read the adjacency matrix and build the walk; runs on a worker thread"""
+        import scipy.sparse
+        # Read outside _lock, so queries on the GUI thread don't wait for the file
+        with self._load_lock:
+            if self.edges_loaded:
+                return
+            path = os.path.join(self.path, "adjacency.npz")
+            if self.artist_ids and os.path.exists(path):
+                try:
+                    adjacency = scipy.sparse.load_npz(path).tocoo()
+                    edges = set(zip(adjacency.row.tolist(), adjacency.col.tolist()))
+                    walk = self.build_walk(adjacency.tocsr())
+                    with self._lock:
+                        self.edges = edges
+                        self.walk = walk
+                except Exception as e:
+                    print(f"Error loading artist graph edges: {e}")
+            self.edges_loaded = True
+
+    def save(self):
+        import scipy.sparse
+        self.load_edges()  # Saving before the edges were read would drop them
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock:
+            meta = {
+                "artist_ids": list(self.artist_ids),
+                "artists": dict(self.artists),
+                "crawled": sorted(self.crawled),
+                "frontier": list(self.frontier),
+            }
+            adjacency = self.adjacency()
+        scipy.sparse.save_npz(os.path.join(self.path, "adjacency.npz"), adjacency)
+        tmp_path = os.path.join(self.path, "graph.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.path, "graph.json"))
+
+    # Building
+
+    def _node(self, artist):
+        artist_id = artist['id']
+        if artist_id not in self.row_of:
+            self.row_of[artist_id] = len(self.artist_ids)
+            self.artist_ids.append(artist_id)
+            self.artists[artist_id] = {"name": artist.get('name', ""), "genres": artist.get('genres', []),
+                                       "image_url": best_image_url(artist.get('images'), 150), "top_tracks": []}
+        return self.row_of[artist_id]
+
+    def seed(self, artists):
+        """Queue artists (dicts with id and name) for crawling"""
+        with self._lock:
+            for artist in artists:
+                self._node(artist)
+                if artist['id'] not in self.crawled and artist['id'] not in self.frontier:
+                    self.frontier.append(artist['id'])
+
+    def adjacency(self):
+        import numpy as np
+        import scipy.sparse
+        n = len(self.artist_ids)
+        if not self.edges:
+            return scipy.sparse.csr_matrix((n, n), dtype=np.float32)
+        rows, cols = zip(*self.edges)
+        data = np.ones(len(rows), dtype=np.float32)
+        return scipy.sparse.csr_matrix((data, (rows, cols)), shape=(n, n))
+
+    @staticmethod
+    def build_walk(adjacency):
+        """Transposed row-stochastic matrix of the symmetrised graph.
+
+        Stored transposed so one PageRank step is a single CSR mat-vec.
+        """
+        import numpy as np
+        import scipy.sparse
+        adjacency = ((adjacency + adjacency.T) > 0).astype(np.float32)
+        degree = np.asarray(adjacency.sum(axis=1)).ravel()
+        degree[degree == 0] = 1
+        inverse = scipy.sparse.diags((1 / degree).astype(np.float32))
+        return (inverse @ adjacency).T.tocsr().astype(np.float32)
+
+    def crawl(self, sp, market="US", max_artists=50, top_tracks=3):
+        """Expand up to max_artists frontier nodes; runs on a worker thread.
+
+        Every request waits on the rate budget. Returns how many artists
+        were crawled; progress is saved so the next call continues.
+        """
+        self.load_edges()
+        crawled = 0
+        try:
+            while crawled < max_artists:
+                with self._lock:
+                    if not self.frontier:
+                        break
+                    artist_id = self.frontier.popleft()
+                if artist_id in self.crawled:
+                    continue
+
+                try:
+                    self.rate_budget.acquire()
+                    related = sp.artist_related_artists(artist_id).get('artists', [])
+                    self.rate_budget.acquire()
+                    tracks = sp.artist_top_tracks(artist_id, country=market).get('tracks', [])
+                except Exception:
+                    with self._lock:
+                        self.frontier.appendleft(artist_id)  # Crawled again next time
+                    raise
+
+                with self._lock:
+                    row = self.row_of[artist_id]
+                    for artist in related:
+                        # Artists seen for the first time join the frontier
+                        if artist['id'] not in self.row_of:
+                            self.frontier.append(artist['id'])
+                        self.edges.add((row, self._node(artist)))
+                    self.artists[artist_id]["top_tracks"] = [
+                        {"id": t['id'], "name": t['name'],
+                         "image_url": best_image_url(t.get('album', {}).get('images'), 150)}
+                        for t in tracks[:top_tracks]
+                    ]
+                    self.crawled.add(artist_id)
+                crawled += 1
+        finally:
+            # Keep what was crawled before an error
+            with self._lock:
+                adjacency = self.adjacency()
+            walk = self.build_walk(adjacency)
+            with self._lock:
+                self.walk = walk
+            self.save()
+        return crawled
+
+    # Querying
+
+    def find_artists(self, name):
+        """Ids of artists whose name matches name (whole words, case-insensitive)"""
+        from local_recommender import tokenize
+        query = " ".join(tokenize(name))
+        if not query:
+            return []
+        with self._lock:
+            names = [(artist_id, artist['name']) for artist_id, artist in self.artists.items()]
+        return [artist_id for artist_id, artist_name in names if " ".join(tokenize(artist_name)) == query]
+
+    def artist(self, artist_id):
+        """A copy of an artist's node metadata"""
+        with self._lock:
+            return dict(self.artists[artist_id])
+
+    def recommend(self, seed_ids, k=10, alpha=0.15, iterations=50, tol=1e-4):
+        """Personalised PageRank from seed_ids; returns [(artist_id, score), ...]"""
+        import numpy as np
+        with self._lock:
+            walk = self.walk
+            if walk is None:
+                return []
+            n = walk.shape[0]
+            # Nodes added since the matrix was built are not part of the walk yet
+            seeds = [self.row_of[a] for a in seed_ids if self.row_of.get(a, n) < n]
+            artist_ids = self.artist_ids[:n]
+        if not seeds:
+            return []
+        restart = np.zeros(n, dtype=np.float32)
+        restart[seeds] = 1 / len(seeds)
+        scores = restart.copy()
+        for _ in range(iterations):
+            updated = alpha * restart + (1 - alpha) * (walk @ scores)
+            if np.abs(updated - scores).sum() < tol:
+                scores = updated
+                break
+            scores = updated
+        scores[seeds] = 0
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(artist_ids[row], float(scores[row])) for row in top if scores[row] > 0]
@@ -0,0 +1,195 @@
+import asyncio
+import functools
+import threading
+import time
+from spotipy.exceptions import SpotifyException
+
+import metrics
+import tracing
+from http_transport import async_request, retry_delay
+from spotify_scheduler import INTERACTIVE, ScheduledSpotify, retry_after
+from token_provider import TokenProvider
+
+API_PREFIX = "https://api.spotify.com/v1/"
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_async_spotify(sp):
+    """Shared AsyncSpotify for a spotipy client (or a scheduled one), using its
+    auth manager, API prefix and, if it has one, its scheduler and priority class"""
+    scheduler = sp.scheduler if isinstance(sp, ScheduledSpotify) else None
+    spotify = scheduler.sp if scheduler is not None else sp
+    priority = sp.priority if scheduler is not None else INTERACTIVE
+    with _clients_lock:
+        if (spotify, priority) not in _clients:
+            _clients[(spotify, priority)] = AsyncSpotify(spotify.auth_manager, scheduler,
+                                                         getattr(spotify, "prefix", API_PREFIX), priority)
+        return _clients[(spotify, priority)]
+
+
+def endpoint(fn):
+    """Trace and count an API method as spotify.<name>, like calls through ScheduledSpotify"""
+    traced = tracing.traced(f"spotify.{fn.__name__}", client="async")(fn)
+
+    @functools.wraps(fn)
+    async def counted(*args, **kwargs):
+        started = time.perf_counter()
+        error = None
+        try:
+            return await traced(*args, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            metrics.record_api_call(fn.__name__, "async", time.perf_counter() - started, error)
+    return counted
+
+
+class AsyncSpotify:
+    """asyncio client for the Spotify Web API endpoints the pages use.
+
+    Requests share http_transport's httpx.AsyncClient and its keep-alive
+    connections, so any number of them can be in flight on the asyncio
+    loop (see background.run_async) without a thread each. With a
+    SpotifyScheduler they queue at their priority class alongside spotipy
+    calls and a 429 pauses it; errors are raised as SpotifyException.
+    Methods mirror spotipy's names and arguments.
+    """
+
+    def __init__(self, auth_manager, scheduler=None, prefix=API_PREFIX, priority=INTERACTIVE, max_retries=3):
+        self.auth_manager = auth_manager
+        self.scheduler = scheduler
+        self.prefix = prefix
+        self.priority = priority
+        self.max_retries = max_retries
+
+    async def _token(self):
+        if isinstance(self.auth_manager, TokenProvider):
+            token = self.auth_manager.peek()
+            if token:
+                return token
+        # A token refresh is a blocking HTTP call; keep it off the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: self.auth_manager.get_access_token(as_dict=False))
+
+    async def _request(self, method, path, params=None, payload=None):
+        import httpx
+        url = path if path.startswith("http") else self.prefix + path
+        params = {key: value for key, value in (params or {}).items() if value is not None}
+        call_span = tracing.current_span()
+        for attempt in range(self.max_retries + 1):
+            if call_span is not None:
+                call_span.set("attempts", attempt + 1)
+            if self.scheduler is not None:
+                queued = time.monotonic()
+                await self.scheduler.acquire_async(self.priority)
+                if call_span is not None:
+                    call_span.set("queued_ms", round((time.monotonic() - queued) * 1000, 1))
+            response = transport_error = None
+            try:
+                headers = {"Authorization": f"Bearer {await self._token()}"}
+                response = await async_request(method, url, params=params, json=payload, headers=headers)
+            except httpx.TransportError as e:
+                transport_error = e
+            finally:
+                # The slot is held for the request only, not for a backoff
+                if self.scheduler is not None:
+                    self.scheduler.release(self.priority)
+            if transport_error is not None:
+                if method != "GET" or attempt == self.max_retries:
+                    raise SpotifyException(599, -1, f"{url}:\n {transport_error}")
+                await asyncio.sleep(retry_delay(attempt))
+                continue
+
+            if response.status_code < 400:
+                if not response.content:
+                    return None
+                try:
+                    return response.json()
+                except ValueError:
+                    return None
+
+            try:
+                error = response.json().get("error", {})
+                msg, reason = error.get("message"), error.get("reason")
+            except (ValueError, AttributeError):
+                msg, reason = response.text or None, None
+            exception = SpotifyException(response.status_code, -1, f"{response.url}:\n {msg}",
+                                         reason=reason, headers=response.headers)
+            if attempt == self.max_retries:
+                raise exception
+            if response.status_code == 429:
+                delay = retry_after(exception)
+                if self.scheduler is not None:
+                    self.scheduler.pause(delay)
+                await asyncio.sleep(delay)
+            elif response.status_code >= 500 and method == "GET":
+                await asyncio.sleep(retry_delay(attempt))
+            else:
+                raise exception
+
+    # Catalog
+
+    @endpoint
+    async def search(self, q, limit=10, offset=0, type="track", market=None):
+        return await self._request("GET", "search", {"q": q, "limit": limit, "offset": offset,
+                                                     "type": type, "market": market})
+
+    @endpoint
+    async def playlist(self, playlist_id, fields=None, market=None, additional_types=("track",)):
+        return await self._request("GET", f"playlists/{playlist_id}", {
+            "fields": fields, "market": market, "additional_types": ",".join(additional_types)})
+
+    @endpoint
+    async def new_releases(self, country=None, limit=20, offset=0):
+        return await self._request("GET", "browse/new-releases", {"country": country, "limit": limit, "offset": offset})
+
+    @endpoint
+    async def tracks(self, tracks, market=None):
+        return await self._request("GET", "tracks", {"ids": ",".join(tracks), "market": market})
+
+    @endpoint
+    async def artists(self, artists):
+        return await self._request("GET", "artists", {"ids": ",".join(artists)})
+
+    @endpoint
+    async def albums(self, albums, market=None):
+        return await self._request("GET", "albums", {"ids": ",".join(albums), "market": market})
+
+    # Player
+
+    @endpoint
+    async def current_playback(self, market=None, additional_types=None):
+        return await self._request("GET", "me/player", {"market": market, "additional_types": additional_types})
+
+    @endpoint
+    async def devices(self):
+        return await self._request("GET", "me/player/devices")
+
+    @endpoint
+    async def start_playback(self, device_id=None, context_uri=None, uris=None, offset=None, position_ms=None):
+        payload = {key: value for key, value in {"context_uri": context_uri, "uris": uris, "offset": offset,
+                                                 "position_ms": position_ms}.items() if value is not None}
+        return await self._request("PUT", "me/player/play", {"device_id": device_id}, payload)
+
+    @endpoint
+    async def pause_playback(self, device_id=None):
+        return await self._request("PUT", "me/player/pause", {"device_id": device_id})
+
+    @endpoint
+    async def next_track(self, device_id=None):
+        return await self._request("POST", "me/player/next", {"device_id": device_id})
+
+    @endpoint
+    async def previous_track(self, device_id=None):
+        return await self._request("POST", "me/player/previous", {"device_id": device_id})
+
+    @endpoint
+    async def volume(self, volume_percent, device_id=None):
+        return await self._request("PUT", "me/player/volume", {"volume_percent": volume_percent, "device_id": device_id})
+
+    @endpoint
+    async def transfer_playback(self, device_id, force_play=True):
+        return await self._request("PUT", "me/player", payload={"device_ids": [device_id], "play": force_play})
@@ -0,0 +1,115 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from PyQt6.QtCore import QObject, QCoreApplication, pyqtSignal
+
+import tracing
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="background")
+_invoker = None
+_loop = None
+_loop_lock = threading.Lock()
+_startup_work = None  # calls held back by hold_startup_work(), until release_startup_work()
+
+
+class _GuiInvoker(QObject):
+    """Runs callables on the GUI thread; emitting from a worker queues the call"""
+    invoke = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.invoke.connect(self._run)
+
+    def _run(self, fn):
+        fn()
+
+
+def _get_invoker():
+    global _invoker
+    if _invoker is None:
+        _invoker = _GuiInvoker()
+        _invoker.moveToThread(QCoreApplication.instance().thread())
+    return _invoker
+
+
+def call_in_gui(fn):
+    """Schedule fn() on the GUI thread"""
+    _get_invoker().invoke.emit(fn)
+
+
+def hold_startup_work():
+    """Queue after_startup() calls instead of running them, e.g. until the window has painted"""
+    global _startup_work
+    if _startup_work is None:
+        _startup_work = []
+
+
+def release_startup_work():
+    """Run the calls queued since hold_startup_work(), in order"""
+    global _startup_work
+    work, _startup_work = _startup_work or [], None
+    for fn, args, kwargs in work:
+        fn(*args, **kwargs)
+
+
+def after_startup(fn, *args, **kwargs):
+    """Call fn now, or once startup work is released if it is being held (GUI thread only)"""
+    if _startup_work is None:
+        fn(*args, **kwargs)
+    else:
+        _startup_work.append((fn, args, kwargs))
+
+
+def run_in_background(fn, *args, on_done=None, on_error=None, executor=None):
+    """Run fn(*args) on a worker thread.
+
+    on_done(result) or on_error(exception) is then called on the GUI
+    thread. Returns the concurrent.futures.Future of the call.
+    """
+    _get_invoker()
+    future = (executor or _executor).submit(tracing.bind(fn), *args)
+    _deliver(future, on_done, on_error)
+    return future
+
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="asyncio", daemon=True).start()
+        return _loop
+
+
+def run_async(coro, on_done=None, on_error=None):
+    """Run coroutine coro on the shared asyncio loop thread.
+
+    Any number of coroutines can wait on I/O there at once. on_done(result)
+    or on_error(exception) is then called on the GUI thread. Returns a
+    concurrent.futures.Future of the result.
+    """
+    _get_invoker()
+    future = asyncio.run_coroutine_threadsafe(coro, _get_loop())
+    _deliver(future, on_done, on_error)
+    return future
+
+
+def _deliver(future, on_done, on_error):
+    """Hand future's result or exception to on_done / on_error on the GUI thread"""
+    # Spans started by the callbacks belong to the caller's trace
+    on_done = tracing.bind(on_done) if on_done is not None else None
+    on_error = tracing.bind(on_error) if on_error is not None else None
+    def finished(f):
+        if f.cancelled():
+            return
+        error = f.exception()
+        if error is not None:
+            if on_error is not None:
+                call_in_gui(lambda: on_error(error))
+            else:
+                print(f"Background task error: {error}")
+        elif on_done is not None:
+            result = f.result()
+            call_in_gui(lambda: on_done(result))
+
+    future.add_done_callback(finished)
@@ -0,0 +1,338 @@
+import argparse
+import gc
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINES = os.path.join(APP_DIR, "benchmark_baselines.json")
+CARD_COUNTS = (50, 500, 2000)
+# A result regresses when it is over baseline * (1 + threshold) and also
+# over the baseline by at least this much, so tiny timings don't flap
+SLACK = {"ms": 2.0, "KB": 20.0}
+# Restyling every widget swings by a third between runs of the same code
+SLACK_FOR = {"theme toggle": 8.0}
+
+
+def process_events(seconds=0.0):
+    from PyQt6.QtCore import QEvent
+    from PyQt6.QtWidgets import QApplication
+    deadline = time.perf_counter() + seconds
+    while True:
+        QApplication.processEvents()
+        # Outside exec() deleteLater() never runs by itself; the widgets of replaced pages would pile up
+        QApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete.value)
+        if time.perf_counter() >= deadline:
+            return
+        time.sleep(0.001)
+
+
+def wait_until(condition, timeout=10.0, poll=0.0005):
+    """Process events until condition() holds; poll=0 spins, for steps driven by zero-delay timers"""
+    from PyQt6.QtWidgets import QApplication
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("benchmark step did not finish")
+        QApplication.processEvents()
+        if poll:
+            time.sleep(poll)
+
+
+def median_ms(samples):
+    return statistics.median(samples) * 1000
+
+
+class Environment:
+    """The app's widgets and pages against mock_server.py's Spotify and Gemini.
+
+    Runs in a scratch directory so caches and databases from a real
+    session neither speed up nor pollute the measurements. Startup work
+    (library sync, graph crawl, player polling) stays held back, so
+    nothing runs behind the measurements but what they start.
+    """
+
+    def __init__(self, latency=0.02, gemini_latency=0.05):
+        import spotipy
+        from PyQt6.QtWidgets import QWidget
+        from app import App
+        from background import hold_startup_work
+        from http_transport import get_session
+        from mock_server import MockServer, StaticToken
+        from recommendations import Recommendations
+        from spotify_scheduler import PLAYBACK, SpotifyScheduler
+
+        self.cwd = os.getcwd()
+        self.workdir = tempfile.mkdtemp(prefix="benchmark-")
+        shutil.copy(os.path.join(APP_DIR, "background.gif"), self.workdir)
+        os.chdir(self.workdir)
+        hold_startup_work()
+
+        self.mock = MockServer(latency=latency, gemini_latency=gemini_latency).start()
+        spotify = spotipy.Spotify(auth_manager=StaticToken(), requests_session=get_session())
+        spotify.prefix = self.mock.prefix
+        Recommendations.gemini_endpoint = self.mock.url
+        self.scheduler = SpotifyScheduler(spotify, requests_per_second=1000)
+        self.sp = self.scheduler.client()
+
+        self.window = QWidget()
+        self.window.resize(1000, 700)
+        self.app = App(self.window, self.sp.with_priority(PLAYBACK))
+        self.window.show()
+        process_events(0.1)
+
+    def page(self, page_type):
+        page = page_type(self.sp, "US")
+        page.setup_ui(self.app)
+        process_events()
+        return page
+
+    def close(self):
+        self.window.close()
+        self.mock.stop()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def bench_memory(env, repeat):
+    """Python memory held by each page once built and shown.
+
+    Counted with tracemalloc, which is exact from run to run; a process
+    RSS delta is dominated by allocator noise. Qt's own allocations are
+    not included.
+    """
+    from catalog import Catalog
+    from playlist import Playlist
+    from recommendations import Recommendations
+    from trends import Trends
+
+    results = {}
+    env.pages = []
+    tracemalloc.start()
+    try:
+        for name, page_type in (("recommendations", Recommendations), ("catalog", Catalog),
+                                ("trends", Trends), ("playlist", Playlist)):
+            gc.collect()
+            before = tracemalloc.get_traced_memory()[0]
+            env.pages.append(env.page(page_type))  # kept alive, as main.py keeps built pages
+            process_events(0.3)
+            gc.collect()
+            results[f"memory {name} page"] = ((tracemalloc.get_traced_memory()[0] - before) / 1e3, "KB")
+    finally:
+        tracemalloc.stop()
+    return results
+
+
+def bench_render(env, repeat):
+    """Time from set_items() until every card is inserted and the viewport repainted"""
+    from card_view import CardView
+    from image_loader import get_image_loader
+
+    # Covers already downloaded, so only model, layout and painting are measured
+    urls = [f"{env.mock.url}/img/{i}.png" for i in range(50)]
+    loader = get_image_loader()
+    loader.prefetch(urls)
+    wait_until(lambda: all(loader.image(url) is not None for url in urls))
+
+    view = CardView(mode="list", columns=2, max_image_size=150)
+    view.resize(900, 600)
+    view.show()
+    results = {}
+    for count in CARD_COUNTS:
+        items = [{"title": f"Track {i}", "subtitle": f"Artist {i}", "image_url": urls[i % len(urls)]}
+                 for i in range(count)]
+        samples = []
+        for _ in range(repeat):
+            view.clear()
+            process_events()
+            start = time.perf_counter()
+            view.set_items(items)
+            wait_until(lambda: not view.is_rendering(), poll=0)
+            view.viewport().repaint()
+            samples.append(time.perf_counter() - start)
+        results[f"render {count} cards"] = (median_ms(samples), "ms")
+    view.close()
+    return results
+
+
+def bench_search(env, repeat):
+    """Search end to end: from the call until results are on screen"""
+    from catalog import Catalog
+    from recommendations import Recommendations
+
+    def timed_search(page, callback_name, search):
+        done = []
+        query = [None]
+        callback = getattr(page, callback_name)
+
+        def finished(finished_query, *args):
+            callback(finished_query, *args)
+            # Pages search on their own when first shown; only our query counts
+            if finished_query == query[0]:
+                page.results_view.viewport().repaint()
+                done.append(time.perf_counter())
+        setattr(page, callback_name, finished)
+        samples = []
+        for i in range(repeat):
+            done.clear()
+            query[0] = f"benchmark {i} {time.time()}"  # a new query each time, nothing cached
+            start = time.perf_counter()
+            search(query[0])
+            wait_until(lambda: done)
+            samples.append(done[0] - start)
+        return median_ms(samples)
+
+    # One page on screen at a time, as in the app
+    recommendations = env.page(Recommendations)
+    results = {"search recommendations": (timed_search(recommendations, "on_recommendations_ready",
+                                                       recommendations.get_recommendations), "ms")}
+    catalog = env.page(Catalog)
+    results["search catalog"] = (timed_search(catalog, "on_results_ready", catalog.search_catalog), "ms")
+    return results
+
+
+def bench_resize(env, repeat):
+    """Relayout of a 500-card grid: resize until the viewport has repainted"""
+    from card_view import CardView
+
+    view = CardView(mode="grid", columns=lambda width: max(1, width // 220), max_image_size=150)
+    view.resize(1100, 600)
+    view.show()
+    view.set_items([{"category": "🎵 Track", "title": f"Track {i}", "subtitle": f"by Artist {i}",
+                     "image_url": f"{env.mock.url}/img/{i % 50}.png"} for i in range(500)])
+    wait_until(lambda: not view.is_rendering())
+    process_events(0.2)
+    samples = []
+    for i in range(repeat * 4):
+        start = time.perf_counter()
+        view.resize(700 if i % 2 == 0 else 1100, 600)
+        process_events()
+        view.viewport().repaint()
+        samples.append(time.perf_counter() - start)
+    view.close()
+    return {"resize 500-card grid": (median_ms(samples), "ms")}
+
+
+def bench_player(env, repeat):
+    """Player bar poll: GUI-thread cost of showing a state, and the full round trip"""
+    controls = env.app.player_controls
+    current = env.mock.playback({}, None, b"")
+    controls.show_playback(current)  # the first call starts the album art download
+    start = time.perf_counter()
+    runs = 200
+    for _ in range(runs):
+        controls.show_playback(current)
+    results = {"player poll GUI update": ((time.perf_counter() - start) / runs * 1000, "ms")}
+
+    samples = []
+    for _ in range(repeat * 4):
+        controls.playback_reads.invalidate()
+        start = time.perf_counter()
+        controls.update_playback()
+        wait_until(lambda: not controls.polling)
+        samples.append(time.perf_counter() - start)
+    results["player poll round trip"] = (median_ms(samples), "ms")
+    return results
+
+
+def bench_theme(env, repeat):
+    """Switching between dark and light theme with a page of results showing"""
+    from recommendations import Recommendations
+
+    page = env.page(Recommendations)
+    page.get_recommendations("theme benchmark")
+    wait_until(lambda: page.results_view.card_model.rowCount() > 0 and not page.results_view.is_rendering())
+    samples = []
+    for _ in range(repeat * 2):  # an even number, so the theme ends where it started
+        start = time.perf_counter()
+        env.app.theme_manager.toggle_theme()
+        process_events()
+        samples.append(time.perf_counter() - start)
+    return {"theme toggle": (median_ms(samples), "ms")}
+
+
+# Memory first, while the process is still lean
+BENCHMARKS = [bench_memory, bench_render, bench_search, bench_resize, bench_player, bench_theme]
+
+
+def run(repeat=5, latency=0.02, gemini_latency=0.05, only=None):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, APP_DIR)
+    from PyQt6.QtWidgets import QApplication
+    qt_app = QApplication.instance() or QApplication(sys.argv[:1])
+    env = Environment(latency, gemini_latency)
+    results = {}
+    try:
+        for bench in BENCHMARKS:
+            if only and only not in bench.__name__:
+                continue
+            for name, (value, unit) in bench(env, repeat).items():
+                results[name] = {"value": round(value, 3), "unit": unit}
+                print(f"  {name:<28} {value:10.2f} {unit}")
+    finally:
+        env.close()
+        qt_app.processEvents()
+    return results
+
+
+def compare(results, baselines, threshold):
+    """Print results against baselines; returns the names that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':<28} {'result':>12} {'baseline':>12} {'change':>8}")
+    for name, result in results.items():
+        value, unit = result["value"], result["unit"]
+        base = baselines.get(name, {}).get("value")
+        if base is None or base <= 0:
+            print(f"{name:<28} {value:9.2f} {unit:<2} {'-':>12} {'new':>8}")
+            continue
+        change = (value - base) / base if base else 0.0
+        regressed = value > base * (1 + threshold) and value - base > SLACK_FOR.get(name, SLACK.get(unit, 0))
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<28} {value:9.2f} {unit:<2} {base:9.2f} {unit:<2} {change:+7.0%}{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offscreen UI benchmarks against mock_server.py's Spotify and Gemini")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per timing; the median is reported")
+    parser.add_argument("--latency", type=float, default=0.02, help="mock Spotify response time, seconds")
+    parser.add_argument("--gemini-latency", type=float, default=0.05, help="mock Gemini response time, seconds")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown over baseline, as a fraction")
+    parser.add_argument("--only", help="run only benchmarks whose function name contains this")
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument("--update-baselines", action="store_true", help="store these results as the new baselines")
+    args = parser.parse_args()
+
+    settings = {"latency": args.latency, "gemini_latency": args.gemini_latency, "repeat": args.repeat}
+    results = run(args.repeat, args.latency, args.gemini_latency, args.only)
+
+    stored = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines, encoding="utf-8") as f:
+            stored = json.load(f)
+    if args.update_baselines:
+        # A zero or negative measurement is noise, not something to compare against
+        rejected = [name for name, result in results.items() if result["value"] <= 0]
+        for name in rejected:
+            print(f"Not storing {name}: {results.pop(name)['value']} is not a usable baseline")
+        baselines = dict(stored.get("results", {}), **results)
+        for name in rejected:
+            baselines.pop(name, None)
+        with open(args.baselines, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "results": baselines}, f, indent=2)
+            f.write("\n")
+        print(f"\nBaselines written to {args.baselines}")
+        sys.exit(0)
+    if stored.get("settings", settings) != settings:
+        print(f"\nWarning: baselines were recorded with {stored['settings']}, this run used {settings}")
+    regressions = compare(results, stored.get("results", {}), args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
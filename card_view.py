@@ -0,0 +1,396 @@
+from PyQt6.QtWidgets import QListView, QStyledItemDelegate, QAbstractItemView
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QSize, QRect, QTimer
+from PyQt6.QtGui import QPixmap, QColor, QFont, QPen, QPainter
+from collections import OrderedDict
+import time
+
+import tracing
+from image_loader import get_image_loader
+
+# Custom roles exposed by CardModel
+TitleRole = Qt.ItemDataRole.UserRole + 1
+SubtitleRole = Qt.ItemDataRole.UserRole + 2
+CategoryRole = Qt.ItemDataRole.UserRole + 3
+ImageUrlRole = Qt.ItemDataRole.UserRole + 4
+NumberRole = Qt.ItemDataRole.UserRole + 5
+ImageLoadingRole = Qt.ItemDataRole.UserRole + 6
+BadgeRole = Qt.ItemDataRole.UserRole + 7
+
+
+class CardModel(QAbstractListModel):
+    """List model holding one plain dict per card.
+
+    Items use the keys "title", "subtitle", "category", "image_url",
+    "number" and "badge"; every key is optional. Cover art is only requested from the
+    shared ImageLoader when a card is first painted, so off-screen items
+    cost nothing; the card repaints once its image arrives.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._items = []
+        self._rows_by_url = {}  # image url -> rows showing it
+        self._pixmaps = {}  # image url -> QPixmap
+        self.loader = get_image_loader()
+        self._load_image = self.loader.image
+        self.loader.image_loaded.connect(self._on_image_ready)
+        self.loader.image_failed.connect(self._on_image_ready)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._items)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._items):
+            return None
+        item = self._items[index.row()]
+        if role in (Qt.ItemDataRole.DisplayRole, TitleRole):
+            return item.get("title", "")
+        if role == SubtitleRole:
+            return item.get("subtitle", "")
+        if role == CategoryRole:
+            return item.get("category")
+        if role == ImageUrlRole:
+            return item.get("image_url")
+        if role == NumberRole:
+            return item.get("number")
+        if role == BadgeRole:
+            return item.get("badge")
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self.pixmap(item.get("image_url"))
+        if role == ImageLoadingRole:
+            url = item.get("image_url")
+            return bool(url) and url not in self._pixmaps and not self.loader.has_failed(url)
+        return None
+
+    def set_items(self, items):
+        # Covers requested while painting these items join the trace that set them
+        self._load_image = tracing.bind(self.loader.image)
+        self.beginResetModel()
+        self._items = list(items)
+        self._rows_by_url = {}
+        self._index_rows(0)
+        self.endResetModel()
+
+    def append_items(self, items):
+        if not items:
+            return
+        first = len(self._items)
+        self.beginInsertRows(QModelIndex(), first, first + len(items) - 1)
+        self._items.extend(items)
+        self._index_rows(first)
+        self.endInsertRows()
+
+    def _index_rows(self, first):
+        for row in range(first, len(self._items)):
+            url = self._items[row].get("image_url")
+            if url:
+                self._rows_by_url.setdefault(url, []).append(row)
+
+    def _on_image_ready(self, url):
+        for row in self._rows_by_url.get(url, ()):
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+    def clear(self):
+        self.set_items([])
+
+    def drop_unused_pixmaps(self):
+        """Forget covers of items no longer in the model; the loader's cache still has their images"""
+        self._pixmaps = {url: pixmap for url, pixmap in self._pixmaps.items() if url in self._rows_by_url}
+
+    def pixmap(self, image_url):
+        """Return the cover for image_url, or None while it is still loading"""
+        if not image_url:
+            return None
+        pixmap = self._pixmaps.get(image_url)
+        if pixmap is None:
+            image = self._load_image(image_url)
+            if image is None:
+                return None
+            pixmap = self._pixmaps[image_url] = QPixmap.fromImage(image)
+        return pixmap
+
+
+class CardDelegate(QStyledItemDelegate):
+    """Paints a card directly instead of building a widget tree per item.
+
+    "grid" mode stacks category, image and text vertically (Catalog);
+    "list" mode puts an optional number and the image left of the title
+    and subtitle (Recommendations, Playlist, Trends).
+    """
+
+    def __init__(self, mode="grid", border_color="#1DB954", parent=None, max_scaled=300):
+        super().__init__(parent)
+        self.mode = mode
+        self.border_color = border_color
+        self.item_width = 200
+        self.image_size = 100
+        self.max_scaled = max_scaled
+        self._scaled = OrderedDict()  # image url -> pixmap scaled to image_size, least recently painted first
+
+        self.category_font = QFont()
+        self.category_font.setPixelSize(12)
+        self.category_font.setBold(True)
+        self.title_font = QFont()
+        self.title_font.setPixelSize(16 if mode == "list" else 14)
+        self.title_font.setBold(mode == "list")
+        self.subtitle_font = QFont()
+        self.subtitle_font.setPixelSize(14)
+        self.number_font = QFont()
+        self.number_font.setPixelSize(16)
+        self.number_font.setBold(True)
+
+    def set_geometry(self, item_width, image_size):
+        self.item_width = item_width
+        if max(image_size, 0) != self.image_size:
+            self._scaled.clear()  # Sizes passed through while resizing are not kept
+        self.image_size = max(image_size, 0)
+
+    def item_height(self):
+        if self.mode == "grid":
+            # margins + category + image + two lines of text
+            return 10 + 18 + 10 + self.image_size + 10 + 40 + 10
+        return self.image_size + 20
+
+    def sizeHint(self, option, index):
+        return QSize(self.item_width, self.item_height())
+
+    def scaled_pixmap(self, index):
+        image_url = index.data(ImageUrlRole)
+        scaled = self._scaled.get(image_url)
+        if scaled is not None:
+            self._scaled.move_to_end(image_url)
+            return scaled
+        pixmap = index.data(Qt.ItemDataRole.DecorationRole)
+        if pixmap is None:
+            return None
+        with tracing.span("image.scale", url=image_url, size=self.image_size):
+            scaled = self._scaled[image_url] = pixmap.scaled(
+                self.image_size, self.image_size,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation
+            )
+        while len(self._scaled) > self.max_scaled:
+            self._scaled.popitem(last=False)
+        return scaled
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        rect = option.rect.adjusted(1, 1, -1, -1)
+        painter.setPen(QPen(QColor(self.border_color), 1) if self.border_color else Qt.PenStyle.NoPen)
+        painter.setBrush(QColor("#2A2A2A"))
+        painter.drawRoundedRect(rect, 8, 8)
+
+        inner = rect.adjusted(10, 10, -10, -10)
+        if self.mode == "grid":
+            self._paint_grid(painter, inner, index)
+        else:
+            self._paint_list(painter, inner, index)
+
+        badge = index.data(BadgeRole)
+        if badge:
+            self._paint_badge(painter, rect, badge)
+
+        painter.restore()
+
+    def _paint_badge(self, painter, rect, text):
+        painter.setFont(self.category_font)
+        width = painter.fontMetrics().horizontalAdvance(text) + 12
+        badge_rect = QRect(rect.right() - width - 6, rect.y() + 6, width, 18)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor("#1DB954"))
+        painter.drawRoundedRect(badge_rect, 9, 9)
+        painter.setPen(QColor("#FFFFFF"))
+        painter.drawText(badge_rect, Qt.AlignmentFlag.AlignCenter, text)
+
+    def _paint_image(self, painter, target, index):
+        pixmap = self.scaled_pixmap(index)
+        if pixmap is None:
+            painter.setFont(self.category_font)
+            painter.setPen(QColor("#AAAAAA"))
+            painter.drawText(target, Qt.AlignmentFlag.AlignCenter, "Loading..." if index.data(ImageLoadingRole) else "No Image")
+            return
+        x = target.x() + (target.width() - pixmap.width()) // 2
+        y = target.y() + (target.height() - pixmap.height()) // 2
+        painter.drawPixmap(x, y, pixmap)
+
+    def _paint_grid(self, painter, inner, index):
+        painter.setFont(self.category_font)
+        painter.setPen(QColor("#1DB954"))
+        category_rect = QRect(inner.x(), inner.y(), inner.width(), 18)
+        painter.drawText(category_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, index.data(CategoryRole) or "")
+
+        image_rect = QRect(inner.x() + (inner.width() - self.image_size) // 2, category_rect.bottom() + 10,
+                           self.image_size, self.image_size)
+        self._paint_image(painter, image_rect, index)
+
+        text = index.data(TitleRole)
+        subtitle = index.data(SubtitleRole)
+        if subtitle:
+            text = f"{text}\n{subtitle}"
+        text_rect = QRect(inner.x(), image_rect.bottom() + 10, inner.width(), inner.bottom() - image_rect.bottom() - 10)
+        painter.setFont(self.title_font)
+        painter.setPen(QColor("#FFFFFF"))
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop | Qt.TextFlag.TextWordWrap, text)
+
+    def _paint_list(self, painter, inner, index):
+        x = inner.x()
+        number = index.data(NumberRole)
+        if number is not None:
+            painter.setFont(self.number_font)
+            painter.setPen(QColor("#1DB954"))
+            painter.drawText(QRect(x, inner.y(), 30, inner.height()), Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, f"{number}.")
+            x += 30 + 15
+
+        image_rect = QRect(x, inner.y() + (inner.height() - self.image_size) // 2, self.image_size, self.image_size)
+        self._paint_image(painter, image_rect, index)
+
+        text_x = image_rect.right() + 15
+        text_width = max(inner.right() - text_x, 0)
+        title_height = inner.height() // 2
+        painter.setFont(self.title_font)
+        painter.setPen(QColor("#FFFFFF"))
+        painter.drawText(QRect(text_x, inner.y(), text_width, title_height),
+                         Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignBottom | Qt.TextFlag.TextWordWrap,
+                         index.data(TitleRole))
+        painter.setFont(self.subtitle_font)
+        painter.setPen(QColor("#AAAAAA"))
+        painter.drawText(QRect(text_x, inner.y() + title_height + 5, text_width, inner.height() - title_height - 5),
+                         Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop | Qt.TextFlag.TextWordWrap,
+                         index.data(SubtitleRole))
+
+
+class CardView(QListView):
+    """Scrollable, wrapping card grid shared by all pages.
+
+    columns is either a fixed count or a callable taking the available
+    width and returning the number of columns, so each page keeps its own
+    responsive rules. Only the rows inside the viewport are painted.
+
+    Large result sets are inserted progressively: the cards that fit in
+    the viewport go in immediately, the rest are appended in batches of
+    batch_size spread over event-loop ticks, each tick spending at most
+    slice_ms with view updates suspended.
+    """
+
+    def __init__(self, mode="grid", columns=1, max_image_size=150, border_color="#1DB954",
+                 batch_size=50, slice_ms=8, parent=None):
+        super().__init__(parent)
+        self.columns = columns
+        self.max_image_size = max_image_size
+        self.message = None
+        self.batch_size = batch_size
+        self.slice_ms = slice_ms
+        self._pending = []
+
+        self._render_timer = QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.setInterval(0)
+        self._render_timer.timeout.connect(self._render_next_slice)
+
+        self.card_model = CardModel(self)
+        self.delegate = CardDelegate(mode, border_color, self)
+        self.setModel(self.card_model)
+        self.setItemDelegate(self.delegate)
+
+        self.setFlow(QListView.Flow.LeftToRight)
+        self.setWrapping(True)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setMovement(QListView.Movement.Static)
+        self.setUniformItemSizes(True)
+        # Lay items out in batches too, so relayout of a long list never blocks input
+        self.setLayoutMode(QListView.LayoutMode.Batched)
+        self.setBatchSize(batch_size * 4)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setStyleSheet("QListView { border: none; background: transparent; }")
+        self.update_geometry()
+
+    def column_count(self, width):
+        columns = self.columns(width) if callable(self.columns) else self.columns
+        return max(1, columns)
+
+    def update_geometry(self):
+        spacing = 15
+        width = self.viewport().width()
+        columns = self.column_count(width)
+        item_width = max(width // columns - spacing - 1, 50)
+        if self.delegate.mode == "grid":
+            image_size = min(self.max_image_size, item_width - 40)
+        else:
+            image_size = min(self.max_image_size, item_width // 3)
+        self.delegate.set_geometry(item_width, image_size)
+        self.setGridSize(QSize(item_width + spacing, self.delegate.item_height() + spacing))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_geometry()
+
+    def visible_capacity(self):
+        """Number of cards needed to fill the viewport (plus one row)"""
+        grid = self.gridSize()
+        columns = max(self.viewport().width() // max(grid.width(), 1), 1)
+        rows = self.viewport().height() // max(grid.height(), 1) + 2
+        return columns * rows
+
+    def set_items(self, items):
+        self.message = None
+        self._render_timer.stop()
+        items = list(items)
+        # Above-the-fold cards are inserted right away so the page paints at once
+        first = self.visible_capacity()
+        self.card_model.set_items(items[:first])
+        self._pending = items[first:]
+        self.scrollToTop()
+        if self._pending:
+            self._render_timer.start()
+        else:
+            self.card_model.drop_unused_pixmaps()
+
+    def is_rendering(self):
+        return bool(self._pending)
+
+    def _render_next_slice(self):
+        deadline = time.perf_counter() + self.slice_ms / 1000
+        self.setUpdatesEnabled(False)
+        try:
+            while self._pending and time.perf_counter() < deadline:
+                batch = self._pending[:self.batch_size]
+                del self._pending[:self.batch_size]
+                self.card_model.append_items(batch)
+        finally:
+            self.setUpdatesEnabled(True)
+        if self._pending:
+            self._render_timer.start()
+        else:
+            # Only once all items are in, or the covers of pending ones would be converted again
+            self.card_model.drop_unused_pixmaps()
+
+    def clear(self):
+        self.message = None
+        self._render_timer.stop()
+        self._pending = []
+        self.card_model.clear()
+
+    def show_message(self, text):
+        self._render_timer.stop()
+        self._pending = []
+        self.card_model.clear()
+        self.message = text
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.message and self.card_model.rowCount() == 0:
+            painter = QPainter(self.viewport())
+            font = QFont()
+            font.setPixelSize(14)
+            painter.setFont(font)
+            painter.setPen(QColor("#FFFFFF"))
+            painter.drawText(self.viewport().rect().adjusted(20, 20, -20, -20),
+                             Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop | Qt.TextFlag.TextWordWrap,
+                             self.message)
@@ -1,12 +1,17 @@
 import spotipy
+from PyQt6 import sip
 from PyQt6.QtWidgets import (QLabel, QLineEdit, QPushButton, QWidget, 
-                            QHBoxLayout, QVBoxLayout, QGridLayout, 
-                            QSizePolicy, QSpacerItem, QScrollArea)
-from PyQt6.QtCore import Qt, QSize
-from PyQt6.QtGui import QPixmap, QFont
-import requests
-from io import BytesIO
-import re
+                            QHBoxLayout, QVBoxLayout)
+from PyQt6.QtCore import Qt
+
+from async_spotify import get_async_spotify
+from background import after_startup, run_async
+from profiling import begin_interaction, profiled
+import tracing
+from card_view import CardView
+from entities import Album, Artist, Track
+from metadata_store import get_metadata_store, merge_results
+from spotify_scheduler import INTERACTIVE, with_priority
 
 class Catalog:
     def __init__(self, sp, market):
@@ -19,6 +24,8 @@ class Catalog:
             "artists": [],
             "albums": []
         }
+        self.store = get_metadata_store()
+        self.current_query = None
 
     def setup_ui(self, app):
         app.clear_content()
@@ -69,19 +76,13 @@ class Catalog:
         
         main_layout.addWidget(input_container)
         
-        # Create scroll area for content
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setStyleSheet("border: none;")
-        
-        # Content container
-        self.content_container = QWidget()
-        self.content_grid = QGridLayout(self.content_container)
-        self.content_grid.setAlignment(Qt.AlignmentFlag.AlignTop)
-        self.content_grid.setSpacing(15)
-        
-        scroll_area.setWidget(self.content_container)
-        main_layout.addWidget(scroll_area)
+        # Results are painted by a shared model/view card grid
+        self.results_view = CardView(
+            mode="grid",
+            columns=lambda width: 2 if width < 600 else 3,
+            max_image_size=self.max_image_size
+        )
+        main_layout.addWidget(self.results_view)
         
         # Add main container to app's content grid
         app.content_grid.addWidget(main_container, 0, 0)
@@ -89,148 +90,83 @@ class Catalog:
         # Set default placeholder text (no need to set actual text)
         self.input_field.setPlaceholderText("Search artists, tracks, or albums...")
         
-        # Optionally perform a default search
-        self.search_catalog("Red Hot Chili Peppers")  # Default search term
+        # Optionally perform a default search, once the window has painted
+        after_startup(self.search_catalog, "Red Hot Chili Peppers")  # Default search term
 
+    @profiled("catalog search", timed=False)
+    @tracing.traced("catalog.search")
     def search_catalog(self, query):
+        # Timed until Spotify's results are shown, not just until the request is sent
+        self.search_interaction = begin_interaction("catalog search")
         self.clear_results()
+        self.current_query = query
 
         if not query:
             self.show_message("Please enter a search term.")
+            self.search_interaction.finish()
             return
 
-        try:
-            results = self.sp.search(q=query, type="track,artist,album", limit=5, market=self.market)
-            
-            self.catalog_data = {
-                "tracks": [],
-                "artists": [],
-                "albums": []
-            }
+        # Local matches show instantly while Spotify is searched in the background
+        local_data = self.store.search(query, limit=5)
+        if any(local_data.values()):
+            self.catalog_data = local_data
+            self.display_results(self.catalog_data)
+        else:
+            self.show_message("Searching...")
 
-            if results.get('tracks', {}).get('items'):
-                for track in results['tracks']['items']:
-                    image_url = track['album']['images'][0]['url'] if track['album']['images'] else None
-                    self.catalog_data["tracks"].append({
-                        "name": track['name'],
-                        "artist": track['artists'][0]['name'],
-                        "image_url": image_url
-                    })
+        run_async(self.fetch_results(query),
+                  on_done=lambda data: self.on_results_ready(query, data, local_data),
+                  on_error=lambda error: self.on_search_failed(query, error, local_data))
 
-            if results.get('artists', {}).get('items'):
-                for artist in results['artists']['items']:
-                    image_url = artist['images'][0]['url'] if artist.get('images') else None
-                    self.catalog_data["artists"].append({
-                        "name": artist['name'],
-                        "genres": ', '.join(artist['genres'][:3]) if artist['genres'] else 'Various genres',
-                        "image_url": image_url
-                    })
+    async def fetch_results(self, query):
+        """Search Spotify and store what it returns"""
+        results = await get_async_spotify(with_priority(self.sp, INTERACTIVE)).search(q=query, type="track,artist,album", limit=5, market=self.market)
+        catalog_data = {
+            "tracks": [Track.from_spotify(t) for t in results.get('tracks', {}).get('items') or [] if t],
+            "artists": [Artist.from_spotify(a) for a in results.get('artists', {}).get('items') or [] if a],
+            "albums": [Album.from_spotify(a) for a in results.get('albums', {}).get('items') or [] if a]
+        }
+        for kind, entries in catalog_data.items():
+            self.store.add(kind, entries)
+        return catalog_data
 
-            if results.get('albums', {}).get('items'):
-                for album in results['albums']['items']:
-                    image_url = album['images'][0]['url'] if album['images'] else None
-                    self.catalog_data["albums"].append({
-                        "name": album['name'],
-                        "artist": album['artists'][0]['name'],
-                        "image_url": image_url
-                    })
+    def is_current(self, query):
+        return query == self.current_query and not sip.isdeleted(self.results_view)
 
-            self.display_results(self.catalog_data)
+    def on_results_ready(self, query, catalog_data, local_data):
+        if not self.is_current(query):
+            return
+        self.catalog_data = merge_results(catalog_data, local_data)
+        self.display_results(self.catalog_data)
+        self.search_interaction.finish()
 
-        except spotipy.exceptions.SpotifyException as e:
-            self.show_message(f"Spotify API Error: {str(e)}")
-        except Exception as e:
-            self.show_message(f"Error: {str(e)}")
+    def on_search_failed(self, query, error, local_data):
+        if not self.is_current(query):
+            return
+        self.search_interaction.finish()
+        if any(local_data.values()):
+            # Keep showing the local matches
+            print(f"Catalog search error: {error}")
+        elif isinstance(error, spotipy.exceptions.SpotifyException):
+            self.show_message(f"Spotify API Error: {str(error)}")
+        else:
+            self.show_message(f"Error: {str(error)}")
 
+    @tracing.traced("render.catalog")
     def display_results(self, catalog_data):
-        self.clear_results()
-        
         if not any(catalog_data.values()):
             self.show_message("No results found. Try a different search.")
             return
         
-        content_width = self.content_container.width() - 40
-        items_per_row = 2 if content_width < 600 else 3
-        image_size = min(self.max_image_size, (content_width // items_per_row) - 40)
-        
         all_items = []
-        all_items.extend([("🎵 Track", f"{t['name']}\nby {t['artist']}", t['image_url']) for t in catalog_data['tracks']])
-        all_items.extend([("🎤 Artist", f"{a['name']}\n{a['genres']}", a['image_url']) for a in catalog_data['artists']])
-        all_items.extend([("💿 Album", f"{a['name']}\nby {a['artist']}", a['image_url']) for a in catalog_data['albums']])
+        all_items.extend([{"category": "🎵 Track", "title": t.name, "subtitle": f"by {t.artist}", "image_url": t.image_url} for t in catalog_data['tracks']])
+        all_items.extend([{"category": "🎤 Artist", "title": a.name, "subtitle": ', '.join(a.genres[:3]) if a.genres else 'Various genres', "image_url": a.image_url} for a in catalog_data['artists']])
+        all_items.extend([{"category": "💿 Album", "title": a.name, "subtitle": f"by {a.artist}", "image_url": a.image_url} for a in catalog_data['albums']])
         
-        for i, (category, text, image_url) in enumerate(all_items):
-            row = i // items_per_row
-            col = i % items_per_row
-            
-            card = QWidget()
-            card.setStyleSheet("""
-                background-color: #2A2A2A; 
-                border-radius: 8px; 
-                padding: 10px;
-                border: 1px solid #1DB954;
-            """)
-            card.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
-            
-            layout = QVBoxLayout(card)
-            layout.setContentsMargins(10, 10, 10, 10)
-            layout.setSpacing(10)
-            
-            category_label = QLabel(category)
-            category_label.setStyleSheet("font-size: 12px; color: #1DB954; font-weight: bold;")
-            layout.addWidget(category_label)
-            
-            image_label = QLabel()
-            image_label.setFixedSize(image_size, image_size)
-            image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            
-            if image_url:
-                try:
-                    response = requests.get(image_url)
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(response.content)
-                    pixmap = pixmap.scaled(
-                        image_size, image_size, 
-                        Qt.AspectRatioMode.KeepAspectRatio, 
-                        Qt.TransformationMode.SmoothTransformation
-                    )
-                    image_label.setPixmap(pixmap)
-                except Exception:
-                    image_label.setText("No Image")
-                    image_label.setStyleSheet("color: #AAAAAA; font-size: 12px;")
-            else:
-                image_label.setText("No Image")
-                image_label.setStyleSheet("color: #AAAAAA; font-size: 12px;")
-            
-            layout.addWidget(image_label, 0, Qt.AlignmentFlag.AlignCenter)
-            
-            text_label = QLabel(text)
-            text_label.setStyleSheet("font-size: 14px; color: #FFFFFF;")
-            text_label.setWordWrap(True)
-            text_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            layout.addWidget(text_label)
-            
-            self.content_grid.addWidget(card, row, col)
-        
-        self.content_container.adjustSize()
+        self.results_view.set_items(all_items)
 
     def clear_results(self):
-        for i in range(self.content_grid.count() - 1, -1, -1):
-            widget = self.content_grid.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
-        
-        self.content_grid.addItem(
-            QSpacerItem(20, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding), 
-            0, 0, 1, 3
-        )
+        self.results_view.clear()
 
     def show_message(self, text):
-        self.clear_results()
-        
-        message = QLabel(text)
-        message.setStyleSheet("font-size: 14px; color: #FFFFFF; padding: 20px;")
-        message.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        message.setWordWrap(True)
-        
-        self.content_grid.addWidget(message, 0, 0, 1, 3)
-        self.content_container.adjustSize()
\ No newline at end of file
+        self.results_view.show_message(text)
@@ -0,0 +1,185 @@
+import argparse
+import sys
+import tracemalloc
+from array import array
+
+from image_urls import best_image_url
+
+
+def intern(text):
+    """Share one copy of strings that repeat across entities (artist names, markets)"""
+    return sys.intern(text) if text else text
+
+
+def first_artist(obj):
+    artists = obj.get('artists')
+    return intern(artists[0]['name']) if artists else None
+
+
+class Track:
+    """A track as the pages use it; from_spotify() keeps only these fields"""
+    __slots__ = ("id", "name", "artist", "album", "image_url")
+
+    def __init__(self, id, name, artist=None, album=None, image_url=None):
+        self.id = id
+        self.name = name
+        self.artist = artist
+        self.album = album
+        self.image_url = image_url
+
+    def __repr__(self):
+        return f"Track({self.name!r} by {self.artist!r})"
+
+    @classmethod
+    def from_spotify(cls, track, image_size=150):
+        album = track.get('album') or {}
+        return cls(track.get('id'), track['name'], first_artist(track), intern(album.get('name')),
+                   best_image_url(album.get('images'), image_size))
+
+
+class Artist:
+    __slots__ = ("id", "name", "genres", "image_url")
+
+    def __init__(self, id, name, genres=(), image_url=None):
+        self.id = id
+        self.name = name
+        self.genres = genres
+        self.image_url = image_url
+
+    def __repr__(self):
+        return f"Artist({self.name!r})"
+
+    @classmethod
+    def from_spotify(cls, artist, image_size=150):
+        return cls(artist['id'], intern(artist['name']), tuple(intern(g) for g in artist.get('genres') or ()),
+                   best_image_url(artist.get('images'), image_size))
+
+
+class Album:
+    __slots__ = ("id", "name", "artist", "image_url")
+
+    def __init__(self, id, name, artist=None, image_url=None):
+        self.id = id
+        self.name = name
+        self.artist = artist
+        self.image_url = image_url
+
+    def __repr__(self):
+        return f"Album({self.name!r} by {self.artist!r})"
+
+    @classmethod
+    def from_spotify(cls, album, image_size=150):
+        return cls(album['id'], intern(album['name']), first_artist(album),
+                   best_image_url(album.get('images'), image_size))
+
+
+class TrackList:
+    """Column-per-field storage for long track lists such as big playlists.
+
+    Holds one list per field instead of one object per track; indexing
+    builds a Track on demand.
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.names = []
+        self.artists = []
+        self.albums = []
+        self.image_urls = []
+        self.durations = array("L")  # milliseconds
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return Track(self.ids[index], self.names[index], self.artists[index],
+                     self.albums[index], self.image_urls[index])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, track, image_size=150):
+        """Add a raw Spotify track object"""
+        album = track.get('album') or {}
+        self.ids.append(track.get('id'))
+        self.names.append(track['name'])
+        self.artists.append(first_artist(track))
+        self.albums.append(intern(album.get('name')))
+        # Every track of an album shares the same cover URL
+        self.image_urls.append(intern(best_image_url(album.get('images'), image_size)))
+        self.durations.append(track.get('duration_ms') or 0)
+
+    @classmethod
+    def from_items(cls, items, image_size=150):
+        """Build from playlist or saved-track items ({"track": {...}, ...})"""
+        tracks = cls()
+        for item in items:
+            if item.get('track') and item['track'].get('name'):
+                tracks.append(item['track'], image_size)
+        return tracks
+
+
+def sample_playlist_items(n=10000, artists=500, albums=1500):
+    """Synthetic playlist items shaped like Spotify's full track objects"""
+    markets = ["AD", "AE", "AR", "AT", "AU", "BE", "BG", "BR", "CA", "CH", "CL", "CO", "CZ", "DE", "DK",
+               "ES", "FI", "FR", "GB", "GR", "HK", "HU", "ID", "IE", "IL", "IN", "IT", "JP", "MX", "NL",
+               "NO", "NZ", "PL", "PT", "SE", "SG", "TR", "TW", "US", "ZA"] * 4
+    items = []
+    for i in range(n):
+        artist = {"id": f"artist{i % artists:018d}", "name": f"Artist {i % artists}", "type": "artist",
+                  "uri": f"spotify:artist:{i % artists}",
+                  "external_urls": {"spotify": f"https://open.spotify.com/artist/{i % artists}"},
+                  "href": f"https://api.spotify.com/v1/artists/{i % artists}"}
+        album_id = i % albums
+        album = {"id": f"album{album_id:019d}", "name": f"Album {album_id}", "album_type": "album",
+                 "artists": [dict(artist)], "available_markets": list(markets),
+                 "release_date": "2020-01-01", "release_date_precision": "day", "total_tracks": 12,
+                 "images": [{"url": f"https://i.scdn.co/image/{album_id:040d}{size}", "height": size, "width": size}
+                            for size in (640, 300, 64)],
+                 "uri": f"spotify:album:{album_id}",
+                 "external_urls": {"spotify": f"https://open.spotify.com/album/{album_id}"},
+                 "href": f"https://api.spotify.com/v1/albums/{album_id}"}
+        track = {"id": f"track{i:017d}", "name": f"Song {i}", "artists": [dict(artist)], "album": album,
+                 "available_markets": list(markets), "duration_ms": 180000 + i, "explicit": False,
+                 "popularity": i % 100, "track_number": i % 12 + 1, "disc_number": 1, "is_local": False,
+                 "preview_url": f"https://p.scdn.co/mp3-preview/{i:040d}",
+                 "external_ids": {"isrc": f"US{i:010d}"}, "uri": f"spotify:track:{i}",
+                 "external_urls": {"spotify": f"https://open.spotify.com/track/{i}"},
+                 "href": f"https://api.spotify.com/v1/tracks/{i}"}
+        items.append({"added_at": "2024-01-01T00:00:00Z", "added_by": {"id": "user"}, "is_local": False,
+                      "track": track})
+    return items
+
+
+def measure(build):
+    """Bytes still allocated by build()'s result once everything else is freed"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, size
+
+
+def benchmark(n=10000):
+    """Memory of a parsed n-track playlist under each representation"""
+    sizes = {}
+    items, sizes["raw payload"] = measure(lambda: sample_playlist_items(n))
+    _, sizes["dicts"] = measure(lambda: [
+        {"name": i['track']['name'], "artist": i['track']['artists'][0]['name'],
+         "image_url": i['track']['album']['images'][0]['url']} for i in items])
+    _, sizes["slotted Track"] = measure(lambda: [Track.from_spotify(i['track']) for i in items])
+    _, sizes["TrackList"] = measure(lambda: TrackList.from_items(items))
+    return sizes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure memory of parsed playlist tracks")
+    parser.add_argument("--n", type=int, default=10000)
+    args = parser.parse_args()
+    sizes = benchmark(args.n)
+    for name, size in sizes.items():
+        print(f"{name:14} {size / 1024:10.0f} KiB  {size / args.n:8.0f} B/track")
@@ -0,0 +1,157 @@
+import random
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import tracing
+
+# (connect, read) seconds, used when a caller passes no timeout
+DEFAULT_TIMEOUT = (3.05, 10)
+RETRIES = 3
+BACKOFF = 0.3
+JITTER = 0.5
+
+_session = None
+_session_lock = threading.Lock()
+_async_client = None
+_async_counts = {}  # host -> {"connections", "requests"} of the async client
+_async_counts_lock = threading.Lock()
+
+
+class JitterRetry(Retry):
+    """Exponential backoff with up to jitter seconds of randomness added,
+    so clients that failed together do not retry together."""
+
+    def __init__(self, *args, jitter=0.5, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.jitter = jitter
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.jitter = self.jitter
+        return retry
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return backoff + random.uniform(0, self.jitter) if backoff else backoff
+
+
+class TransportSession(requests.Session):
+    """requests.Session that applies a default timeout to every request"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        with tracing.span("http.request", method=method, url=url.split("?", 1)[0]) as current:
+            response = super().request(method, url, **kwargs)
+            current.set("status", response.status_code)
+            return response
+
+
+def retry_delay(attempt, backoff=BACKOFF, jitter=JITTER):
+    """Seconds to wait before retry number attempt (from 0), backing off like JitterRetry"""
+    return backoff * 2 ** attempt + random.uniform(0, jitter)
+
+
+def build_session(pool_hosts=10, pool_size=16, retries=RETRIES, backoff=BACKOFF, jitter=JITTER, timeout=DEFAULT_TIMEOUT):
+    """Session with keep-alive pools of pool_size connections for up to pool_hosts hosts.
+
+    Connection failures and 5xx responses to idempotent requests are
+    retried; 429s are not, so the Spotify scheduler sees their Retry-After.
+    """
+    session = TransportSession(timeout)
+    retry = JitterRetry(
+        total=retries,
+        read=False,
+        backoff_factor=backoff,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD", "PUT", "DELETE"]),
+        raise_on_status=False,
+        jitter=jitter,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    return session
+
+
+def get_session():
+    """The app-wide session: the Spotify client, OAuth and image downloads share its pools"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = build_session()
+        return _session
+
+
+def get_async_client(max_connections=20):
+    """The app-wide httpx.AsyncClient, for coroutines on background.run_async's loop.
+
+    It has the session's timeouts and headers; failed connections are
+    retried by httpx, and callers back off with retry_delay() before
+    retrying 5xx responses.
+    """
+    import httpx  # Imported on the loop thread, after startup
+    global _async_client
+    if _async_client is None:
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        _async_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(DEFAULT_TIMEOUT[1], connect=DEFAULT_TIMEOUT[0]),
+            headers={"Accept-Encoding": "gzip, deflate"},
+            transport=httpx.AsyncHTTPTransport(retries=RETRIES, limits=limits),
+        )
+    return _async_client
+
+
+def _count_async(host, key):
+    with _async_counts_lock:
+        entry = _async_counts.setdefault(host, {"connections": 0, "requests": 0})
+        entry[key] += 1
+
+
+async def async_request(method, url, **kwargs):
+    """Request through the shared async client, counted in transport_stats()"""
+    import httpx
+    host = httpx.URL(url).host
+
+    async def trace(event, info):
+        if event == "connection.connect_tcp.complete":
+            _count_async(host, "connections")
+
+    with tracing.span("http.request", method=method, url=url.split("?", 1)[0]) as current:
+        response = await get_async_client().request(method, url, extensions={"trace": trace}, **kwargs)
+        current.set("status", response.status_code)
+    _count_async(host, "requests")
+    return response
+
+
+def transport_stats(session=None):
+    """Connection reuse per host: {host: {"connections", "requests", "reuse"}}.
+
+    reuse is the share of requests that went over an already open
+    connection. Without a session, the app-wide session and async client
+    are counted together.
+    """
+    stats = {}
+    if session is None:
+        with _async_counts_lock:
+            stats = {host: dict(entry) for host, entry in _async_counts.items()}
+    session = session or get_session()
+    for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            entry = stats.setdefault(pool.host, {"connections": 0, "requests": 0})
+            entry["connections"] += pool.num_connections
+            entry["requests"] += pool.num_requests
+    for entry in stats.values():
+        entry["reuse"] = 1 - entry["connections"] / entry["requests"] if entry["requests"] else 0.0
+    return stats
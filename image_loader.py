@@ -0,0 +1,114 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from PyQt6.QtCore import QObject, QCoreApplication, pyqtSignal
+from PyQt6.QtGui import QImage
+
+import metrics
+import tracing
+from http_transport import get_session
+
+_loader = None
+
+
+def get_image_loader():
+    """Shared loader used by every page, so a cover is downloaded only once"""
+    global _loader
+    if _loader is None:
+        _loader = ImageLoader()
+        _loader.moveToThread(QCoreApplication.instance().thread())
+    return _loader
+
+
+class ImageLoader(QObject):
+    """Downloads and decodes cover art on a small thread pool.
+
+    Decoding to QImage happens off the GUI thread; image_loaded(url) is
+    emitted (and delivered on the GUI thread) once an image is available.
+    Decoded images are kept in an LRU cache of max_cached entries.
+    A URL that failed is retried after retry_after seconds, unless it is
+    gone (404/410) or did not decode.
+    """
+    image_loaded = pyqtSignal(str)
+    image_failed = pyqtSignal(str)
+
+    def __init__(self, max_workers=6, max_cached=500, timeout=10, retry_after=60):
+        super().__init__()
+        self.max_cached = max_cached
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-loader")
+        self._lock = threading.Lock()
+        self._images = OrderedDict()  # url -> QImage
+        self._pending = set()
+        self._failed = {}  # url -> monotonic time it may be retried, None for never
+
+    def image(self, url):
+        """Return the decoded image for url, or None and start fetching it"""
+        with self._lock:
+            image = self._images.get(url)
+            if image is not None:
+                self._images.move_to_end(url)
+        if image is not None:
+            metrics.inc("image_cache_requests_total", result="hit")
+            return image
+        metrics.inc("image_cache_requests_total", result="miss")
+        self.fetch(url)
+        return None
+
+    def has_failed(self, url):
+        with self._lock:
+            return self._has_failed(url)
+
+    def _has_failed(self, url):
+        if url not in self._failed:
+            return False
+        retry_at = self._failed[url]
+        if retry_at is not None and time.monotonic() >= retry_at:
+            del self._failed[url]
+            return False
+        return True
+
+    def fetch(self, url):
+        if not url:
+            return
+        with self._lock:
+            if url in self._images or url in self._pending or self._has_failed(url):
+                return
+            self._pending.add(url)
+        self._executor.submit(tracing.bind(self._download), url)
+
+    def prefetch(self, urls):
+        for url in urls:
+            self.fetch(url)
+
+    def _download(self, url):
+        image = QImage()
+        permanent = False
+        try:
+            with tracing.span("image.load", url=url):
+                response = get_session().get(url, timeout=self.timeout)
+                metrics.inc("image_bytes_downloaded_total", len(response.content))
+                if response.status_code == 200:
+                    with tracing.span("image.decode", bytes=len(response.content)):
+                        image.loadFromData(response.content)
+                    permanent = True  # Only matters if it did not decode
+                else:
+                    permanent = response.status_code in (404, 410)
+        except Exception as e:
+            print(f"Error loading image {url}: {e}")
+
+        with self._lock:
+            self._pending.discard(url)
+            if image.isNull():
+                self._failed[url] = None if permanent else time.monotonic() + self.retry_after
+            else:
+                self._images[url] = image
+                while len(self._images) > self.max_cached:
+                    self._images.popitem(last=False)
+
+        if image.isNull():
+            self.image_failed.emit(url)
+        else:
+            self.image_loaded.emit(url)
@@ -0,0 +1,8 @@
+def best_image_url(images, size=150):
+    """Pick the smallest Spotify image that is still at least size pixels wide"""
+    if not images:
+        return None
+    candidates = [img for img in images if (img.get('width') or 0) >= size]
+    if candidates:
+        return min(candidates, key=lambda img: img['width'])['url']
+    return images[0]['url']
@@ -0,0 +1,96 @@
+import json
+import os
+import threading
+import time
+
+from image_urls import best_image_url
+
+def track_record(track, added_at=None):
+    """Compact cached form of a Spotify track object"""
+    album = track.get('album') or {}
+    return {
+        "id": track['id'],
+        "name": track['name'],
+        "artist": track['artists'][0]['name'] if track.get('artists') else "Unknown Artist",
+        "artist_ids": [a['id'] for a in track.get('artists', []) if a.get('id')],
+        "album_id": album.get('id'),
+        "album": album.get('name'),
+        "release_date": album.get('release_date'),
+        "image_url": best_image_url(album.get('images'), 150),
+        "popularity": track.get('popularity', 0),
+        "duration_ms": track.get('duration_ms', 0),
+        "explicit": track.get('explicit', False),
+        "added_at": added_at,
+    }
+
+
+class LibraryCache:
+    """The user's saved and top tracks plus their artists' genres, kept on disk.
+
+    Everything the local recommender needs is stored here, so
+    recommendations keep working offline once the cache has been filled.
+    LibrarySync fills it.
+    """
+
+    def __init__(self, path="library_cache.json", load=True):
+        self.path = path
+        self.tracks = {}  # track id -> track_record
+        self.artists = {}  # artist id -> {"name", "genres"}
+        self.top_track_ids = []
+        self.updated_at = None
+        # Sync progress: newest saved-track added_at fully synced, and the
+        # offset an unfinished first sync resumes from
+        self.checkpoint = {"newest_added_at": None, "backfill_offset": 0}
+        self._lock = threading.Lock()
+        if load:
+            self.load()
+
+    def load(self):
+        """Read the cache file; safe to call from a worker thread"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            with self._lock:
+                self.tracks = data.get("tracks", {})
+                self.artists = data.get("artists", {})
+                self.top_track_ids = data.get("top_track_ids", [])
+                self.updated_at = data.get("updated_at")
+                self.checkpoint = data.get("checkpoint", self.checkpoint)
+        except Exception as e:
+            print(f"Error loading library cache: {e}")
+
+    def save(self):
+        # Serialized under the lock: merge() may be updating the dicts on the sync thread
+        with self._lock:
+            text = json.dumps({
+                "tracks": self.tracks,
+                "artists": self.artists,
+                "top_track_ids": self.top_track_ids,
+                "updated_at": self.updated_at,
+                "checkpoint": self.checkpoint,
+            })
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, self.path)
+
+    def snapshot(self):
+        """(list of track records, artists dict) copied under the lock"""
+        with self._lock:
+            return list(self.tracks.values()), dict(self.artists)
+
+    def is_empty(self):
+        return not self.tracks
+
+    def merge(self, tracks, artists=None, top_track_ids=None, checkpoint=None):
+        """Add fetched records; called by LibrarySync from its worker thread"""
+        with self._lock:
+            self.tracks.update(tracks)
+            self.artists.update(artists or {})
+            if top_track_ids is not None:
+                self.top_track_ids = top_track_ids
+            if checkpoint is not None:
+                self.checkpoint = dict(checkpoint)
+            self.updated_at = time.time()
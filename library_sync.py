@@ -0,0 +1,164 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from background import run_in_background
+from library_cache import track_record
+from rate_limit import TokenBucket
+from spotify_batcher import BATCH_SIZES, get_batcher
+from spotify_scheduler import BACKGROUND
+
+TOP_TRACK_RANGES = ("short_term", "medium_term", "long_term")
+PAGE_SIZE = 50
+
+
+class LibrarySync(QObject):
+    """Incremental background sync of saved and top tracks into a LibraryCache.
+
+    Saved tracks are listed newest first, so a sync only pages from the
+    start until it reaches the newest added_at it already has. The first
+    sync backfills everything else several pages at a time, and after
+    each batch checkpoints the offset it reached so an interrupted sync
+    resumes there. Top tracks for every time range are fetched alongside.
+
+    progress(synced, total, tracks_per_second) is emitted as pages arrive,
+    then finished(new_tracks) or failed(message).
+    """
+    progress = pyqtSignal(int, int, float)
+    finished = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, sp, cache, max_saved=10000, max_concurrency=4, requests_per_second=5):
+        super().__init__()
+        self.sp = sp
+        self.cache = cache
+        self.max_saved = max_saved
+        self.max_concurrency = max_concurrency
+        self.rate_budget = TokenBucket(requests_per_second)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="library-sync")
+        self.running = False
+        self.throughput = None  # tracks per second of the last sync
+
+    def start(self):
+        """Start a sync in the background unless one is running"""
+        if self.sp is None or self.running:
+            return False
+        self.running = True
+        run_in_background(self.sync, on_done=self._done, on_error=self._failed)
+        return True
+
+    def _done(self, count):
+        self.running = False
+        self.finished.emit(count)
+
+    def _failed(self, error):
+        self.running = False
+        self.failed.emit(str(error))
+
+    # Fetching (worker threads)
+
+    def fetch_saved_page(self, offset):
+        self.rate_budget.acquire()
+        page = self.sp.current_user_saved_tracks(limit=PAGE_SIZE, offset=offset)
+        records = [track_record(item['track'], item.get('added_at')) for item in page['items']
+                   if item.get('track') and item['track'].get('id')]
+        return records, page.get('total', 0)
+
+    def fetch_head(self, since):
+        """Saved tracks added after since (an ISO timestamp), newest first.
+
+        With no since only the first page is read; the rest is backfill.
+        Returns (records, total saved tracks).
+        """
+        records = []
+        offset = 0
+        while True:
+            page, total = self.fetch_saved_page(offset)
+            for record in page:
+                if since is not None and (record['added_at'] or "") <= since:
+                    return records, total
+                records.append(record)
+            offset += PAGE_SIZE
+            if since is None or not page or offset >= total:
+                return records, total
+
+    def fetch_top_tracks(self, time_range):
+        self.rate_budget.acquire()
+        return self.sp.current_user_top_tracks(limit=50, time_range=time_range)['items']
+
+    def fetch_artists(self, artist_ids):
+        """Genres of artist_ids, looked up through the shared batcher"""
+        batcher = get_batcher(self.sp)
+        futures = []
+        for start in range(0, len(artist_ids), BATCH_SIZES["artists"]):
+            self.rate_budget.acquire()
+            ids = artist_ids[start:start + BATCH_SIZES["artists"]]
+            futures.extend(batcher.lookup_many("artists", ids, BACKGROUND))
+        artists = {}
+        for future in futures:
+            artist = future.result()
+            if artist:
+                artists[artist['id']] = {"name": artist['name'], "genres": artist.get('genres', [])}
+        return artists
+
+    # Syncing
+
+    def sync(self):
+        """Run one sync and return the number of new tracks; runs on a worker thread"""
+        started = time.perf_counter()
+        known = set(self.cache.tracks)
+        checkpoint = dict(self.cache.checkpoint)
+        since = checkpoint["newest_added_at"]
+        # Top tracks download alongside the saved-track pages
+        top_pages = [self._executor.submit(self.fetch_top_tracks, r) for r in TOP_TRACK_RANGES]
+
+        head, total = self.fetch_head(since)
+        if head:
+            checkpoint["newest_added_at"] = head[0]['added_at']
+        backfill_offset = checkpoint["backfill_offset"]
+        if since is None:
+            backfill_offset = len(head)
+        elif backfill_offset is not None:
+            # New saves push the unsynced tail further down the list
+            backfill_offset += len(head)
+
+        limit = min(total, self.max_saved)
+        expected = len(head) + max(0, limit - (backfill_offset or limit))
+        synced = len(head)
+        checkpoint["backfill_offset"] = backfill_offset if backfill_offset is not None and backfill_offset < limit else None
+        self.cache.merge({r['id']: r for r in head}, checkpoint=checkpoint)
+        self.cache.save()
+        self._report(synced, expected, started)
+
+        while checkpoint["backfill_offset"] is not None:
+            offsets = range(checkpoint["backfill_offset"], limit, PAGE_SIZE)[:self.max_concurrency]
+            records = {}
+            for page, _ in self._executor.map(self.fetch_saved_page, offsets):
+                records.update((r['id'], r) for r in page)
+            synced += len(records)
+            next_offset = offsets[-1] + PAGE_SIZE
+            checkpoint["backfill_offset"] = next_offset if next_offset < limit else None
+            self.cache.merge(records, checkpoint=checkpoint)
+            self.cache.save()
+            self._report(synced, expected, started)
+
+        missing = {}
+        top_track_ids = []
+        for future in top_pages:
+            for track in future.result():
+                if track.get('id') and track['id'] not in top_track_ids:
+                    top_track_ids.append(track['id'])
+                    if track['id'] not in self.cache.tracks:
+                        missing[track['id']] = track_record(track)
+        tracks = list(self.cache.tracks.values()) + list(missing.values())
+        artist_ids = sorted({a for t in tracks for a in t['artist_ids']} - set(self.cache.artists))
+        artists = self.fetch_artists(artist_ids)
+        self.cache.merge(missing, artists, top_track_ids)
+        self.cache.save()
+        self._report(synced, expected, started)
+        return len(set(self.cache.tracks) - known)
+
+    def _report(self, synced, expected, started):
+        elapsed = time.perf_counter() - started
+        self.throughput = synced / elapsed if elapsed > 0 else 0.0
+        self.progress.emit(synced, max(synced, expected), self.throughput)
@@ -0,0 +1,156 @@
+import re
+import zlib
+import numpy as np
+
+from ann_index import LSHIndex
+
+HASH_DIMS = 512
+# Above this many tracks queries go through an approximate index instead of a full scan
+ANN_THRESHOLD = 50000
+# Relative weight of each kind of token in a track's feature vector
+TOKEN_WEIGHTS = {"artist": 3.0, "genre": 2.0, "word": 1.0, "album": 1.0, "decade": 0.5}
+NUMERIC_WEIGHT = 0.5
+
+
+def tokenize(text):
+    return re.findall(r"[a-z0-9]+", (text or "").lower())
+
+
+def token_index(kind, value):
+    """Stable hashed column for a token (hash() is salted per process)"""
+    return zlib.crc32(f"{kind}:{value}".encode("utf-8")) % HASH_DIMS
+
+
+class LocalRecommender:
+    """Content-based recommender over the cached library.
+
+    Each track becomes a row of a float32 matrix: hashed artist, genre,
+    genre-word, album and decade tokens plus scaled popularity, year and
+    duration. Rows are L2-normalised, so a matrix product with a batch of
+    query vectors gives cosine similarities for every query at once.
+
+    For large catalogs (ANN_THRESHOLD tracks or more) an LSHIndex is
+    built over the matrix, or a prebuilt one can be passed in, and
+    queries are answered approximately from it.
+    """
+
+    def __init__(self, tracks, artists, index=None):
+        self.tracks = [t for t in tracks if t.get('id')]
+        self.artists = artists
+        self.ids = [t['id'] for t in self.tracks]
+        self.row_of = {track_id: row for row, track_id in enumerate(self.ids)}
+        self.matrix = self.build_matrix()
+        if index is None and len(self.ids) >= ANN_THRESHOLD:
+            index = LSHIndex.build(self.ids, self.matrix)
+        self.index = index
+
+    @classmethod
+    def from_cache(cls, cache):
+        return cls(*cache.snapshot())
+
+    def __len__(self):
+        return len(self.ids)
+
+    def track_tokens(self, track):
+        tokens = []
+        for artist_id in track.get('artist_ids', []):
+            tokens.append(("artist", artist_id))
+            for genre in self.artists.get(artist_id, {}).get('genres', []):
+                tokens.append(("genre", genre))
+                tokens.extend(("word", word) for word in tokenize(genre))
+        if track.get('album_id'):
+            tokens.append(("album", track['album_id']))
+        year = (track.get('release_date') or "")[:4]
+        if year.isdigit():
+            tokens.append(("decade", year[:3]))
+        return tokens
+
+    def build_matrix(self):
+        n = len(self.tracks)
+        hashed = np.zeros((n, HASH_DIMS), dtype=np.float32)
+        rows, cols, weights = [], [], []
+        for row, track in enumerate(self.tracks):
+            for kind, value in self.track_tokens(track):
+                rows.append(row)
+                cols.append(token_index(kind, value))
+                weights.append(TOKEN_WEIGHTS[kind])
+        if rows:
+            np.add.at(hashed, (np.array(rows), np.array(cols)), np.array(weights, dtype=np.float32))
+
+        numeric = np.zeros((n, 3), dtype=np.float32)
+        if n:
+            numeric[:, 0] = [t.get('popularity') or 0 for t in self.tracks]
+            numeric[:, 1] = [int(t['release_date'][:4]) if (t.get('release_date') or "")[:4].isdigit() else 0
+                             for t in self.tracks]
+            numeric[:, 2] = [t.get('duration_ms') or 0 for t in self.tracks]
+            # Standardise each numeric column so no unit dominates
+            std = numeric.std(axis=0)
+            std[std == 0] = 1
+            numeric = (numeric - numeric.mean(axis=0)) / std * NUMERIC_WEIGHT
+
+        return self.normalize(np.hstack([hashed, numeric]))
+
+    @staticmethod
+    def normalize(matrix):
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return (matrix / norms).astype(np.float32)
+
+    def text_vector(self, keyword):
+        """Query vector for a free-text mood/genre/artist keyword"""
+        vector = np.zeros(self.matrix.shape[1], dtype=np.float32)
+        words = tokenize(keyword)
+        for word in words:
+            vector[token_index("word", word)] += TOKEN_WEIGHTS["word"]
+        if words:
+            vector[token_index("genre", " ".join(words))] += TOKEN_WEIGHTS["genre"]
+            n = len(words)
+            for artist_id, artist in self.artists.items():
+                # The keyword's words in a row in the name, so "art" does not match "Arthur"
+                name = tokenize(artist.get('name'))
+                if any(name[i:i + n] == words for i in range(len(name) - n + 1)):
+                    vector[token_index("artist", artist_id)] += TOKEN_WEIGHTS["artist"]
+        return vector
+
+    def top_k(self, queries, k=5, exclude=None):
+        """Top k rows for each query vector; queries is (q, dims).
+
+        Returns a list (one per query) of [(track, score), ...].
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, len(self.ids))
+        if k <= 0:
+            return [[] for _ in range(len(queries))]
+        queries = self.normalize(queries)
+        if self.index is not None:
+            return [self.approximate_top_k(query, k, exclude) for query in queries]
+        scores = self.matrix @ queries.T  # (n, q) cosine similarities
+        if exclude:
+            rows = [self.row_of[track_id] for track_id in exclude if track_id in self.row_of]
+            scores[rows, :] = -np.inf
+        top = np.argpartition(-scores, k - 1, axis=0)[:k]
+        results = []
+        for q in range(scores.shape[1]):
+            rows = top[:, q][np.argsort(-scores[top[:, q], q])]
+            results.append([(self.tracks[row], float(scores[row, q])) for row in rows if scores[row, q] > 0])
+        return results
+
+    def approximate_top_k(self, query, k, exclude=None):
+        exclude = set(exclude or ())
+        matches = self.index.search(query, k + len(exclude))
+        return [(self.tracks[self.row_of[track_id]], score) for track_id, score in matches
+                if track_id not in exclude and track_id in self.row_of and score > 0][:k]
+
+    def recommend_for_keyword(self, keyword, k=5):
+        vector = self.text_vector(keyword)
+        if not vector.any():
+            return []
+        return self.top_k(vector, k)[0]
+
+    def more_like(self, track_ids, k=5):
+        """Tracks most similar to the centroid of track_ids"""
+        rows = [self.row_of[track_id] for track_id in track_ids if track_id in self.row_of]
+        if not rows:
+            return []
+        centroid = self.matrix[rows].mean(axis=0)
+        return self.top_k(centroid, k, exclude=track_ids)[0]
@@ -1,13 +1,37 @@
+import time
+STARTED = time.perf_counter()  # Time to first paint is measured from here
+
 import sys
+import profiling
+if "--profile" in sys.argv:
+    profiling.enable(STARTED)  # Before the other imports, so they are timed
+import tracing
+if "--trace" in sys.argv:
+    tracing.add_exporter(tracing.JsonLinesExporter("trace.jsonl"))
+
+import argparse
+import importlib
+import os
 import spotipy 
 from spotipy.oauth2 import SpotifyOAuth 
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget) 
-from PyQt6.QtCore import Qt 
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QKeySequence, QShortcut
 from app import App
-from recommendations import Recommendations
-from catalog import Catalog
-from trends import Trends
-from playlist import Playlist
+from background import hold_startup_work, release_startup_work, run_in_background
+from http_transport import get_session, transport_stats
+import metrics
+from profile_cache import ProfileCache
+from spotify_batcher import all_batchers
+from spotify_scheduler import PLAYBACK, PRIORITY_NAMES, SpotifyScheduler
+from stall_watchdog import get_watchdog, start_watchdog
+from token_provider import TokenProvider
+
+# Point at a running mock_server.py (e.g. "http://127.0.0.1:8765") to use its stand-in Spotify
+# and Gemini instead of the real services. MOCK_AUTH "static" skips the Spotify login, for
+# replay; use "oauth" while the server records a real session.
+MOCK_SERVER = os.environ.get("MOCK_SERVER", "")
+MOCK_AUTH = os.environ.get("MOCK_AUTH", "static")
 
 class MusicRecommendationSystem(QMainWindow):
     def __init__(self):
@@ -17,36 +41,123 @@ class MusicRecommendationSystem(QMainWindow):
         self.setWindowFlags(Qt.WindowType.FramelessWindowHint)
         self.setMinimumSize(400, 300)
 
+        # Nothing goes to the network until the window has painted
+        hold_startup_work()
+        self.first_paint_ms = None
+
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
 
-        self.sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
-            client_id="YOUR_CLIENT_ID",
-            client_secret="CLIENT_SECRET",
-            redirect_uri="http://127.0.0.1:8888/REDIRECT_URL",
-            scope="user-library-read playlist-read-private user-top-read user-read-private user-read-playback-state user-modify-playback-state"
-        ))
-
-        user_profile = self.sp.current_user()
-        self.market = user_profile.get('country', 'US')
-
-        self.recommendations = Recommendations(self.sp, self.market)
-        self.catalog = Catalog(self.sp, self.market)
-        self.trends = Trends(self.sp, self.market)
-        self.playlist = Playlist(self.sp, self.market)
-
-        self.app = App(central_widget, self.sp)
-        self.app.recommend_button.clicked.connect(lambda: self.recommendations.setup_ui(self.app))
-        self.app.catalog_button.clicked.connect(lambda: self.catalog.setup_ui(self.app))
-        self.app.trends_button.clicked.connect(lambda: self.trends.setup_ui(self.app))
-        self.app.playlist_button.clicked.connect(lambda: self.playlist.setup_ui(self.app))
+        if MOCK_SERVER and MOCK_AUTH == "static":
+            from mock_server import StaticToken  # imported only when testing against the mock
+            self.tokens = StaticToken()
+        else:
+            # The token lives in memory and is refreshed ahead of expiry, so API calls skip the cache file
+            self.tokens = TokenProvider(SpotifyOAuth(
+                client_id="YOUR_CLIENT_ID",
+                client_secret="CLIENT_SECRET",
+                redirect_uri="http://127.0.0.1:8888/REDIRECT_URL",
+                scope="user-library-read playlist-read-private user-top-read user-read-private user-read-playback-state user-modify-playback-state",
+                requests_session=get_session()
+            ))
+        spotify = spotipy.Spotify(auth_manager=self.tokens, requests_session=get_session())  # Shared pools; 429s are left to the scheduler, which honours Retry-After
+        if MOCK_SERVER:
+            spotify.prefix = MOCK_SERVER.rstrip("/") + "/v1/"
+            from recommendations import Recommendations
+            Recommendations.gemini_endpoint = MOCK_SERVER.rstrip("/")
+            print(f"Using the mock server at {MOCK_SERVER}")
+        # Every page shares one scheduler; pages call at interactive priority
+        self.scheduler = SpotifyScheduler(spotify)
+        self.sp = self.scheduler.client()
+        metrics.get_metrics().add_collector(self.collect_metrics)
+
+        # Market and last page come from the previous run; the profile is refreshed after first paint
+        self.profile = ProfileCache()
+        self.market = self.profile.market
+
+        self.app = App(central_widget, self.sp.with_priority(PLAYBACK))
+        # Pages are imported and built the first time they are shown
+        self.page_types = {
+            "recommendations": ("recommendations", "Recommendations", self.app.recommend_button),
+            "catalog": ("catalog", "Catalog", self.app.catalog_button),
+            "trends": ("trends", "Trends", self.app.trends_button),
+            "playlist": ("playlist", "Playlist", self.app.playlist_button),
+            "performance": ("performance", "Performance", self.app.performance_button),
+        }
+        self.pages = {}
+        for name, (module, class_name, button) in self.page_types.items():
+            button.clicked.connect(lambda checked=False, name=name: self.show_page(name))
         self.app.close_button.clicked.connect(self.close)
         self.app.minimize_button.clicked.connect(self.showMinimized)
+        QShortcut(QKeySequence("Ctrl+Shift+P"), self).activated.connect(self.show_performance)
+
+        self.show_page(self.profile.last_page)
+
+    @profiling.profiled("tab switch")
+    def show_page(self, name):
+        if name not in self.page_types:
+            name = "recommendations"
+        module, class_name, button = self.page_types[name]
+        with tracing.span("page.show", page=name):
+            if name not in self.pages:
+                with profiling.span(f"build {name}", "page"):
+                    page_type = getattr(importlib.import_module(module), class_name)
+                    self.pages[name] = page_type(self.sp, self.market)
+            with profiling.span(f"show {name}", "page"):
+                self.pages[name].setup_ui(self.app)
+        self.app.set_active_button(button)
+        self.profile.set_last_page(name)
+
+    def show_performance(self):
+        self.app.performance_button.show()
+        self.show_page("performance")
+
+    def collect_metrics(self):
+        """Counters kept by the scheduler, batcher, player and HTTP pools, for the metrics registry"""
+        samples = [("spotify_scheduler_calls_total", "counter", "Spotify API calls let through by the scheduler",
+                    {"priority": PRIORITY_NAMES[priority]}, count) for priority, count in self.scheduler.calls.items()]
+        samples.append(("spotify_scheduler_throttled_total", "counter", "429 responses that paused the scheduler", {},
+                        self.scheduler.throttled))
+        batchers = all_batchers()
+        samples.append(("spotify_batch_lookups_total", "counter", "Ids looked up through the batchers", {},
+                        sum(batcher.lookups for batcher in batchers)))
+        samples.append(("spotify_batch_calls_total", "counter", "Batch calls the lookups became", {},
+                        sum(batcher.calls for batcher in batchers)))
+        player = getattr(self.app, "player_controls", None)
+        if player is not None:
+            reads = player.playback_reads
+            samples.append(("playback_reads_total", "counter", "Playback state reads", {"result": "hit"}, reads.hits))
+            samples.append(("playback_reads_total", "counter", "Playback state reads", {"result": "fetch"}, reads.fetches))
+        for host, entry in transport_stats().items():
+            samples.append(("http_requests_total", "counter", "HTTP requests per host", {"host": host}, entry["requests"]))
+            samples.append(("http_connections_total", "counter", "HTTP connections opened per host", {"host": host},
+                            entry["connections"]))
+        return samples
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.first_paint_ms is None:
+            self.first_paint_ms = (time.perf_counter() - STARTED) * 1000
+            # The profile summary reports it; --trace alone prints it
+            if profiling.get_profiler() is not None:
+                profiling.get_profiler().first_paint()
+            elif tracing.enabled():
+                print(f"First paint after {self.first_paint_ms:.0f} ms")
+            QTimer.singleShot(0, self.start_network)
+
+    def start_network(self):
+        watchdog = start_watchdog()  # Now that the event loop runs; logs what blocks the GUI thread
+        metrics.get_metrics().add_collector(watchdog.collect)
+        release_startup_work()
+        run_in_background(self.sp.current_user, on_done=self.on_profile_loaded,
+                          on_error=lambda error: print(f"Error loading user profile: {error}"))
 
-        # Initial setup with Recommendations
-        self.recommendations.setup_ui(self.app)
-        self.app.set_active_button(self.app.recommend_button)  # Highlight Recommendations button on startup
-       
+    def on_profile_loaded(self, user_profile):
+        self.profile.update_profile(user_profile)
+        if self.profile.market != self.market:
+            self.market = self.profile.market
+            for page in self.pages.values():
+                page.market = self.market
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -55,27 +166,27 @@ class MusicRecommendationSystem(QMainWindow):
     def mouseMoveEvent(self, event):
         self.app.drag_window(event)
 
-    def resizeEvent(self, event):
-        super().resizeEvent(event)
-    
-        # Safely handle catalog resize
-        if hasattr(self, 'catalog') and hasattr(self.catalog, 'catalog_data'):
-            try:
-                if any(self.catalog.catalog_data.values()):  # Check if there's any data to display
-                    self.catalog.display_results(self.catalog.catalog_data, self.app)
-            except Exception as e:
-                print(f"Error during catalog resize: {str(e)}")
-        
-        # Handle other components similarly if needed
-        if hasattr(self, 'recommendations'):
-            try:
-                # Add similar handling for recommendations if needed
-                pass
-            except Exception as e:
-                print(f"Error during recommendations resize: {str(e)}")
+def command_line():
+    parser = argparse.ArgumentParser(description="Music Recommendation System")
+    parser.add_argument("--profile", action="store_true", help="write a startup and interaction profile to profile/ on exit")
+    parser.add_argument("--trace", action="store_true", help="append tracing spans to trace.jsonl")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on 127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-file", help="rewrite this file with Prometheus metrics every 15 s")
+    # Qt options are left in sys.argv for QApplication
+    return parser.parse_known_args()[0]
 
 if __name__ == "__main__":
+    args = command_line()
+    if args.metrics_port:
+        metrics.serve_metrics(args.metrics_port)
+    if args.metrics_file:
+        metrics.write_metrics_file(args.metrics_file)
     app = QApplication(sys.argv)
     window = MusicRecommendationSystem()
     window.show()
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    if profiling.get_profiler() is not None:
+        profiling.get_profiler().write_report()
+        if get_watchdog() is not None:
+            print("\n" + get_watchdog().summary())
+    sys.exit(exit_code)
@@ -0,0 +1,214 @@
+import atexit
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+from entities import Album, Artist, Track
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    pk INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    artist TEXT,
+    album TEXT,
+    genres TEXT,
+    image_url TEXT,
+    updated_at REAL NOT NULL,
+    UNIQUE (kind, id)
+);
+-- External-content index: the text lives once, in entities
+CREATE VIRTUAL TABLE IF NOT EXISTS entities_fts USING fts5 (
+    name, artist, genres,
+    content='entities', content_rowid='pk',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS entities_ai AFTER INSERT ON entities BEGIN
+    INSERT INTO entities_fts (rowid, name, artist, genres) VALUES (new.pk, new.name, new.artist, new.genres);
+END;
+CREATE TRIGGER IF NOT EXISTS entities_ad AFTER DELETE ON entities BEGIN
+    INSERT INTO entities_fts (entities_fts, rowid, name, artist, genres)
+    VALUES ('delete', old.pk, old.name, old.artist, old.genres);
+END;
+CREATE TRIGGER IF NOT EXISTS entities_au AFTER UPDATE ON entities BEGIN
+    INSERT INTO entities_fts (entities_fts, rowid, name, artist, genres)
+    VALUES ('delete', old.pk, old.name, old.artist, old.genres);
+    INSERT INTO entities_fts (rowid, name, artist, genres) VALUES (new.pk, new.name, new.artist, new.genres);
+END;
+-- Free-text queries (e.g. "song - artist") already resolved to a track
+CREATE TABLE IF NOT EXISTS resolutions (
+    query TEXT PRIMARY KEY,
+    track_id TEXT NOT NULL
+);
+"""
+
+UPSERT = """
+INSERT INTO entities (kind, id, name, artist, album, genres, image_url, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (kind, id) DO UPDATE SET
+    name = excluded.name,
+    artist = COALESCE(excluded.artist, artist),
+    album = COALESCE(excluded.album, album),
+    genres = COALESCE(excluded.genres, genres),
+    image_url = COALESCE(excluded.image_url, image_url),
+    updated_at = excluded.updated_at
+-- Unchanged rows are left alone so the index is not rewritten
+WHERE name IS NOT excluded.name
+    OR COALESCE(excluded.artist, artist) IS NOT artist
+    OR COALESCE(excluded.album, album) IS NOT album
+    OR COALESCE(excluded.genres, genres) IS NOT genres
+    OR COALESCE(excluded.image_url, image_url) IS NOT image_url
+"""
+
+RESOLVE = "INSERT OR REPLACE INTO resolutions (query, track_id) VALUES (?, ?)"
+
+KINDS = ("tracks", "artists", "albums")
+
+_store = None
+
+
+def get_metadata_store():
+    """Shared store, so every page writes to and searches the same database"""
+    global _store
+    if _store is None:
+        _store = MetadataStore()
+        atexit.register(_store.flush)
+    return _store
+
+
+def match_query(text):
+    """FTS5 query matching every word of text as a prefix"""
+    words = re.findall(r"\w+", (text or "").lower())
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def merge_results(remote, local):
+    """Remote results first, then local matches the remote ones did not include"""
+    merged = {}
+    for kind in KINDS:
+        seen = {entity.id for entity in remote.get(kind, [])}
+        merged[kind] = list(remote.get(kind, [])) + [e for e in local.get(kind, []) if e.id not in seen]
+    return merged
+
+
+class MetadataStore:
+    """Local SQLite copy of every track, artist and album the pages have shown.
+
+    add() only queues entries; a writer thread upserts them in batched
+    transactions. The database runs in WAL mode, so search() on the GUI
+    thread reads through its own connection without waiting on writes.
+    Names, artists and genres are indexed with FTS5 for prefix search.
+    """
+
+    def __init__(self, path="metadata.db", batch_size=500, flush_interval=0.5, max_candidates=1000):
+        self.path = path
+        self.max_candidates = max_candidates
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        with conn:
+            # Name matches count most, then artist, then genres
+            conn.execute("INSERT INTO entities_fts (entities_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)')")
+        conn.close()
+        threading.Thread(target=self._write_loop, name="metadata-store", daemon=True).start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self):
+        if getattr(self._local, "conn", None) is None:
+            self._local.conn = self._connect()
+        return self._local.conn
+
+    # Writing
+
+    def add(self, kind, entities):
+        """Queue Track, Artist or Album entities of kind "tracks", "artists" or "albums"."""
+        now = time.time()
+        rows = [(kind, e.id, e.name, getattr(e, 'artist', None), getattr(e, 'album', None),
+                 ", ".join(e.genres) if getattr(e, 'genres', None) else None, e.image_url, now)
+                for e in entities if e.id and e.name]
+        if rows:
+            self._queue.put((UPSERT, rows))
+
+    def add_resolutions(self, resolved):
+        """Queue {query: track_id} pairs for resolved()"""
+        rows = [(query.lower(), track_id) for query, track_id in resolved.items() if track_id]
+        if rows:
+            self._queue.put((RESOLVE, rows))
+
+    def flush(self):
+        """Block until everything queued so far is written"""
+        self._queue.join()
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            batches = [self._queue.get()]
+            count = len(batches[0][1])
+            deadline = time.monotonic() + self.flush_interval
+            # Gather whatever else arrives shortly into the same transaction
+            while count < self.batch_size:
+                try:
+                    batch = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                batches.append(batch)
+                count += len(batch[1])
+            try:
+                with conn:
+                    for sql, rows in batches:
+                        conn.executemany(sql, rows)
+            except sqlite3.Error as e:
+                print(f"Error writing metadata: {e}")
+            for _ in batches:
+                self._queue.task_done()
+
+    # Reading
+
+    def search(self, text, limit=5):
+        """Best local matches for text as {"tracks": [...], "artists": [...], "albums": [...]}"""
+        results = {kind: [] for kind in KINDS}
+        query = match_query(text)
+        if not query:
+            return results
+        # Ranking every match of a very common word is slow, so only the
+        # max_candidates most recently stored matches are ranked
+        rows = self._reader().execute(
+            "SELECT e.kind, e.id, e.name, e.artist, e.album, e.genres, e.image_url FROM "
+            "(SELECT rowid, rank FROM entities_fts WHERE entities_fts MATCH ? ORDER BY rowid DESC LIMIT ?) m "
+            "JOIN entities e ON e.pk = m.rowid ORDER BY m.rank",
+            (query, self.max_candidates)
+        )
+        for kind, id, name, artist, album, genres, image_url in rows:
+            if len(results[kind]) >= limit:
+                continue
+            if kind == "tracks":
+                results[kind].append(Track(id, name, artist, album, image_url))
+            elif kind == "artists":
+                results[kind].append(Artist(id, name, tuple(genres.split(", ")) if genres else (), image_url))
+            else:
+                results[kind].append(Album(id, name, artist, image_url))
+        return results
+
+    def resolved(self, queries):
+        """{query: track_id} for the queries resolved before"""
+        if not queries:
+            return {}
+        keys = {query.lower(): query for query in queries}
+        rows = self._reader().execute(
+            f"SELECT query, track_id FROM resolutions WHERE query IN ({','.join('?' * len(keys))})", list(keys)
+        )
+        return {keys[query]: track_id for query, track_id in rows}
+
+    def count(self):
+        return self._reader().execute("SELECT COUNT(*) FROM entities").fetchone()[0]
@@ -0,0 +1,222 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import sys
+import threading
+import time
+
+# Upper bounds, in seconds, of latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "spotify_api_calls_total": "Spotify Web API calls by endpoint",
+    "spotify_api_errors_total": "Spotify Web API calls that failed, by endpoint and HTTP status",
+    "spotify_api_latency_seconds": "Spotify Web API call latency, including queueing and retries",
+    "gemini_calls_total": "Gemini generate_content calls",
+    "gemini_latency_seconds": "Gemini generate_content latency",
+    "image_bytes_downloaded_total": "Cover art bytes downloaded",
+    "image_cache_requests_total": "Cover art requests, by whether the decoded image was cached",
+}
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+        return _metrics
+
+
+def inc(name, value=1, **labels):
+    get_metrics().inc(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    get_metrics().observe(name, value, **labels)
+
+
+def record_api_call(endpoint, client, seconds, error=None):
+    """Count one Spotify API call; error is the exception it raised, if any"""
+    metrics = get_metrics()
+    metrics.inc("spotify_api_calls_total", endpoint=endpoint, client=client)
+    metrics.observe("spotify_api_latency_seconds", seconds, endpoint=endpoint, client=client)
+    if error is not None:
+        metrics.inc("spotify_api_errors_total", endpoint=endpoint, client=client,
+                    status=getattr(error, "http_status", None) or type(error).__name__)
+
+
+def memory_bytes():
+    """Resident set size of this process, or None where it cannot be read"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024  # peak, not current
+    except ImportError:
+        return None
+
+
+class Metrics:
+    """Counters and histograms for the performance page and Prometheus export.
+
+    Code on hot paths only calls inc() and observe(). Numbers that other
+    objects already keep (scheduler, batcher, watchdog, ...) are read by
+    collectors, functions registered with add_collector() that return
+    [(name, type, help, labels, value), ...] when metrics are rendered.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.help = dict(HELP)
+        self._counters = {}  # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(LATENCY_BUCKETS) + 3)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    histogram[i] += 1
+                    break
+            else:
+                histogram[len(LATENCY_BUCKETS)] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def counters(self, name):
+        """{labels dict as a tuple of items: value} for counter name"""
+        with self._lock:
+            return {labels: value for (metric, labels), value in self._counters.items() if metric == name}
+
+    def histograms(self, name):
+        """{labels: (bucket counts, sum, count)} for histogram name"""
+        with self._lock:
+            return {labels: (h[:-2], h[-2], h[-1]) for (metric, labels), h in self._histograms.items() if metric == name}
+
+    def collect(self):
+        """Collector samples: [(name, type, help, labels dict, value), ...]"""
+        samples = [("process_uptime_seconds", "gauge", "Seconds since the app started", {}, time.time() - self.started)]
+        rss = memory_bytes()
+        if rss is not None:
+            samples.append(("process_resident_memory_bytes", "gauge", "Resident memory", {}, rss))
+        for collector in list(self._collectors):
+            try:
+                samples.extend(collector())
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+        return samples
+
+    def render_prometheus(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        typed = set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(h)) for key, h in self._histograms.items())
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{name}{_labels(dict(labels))} {value}")
+        for (name, labels), histogram in histograms:
+            header(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), histogram):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(dict(labels, le=bound))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(dict(labels))} {histogram[-2]}")
+            lines.append(f"{name}_count{_labels(dict(labels))} {histogram[-1]}")
+        # A metric's samples must be contiguous; collectors may interleave them (one host at a time)
+        families = {}
+        for sample in self.collect():
+            families.setdefault(sample[0], []).append(sample)
+        for samples in families.values():
+            for name, kind, help_text, labels, value in samples:
+                if name not in typed and help_text:
+                    self.help.setdefault(name, help_text)
+                header(name, kind)
+                lines.append(f"{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+
+def quantile(buckets, count, q):
+    """Upper bound (seconds) of the bucket holding quantile q of a histogram"""
+    if not count:
+        return 0.0
+    seen = 0
+    for bound, n in zip(LATENCY_BUCKETS, buckets):
+        seen += n
+        if seen >= q * count:
+            return bound
+    return float("inf")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = get_metrics().render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """Serve /metrics for Prometheus on a daemon thread"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def write_metrics_file(path, interval=15):
+    """Rewrite path with the current metrics every interval seconds (for a textfile collector)"""
+    def run():
+        while True:
+            try:
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(get_metrics().render_prometheus())
+                os.replace(tmp_path, path)
+            except Exception as e:
+                print(f"Error writing metrics file: {e}")
+            time.sleep(interval)
+    threading.Thread(target=run, name="metrics-file", daemon=True).start()
@@ -0,0 +1,383 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import hashlib
+import json
+import os
+import random
+import re
+import struct
+import threading
+import time
+from urllib.parse import parse_qs, parse_qsl, urlencode, urlparse
+import zlib
+
+SPOTIFY_UPSTREAM = "https://api.spotify.com"
+GEMINI_UPSTREAM = "https://generativelanguage.googleapis.com"
+# Request headers passed on to the real services while recording; never written to fixtures
+FORWARDED_HEADERS = ("Authorization", "Content-Type", "x-goog-api-key", "x-goog-api-client", "x-goog-request-params")
+# Cover art hosts in recorded responses, served by this server on replay
+IMAGE_HOSTS = re.compile(r"https://[\w.-]+\.(?:scdn\.co|spotifycdn\.com)/")
+
+
+def png(size=64, color=(0x1D, 0xB9, 0x54)):
+    """A plain size x size PNG, built without Qt so the server runs anywhere"""
+    raw = b"".join(b"\x00" + bytes(color) * size for _ in range(size))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+
+def gemini_options(url):
+    """genai.configure() arguments that send Gemini requests to a mock server at url"""
+    return {"transport": "rest", "client_options": {"api_endpoint": url}}
+
+
+class StaticToken:
+    """auth_manager for spotipy.Spotify that hands out a fixed token"""
+
+    def __init__(self, token="mock-token"):
+        self.token = token
+
+    def get_access_token(self, as_dict=False):
+        return {"access_token": self.token, "expires_at": time.time() + 3600} if as_dict else self.token
+
+
+class Fixtures:
+    """Recorded responses, kept one JSON object per line in a .jsonl file.
+
+    Requests match on method, path and query (without the API key) and,
+    when they have one, a hash of the body, so each Gemini prompt is its
+    own fixture. A later recording of the same request replaces the
+    earlier one.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._responses = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._responses[entry["key"]] = entry
+
+    def __len__(self):
+        return len(self._responses)
+
+    @staticmethod
+    def key(method, path, query_string, body=b""):
+        query = sorted((name, value) for name, value in parse_qsl(query_string, keep_blank_values=True) if name != "key")
+        key = f"{method} {path}?{urlencode(query)}"
+        if body:
+            key += " #" + hashlib.sha1(body).hexdigest()[:16]
+        return key
+
+    def get(self, key):
+        with self._lock:
+            return self._responses.get(key)
+
+    def add(self, key, status, content_type, body):
+        entry = {"key": key, "status": status, "content_type": content_type, "body": body.decode("utf-8", "replace")}
+        with self._lock:
+            self._responses[key] = entry
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+class MockServer:
+    """Local stand-in for the Spotify Web API and Gemini endpoints this app calls.
+
+    Without fixtures every response is generated from the request (ids,
+    query, offset, prompt keyword), so any search or lookup gets a
+    well-formed answer and repeated requests get the same one. With
+    fixtures, recorded responses are replayed and anything not recorded
+    is generated, or answered 404 when strict. With record=True requests
+    are forwarded to the real services and their responses recorded.
+
+    latency (+/- jitter) seconds are added to each response; gemini_latency,
+    when given, replaces latency for Gemini. Outside record mode a share
+    of API requests fails on purpose: rate_limit_rate of them with a 429
+    carrying Retry-After: retry_after, error_rate with a 500 or 503.
+    Cover art URLs point back at this server, which serves small PNGs.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, gemini_latency=None,
+                 rate_limit_rate=0.0, error_rate=0.0, retry_after=1, fixtures=None, record=False, strict=False,
+                 seed=None, playlist_size=100, library_size=200):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.gemini_latency = gemini_latency
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.fixtures = Fixtures(fixtures) if fixtures else None
+        self.record = record
+        self.strict = strict
+        self.playlist_size = playlist_size
+        self.library_size = library_size
+        self.requests = 0
+        self.injected = {429: 0, 500: 0, 503: 0}
+        self.replayed = 0
+        self.server = None
+        self._png = png()
+        self._random = random.Random(seed)
+        self._session = None
+        self._lock = threading.Lock()
+        if record and self.fixtures is None:
+            raise ValueError("record mode needs a fixtures file")
+        self._routes = [
+            ("GET", r"search", self.search),
+            ("GET", r"tracks", lambda query, match, body: {"tracks": [self.track(i) for i in _ids(query)]}),
+            ("GET", r"artists", lambda query, match, body: {"artists": [self.artist(i) for i in _ids(query)]}),
+            ("GET", r"albums", lambda query, match, body: {"albums": [self.album(i) for i in _ids(query)]}),
+            ("GET", r"artists/([^/]+)/related-artists", self.related_artists),
+            ("GET", r"artists/([^/]+)/top-tracks", self.artist_top_tracks),
+            ("GET", r"playlists/([^/]+)", self.playlist),
+            ("GET", r"browse/new-releases", self.new_releases),
+            ("GET", r"me", lambda query, match, body: {"id": "mock-user", "display_name": "Mock User",
+                                                       "country": "US", "product": "premium"}),
+            ("GET", r"me/tracks", self.saved_tracks),
+            ("GET", r"me/top/tracks", self.top_tracks),
+            ("GET", r"me/player", self.playback),
+            ("GET", r"me/player/devices", lambda query, match, body: {"devices": [self.device()]}),
+            ("POST", r"v1beta/models/([^/:]+):generateContent", self.generate_content),
+        ]
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.server.server_address[1]}"
+
+    @property
+    def prefix(self):
+        """API prefix for spotipy.Spotify.prefix"""
+        return self.url + "/v1/"
+
+    def start(self):
+        self.server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self.server.daemon_threads = True
+        self.server.mock = self
+        threading.Thread(target=self.server.serve_forever, name="mock-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def handle(self, method, path, query_string, headers, body):
+        """(status, response headers, body bytes) for a request"""
+        with self._lock:
+            self.requests += 1
+            roll = self._random.random()
+            delay = self.gemini_latency if self.gemini_latency is not None and path.startswith("/v1beta/") else self.latency
+            if self.jitter:
+                delay += self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if path.startswith("/img/"):
+            return 200, {"Content-Type": "image/png"}, self._png
+
+        if self.record:
+            return self._forward(method, path, query_string, headers, body)
+        if roll < self.rate_limit_rate:
+            return self._injected(429, {"Retry-After": str(self.retry_after)}, "API rate limit exceeded")
+        if roll < self.rate_limit_rate + self.error_rate:
+            return self._injected(500 if roll < self.rate_limit_rate + self.error_rate / 2 else 503, {}, "Injected error")
+
+        if self.fixtures is not None:
+            entry = self.fixtures.get(Fixtures.key(method, path, query_string, body))
+            if entry is not None:
+                with self._lock:
+                    self.replayed += 1
+                return entry["status"], {"Content-Type": entry["content_type"]}, IMAGE_HOSTS.sub(self.url + "/img/", entry["body"]).encode()
+            if self.strict:
+                return _error(404, "No fixture recorded for this request")
+        return self._generate(method, path, query_string, body)
+
+    def _injected(self, status, headers, message):
+        with self._lock:
+            self.injected[status] += 1
+        status, error_headers, body = _error(status, message)
+        return status, dict(error_headers, **headers), body
+
+    def _forward(self, method, path, query_string, headers, body):
+        import requests  # only recording talks to the real services
+        if self._session is None:
+            self._session = requests.Session()
+        upstream = GEMINI_UPSTREAM if path.startswith("/v1beta/") else SPOTIFY_UPSTREAM
+        url = upstream + path + (f"?{query_string}" if query_string else "")
+        try:
+            response = self._session.request(method, url, data=body or None, timeout=30,
+                                             headers={name: headers[name] for name in FORWARDED_HEADERS if name in headers})
+        except requests.RequestException as e:
+            print(f"Error forwarding {method} {url}: {e}")
+            return _error(502, str(e))
+        content_type = response.headers.get("Content-Type", "application/json")
+        # Throttling and server errors are passing conditions, not responses worth replaying
+        if response.status_code < 500 and response.status_code != 429:
+            self.fixtures.add(Fixtures.key(method, path, query_string, body), response.status_code, content_type, response.content)
+        reply_headers = {"Content-Type": content_type}
+        if "Retry-After" in response.headers:
+            reply_headers["Retry-After"] = response.headers["Retry-After"]
+        return response.status_code, reply_headers, response.content
+
+    def _generate(self, method, path, query_string, body):
+        if method in ("PUT", "POST") and path.startswith("/v1/me/player"):
+            return 204, {"Content-Type": "application/json"}, b""
+        route_path = path.split("/v1/", 1)[-1].strip("/")
+        query = parse_qs(query_string)
+        for route_method, pattern, handler in self._routes:
+            match = re.fullmatch(pattern, route_path)
+            if match and route_method == method:
+                return 200, {"Content-Type": "application/json"}, json.dumps(handler(query, match, body)).encode()
+        return _error(404, "no route")
+
+    # Objects
+
+    def images(self, key):
+        url = f"{self.url}/img/{zlib.crc32(key.encode()) % 1000}.png"
+        return [{"url": url, "width": 300, "height": 300}, {"url": url, "width": 64, "height": 64}]
+
+    def artist(self, artist_id):
+        return {"id": artist_id, "name": f"Artist {artist_id}", "type": "artist", "uri": f"spotify:artist:{artist_id}",
+                "genres": ["pop", "indie"], "popularity": 50, "images": self.images(artist_id)}
+
+    def album(self, album_id):
+        artist_id = f"ar{album_id}"
+        return {"id": album_id, "name": f"Album {album_id}", "type": "album", "album_type": "album",
+                "uri": f"spotify:album:{album_id}", "release_date": "2024-01-01", "total_tracks": 10,
+                "artists": [{"id": artist_id, "name": f"Artist {artist_id}"}], "images": self.images(album_id)}
+
+    def track(self, track_id):
+        album = self.album(f"al{track_id}")
+        return {"id": track_id, "name": f"Track {track_id}", "type": "track", "uri": f"spotify:track:{track_id}",
+                "duration_ms": 200000, "popularity": 50, "artists": album["artists"], "album": album}
+
+    def device(self):
+        return {"id": "mock-device", "name": "Mock Speaker", "type": "Speaker", "is_active": True, "volume_percent": 50}
+
+    # Endpoints
+
+    def search(self, query, match, body):
+        q = query.get("q", [""])[0]
+        limit, offset = int(query.get("limit", ["10"])[0]), int(query.get("offset", ["0"])[0])
+        key = f"{zlib.crc32(q.encode()):08x}"
+        results = {}
+        for kind in query.get("type", ["track"])[0].split(","):
+            make = {"track": self.track, "artist": self.artist, "album": self.album}[kind]
+            results[kind + "s"] = {"items": [make(f"{kind[:2]}{key}{offset + i}") for i in range(limit)],
+                                   "limit": limit, "offset": offset, "total": 1000}
+        return results
+
+    def playlist(self, query, match, body):
+        playlist_id = match.group(1)
+        return {"id": playlist_id, "name": f"Playlist {playlist_id}", "description": "Generated by the mock server",
+                "owner": {"id": "mock-user", "display_name": "Mock User"},
+                "tracks": {"items": [{"track": self.track(f"pl{playlist_id}{i}")} for i in range(self.playlist_size)],
+                           "total": self.playlist_size}}
+
+    def new_releases(self, query, match, body):
+        country = query.get("country", ["US"])[0]
+        limit, offset = int(query.get("limit", ["20"])[0]), int(query.get("offset", ["0"])[0])
+        items = [self.album(f"nr{country}{i}") for i in range(offset, min(offset + limit, 100))]
+        return {"albums": {"items": items, "limit": limit, "offset": offset, "total": 100}}
+
+    def saved_tracks(self, query, match, body):
+        limit, offset = int(query.get("limit", ["20"])[0]), int(query.get("offset", ["0"])[0])
+        items = [{"added_at": "2024-01-01T00:00:00Z", "track": self.track(f"lib{i}")}
+                 for i in range(offset, min(offset + limit, self.library_size))]
+        return {"items": items, "limit": limit, "offset": offset, "total": self.library_size}
+
+    def top_tracks(self, query, match, body):
+        time_range = query.get("time_range", ["medium_term"])[0]
+        limit = int(query.get("limit", ["20"])[0])
+        return {"items": [self.track(f"top{time_range[0]}{i}") for i in range(limit)], "total": limit}
+
+    def related_artists(self, query, match, body):
+        return {"artists": [self.artist(f"{match.group(1)}r{i}") for i in range(5)]}
+
+    def artist_top_tracks(self, query, match, body):
+        return {"tracks": [self.track(f"{match.group(1)}t{i}") for i in range(5)]}
+
+    def playback(self, query, match, body):
+        return {"is_playing": True, "progress_ms": int(time.time() * 1000) % 200000, "device": self.device(),
+                "item": self.track("playing")}
+
+    def generate_content(self, query, match, body):
+        """Five "Song - Artist" lines named after the keyword in the prompt"""
+        try:
+            prompt = json.loads(body)["contents"][-1]["parts"][0]["text"]
+        except (ValueError, KeyError, IndexError):
+            prompt = ""
+        keyword = re.search(r'keyword:? "(.*?)"', prompt, re.IGNORECASE)
+        keyword = keyword.group(1).title() if keyword else "Mock"
+        text = "\n".join(f"{keyword} Song {i} - {keyword} Artist {i}" for i in range(1, 6))
+        return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"},
+                                "finishReason": "STOP", "index": 0}]}
+
+
+def _ids(query):
+    return [i for i in query.get("ids", [""])[0].split(",") if i]
+
+
+def _error(status, message):
+    body = json.dumps({"error": {"status": status, "message": message}}).encode()
+    return status, {"Content-Type": "application/json"}, body
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        url = urlparse(self.path)
+        status, headers, content = self.server.mock.handle(self.command, url.path, url.query, self.headers, body)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_PUT = do_POST = do_DELETE = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Local stand-in for the Spotify Web API and Gemini, "
+                                                 "with recorded fixtures and injected faults")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", help="recorded responses (.jsonl) to replay, or to record into")
+    parser.add_argument("--record", action="store_true", help="forward to the real services and record their responses")
+    parser.add_argument("--strict", action="store_true", help="404 requests with no fixture instead of generating a response")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="latency varies by up to this many seconds either way")
+    parser.add_argument("--gemini-latency", type=float, help="seconds added to Gemini responses instead of --latency")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="share of API requests answered 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of API requests answered 500/503")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with injected 429s")
+    parser.add_argument("--seed", type=int, help="seed for jitter and injected faults, for repeatable runs")
+    args = parser.parse_args()
+    mock = MockServer(args.host, args.port, latency=args.latency, jitter=args.jitter, gemini_latency=args.gemini_latency,
+                      rate_limit_rate=args.rate_limit, error_rate=args.error_rate, retry_after=args.retry_after,
+                      fixtures=args.fixtures, record=args.record, strict=args.strict, seed=args.seed).start()
+    mode = "recording into" if args.record else "replaying"
+    print(f"Mock server at {mock.url}" + (f", {mode} {args.fixtures} ({len(mock.fixtures)} fixtures)" if args.fixtures else ""))
+    print(f"Run the app against it with MOCK_SERVER={mock.url}" + (" MOCK_AUTH=oauth" if args.record else ""))
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print(f"{mock.requests} requests, {mock.replayed} replayed, injected {mock.injected}")
+        mock.stop()
@@ -0,0 +1,172 @@
+from PyQt6 import sip
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtCore import Qt, QTimer
+
+import metrics
+from stall_watchdog import LATENCY_BUCKETS, get_watchdog
+
+SECTIONS = ["Spotify API", "Latency", "Caches", "Network", "GUI thread", "Memory"]
+
+
+def bar(count, most, width=30):
+    return "█" * (round(width * count / most) if most else 0)
+
+
+def histogram_lines(buckets, bounds, unit):
+    most = max(buckets) if buckets else 0
+    lines = []
+    for bound, count in zip(list(bounds) + [None], buckets):
+        label = f"<= {bound}{unit}" if bound is not None else f"> {bounds[-1]}{unit}"
+        lines.append(f"  {label:>10} {count:6d} {bar(count, most)}")
+    return lines
+
+
+def rate(part, whole):
+    return f"{100 * part / whole:.0f}%" if whole else "-"
+
+
+class Performance:
+    """Hidden page (Ctrl+Shift+P) with live counters from the metrics registry"""
+
+    def __init__(self, sp, market):
+        self.sp = sp
+        self.market = market
+        self.sections = None
+        self.timer = None
+
+    def setup_ui(self, app):
+        app.clear_content()
+
+        title = QLabel("Performance", alignment=Qt.AlignmentFlag.AlignCenter)
+        title.setStyleSheet("font-size: 24px; font-weight: bold; color: #FFFFFF; padding: 10px; background-color: #1DB954; border-radius: 10px;")
+        app.content_grid.addWidget(title, 0, 0)
+
+        self.sections = {}
+        for row, name in enumerate(SECTIONS):
+            header = QLabel(name)
+            header.setStyleSheet("font-size: 16px; font-weight: bold; color: #1DB954; padding: 10px 5px 0 5px;")
+            body = QLabel()
+            body.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+            body.setStyleSheet("font-family: monospace; font-size: 12px; color: #FFFFFF; padding: 0 5px;")
+            app.content_grid.addWidget(header, 2 * row + 1, 0)
+            app.content_grid.addWidget(body, 2 * row + 2, 0)
+            self.sections[name] = body
+
+        # Parented to the page, so the timer is deleted with it when another page is shown
+        self.timer = QTimer(title)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.refresh)
+        self.refresh()
+        self.timer.start()
+
+    def refresh(self):
+        # The labels go away when another page is shown
+        if self.sections is None or any(sip.isdeleted(label) for label in self.sections.values()):
+            self.sections = None
+            if not sip.isdeleted(self.timer):
+                self.timer.stop()
+            return
+        registry = metrics.get_metrics()
+        samples = {}
+        for name, kind, help_text, labels, value in registry.collect():
+            samples.setdefault(name, []).append((labels, value))
+        texts = {
+            "Spotify API": self.api_text(registry),
+            "Latency": self.latency_text(registry),
+            "Caches": self.caches_text(registry, samples),
+            "Network": self.network_text(registry, samples),
+            "GUI thread": self.gui_text(),
+            "Memory": self.memory_text(samples),
+        }
+        for name, text in texts.items():
+            self.sections[name].setText(text)
+
+    def api_text(self, registry):
+        calls = {}
+        for labels, value in registry.counters("spotify_api_calls_total").items():
+            endpoint = dict(labels)["endpoint"]
+            calls[endpoint] = calls.get(endpoint, 0) + value
+        errors = {}
+        for labels, value in registry.counters("spotify_api_errors_total").items():
+            endpoint = dict(labels)["endpoint"]
+            errors[endpoint] = errors.get(endpoint, 0) + value
+        latency = {}
+        for labels, (buckets, total, count) in registry.histograms("spotify_api_latency_seconds").items():
+            endpoint = dict(labels)["endpoint"]
+            merged = latency.setdefault(endpoint, [[0] * len(buckets), 0.0, 0])
+            merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+            merged[1] += total
+            merged[2] += count
+        if not calls:
+            return "No API calls yet"
+        lines = [f"{'endpoint':<28} {'calls':>6} {'errors':>6} {'mean':>8} {'p95 <=':>8}"]
+        for endpoint, count in sorted(calls.items(), key=lambda item: -item[1]):
+            buckets, total, observed = latency.get(endpoint, ([], 0.0, 0))
+            mean = f"{1000 * total / observed:.0f} ms" if observed else "-"
+            p95 = f"{1000 * metrics.quantile(buckets, observed, 0.95):.0f} ms" if observed else "-"
+            lines.append(f"{endpoint:<28} {count:6d} {errors.get(endpoint, 0):6d} {mean:>8} {p95:>8}")
+        lines.append(f"{'total':<28} {sum(calls.values()):6d} {sum(errors.values()):6d}")
+        return "\n".join(lines)
+
+    def latency_text(self, registry):
+        bounds = [f"{bound * 1000:g}" for bound in metrics.LATENCY_BUCKETS]
+        lines = []
+        for title, name in (("Spotify API", "spotify_api_latency_seconds"), ("Gemini", "gemini_latency_seconds")):
+            histograms = list(registry.histograms(name).values())
+            count = sum(h[2] for h in histograms)
+            if not count:
+                continue
+            buckets = [sum(column) for column in zip(*(h[0] for h in histograms))]
+            lines.append(f"{title}: {count} calls, mean {1000 * sum(h[1] for h in histograms) / count:.0f} ms")
+            lines.extend(histogram_lines(buckets, bounds, "ms"))
+        return "\n".join(lines) or "No calls timed yet"
+
+    def caches_text(self, registry, samples):
+        images = {dict(labels)["result"]: value for labels, value in registry.counters("image_cache_requests_total").items()}
+        hits, misses = images.get("hit", 0), images.get("miss", 0)
+        lines = [f"Cover art:      {rate(hits, hits + misses):>5} hit rate ({hits} hits, {misses} misses)"]
+        reads = {labels["result"]: value for labels, value in samples.get("playback_reads_total", [])}
+        if reads:
+            hits, fetches = reads.get("hit", 0), reads.get("fetch", 0)
+            lines.append(f"Playback state: {rate(hits, hits + fetches):>5} hit rate ({hits} shared, {fetches} fetched)")
+        lookups = sum(value for labels, value in samples.get("spotify_batch_lookups_total", []))
+        batches = sum(value for labels, value in samples.get("spotify_batch_calls_total", []))
+        if lookups:
+            lines.append(f"Batched lookups: {lookups} ids in {batches} calls")
+        return "\n".join(lines)
+
+    def network_text(self, registry, samples):
+        downloaded = sum(registry.counters("image_bytes_downloaded_total").values())
+        lines = [f"Cover art downloaded: {downloaded / 1e6:.1f} MB"]
+        calls = samples.get("spotify_scheduler_calls_total", [])
+        if calls:
+            lines.append("Scheduled calls: " + ", ".join(f"{labels['priority']} {value}" for labels, value in calls))
+        throttled = sum(value for labels, value in samples.get("spotify_scheduler_throttled_total", []))
+        lines.append(f"Rate limited (429): {throttled}")
+        requests = {labels["host"]: value for labels, value in samples.get("http_requests_total", [])}
+        connections = {labels["host"]: value for labels, value in samples.get("http_connections_total", [])}
+        for host, count in sorted(requests.items(), key=lambda item: -item[1]):
+            opened = connections.get(host, 0)
+            lines.append(f"  {host:<32} {count:6d} requests, {opened:3d} connections, {rate(count - opened, count)} reused")
+        return "\n".join(lines)
+
+    def gui_text(self):
+        watchdog = get_watchdog()
+        if watchdog is None:
+            return "Stall watchdog not running"
+        stats = watchdog.stats()
+        lines = [f"Event-loop latency: p50 <= {stats['p50_ms']:.0f} ms, p95 <= {stats['p95_ms']:.0f} ms, "
+                 f"p99 <= {stats['p99_ms']:.0f} ms, max {stats['max_latency_ms']:.0f} ms"]
+        lines.extend(histogram_lines(list(stats["histogram"].values()), LATENCY_BUCKETS, "ms"))
+        lines.append(f"Stalls over {watchdog.threshold * 1000:.0f} ms: {stats['stalls']}, {stats['stalled_ms']:.0f} ms in total")
+        for culprit, ms in stats["top_culprits"][:5]:
+            lines.append(f"  {ms:8.0f} ms  {culprit}")
+        return "\n".join(lines)
+
+    def memory_text(self, samples):
+        lines = []
+        for labels, value in samples.get("process_resident_memory_bytes", []):
+            lines.append(f"Resident memory: {value / 1e6:.0f} MB")
+        for labels, value in samples.get("process_uptime_seconds", []):
+            lines.append(f"Uptime: {value / 60:.0f} min")
+        return "\n".join(lines)
@@ -1,36 +1,51 @@
 from PyQt6.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QLabel, 
-                            QPushButton, QSlider, QSizePolicy)
+                            QPushButton, QSlider)
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal
-from PyQt6.QtGui import QPixmap, QFont
-import requests
-from io import BytesIO
+from PyQt6.QtGui import QPixmap
+
+from async_spotify import get_async_spotify
+from background import after_startup, run_async
+from image_loader import get_image_loader
+from image_urls import best_image_url
+from single_flight import SingleFlight
+from spotify_scheduler import PLAYBACK, with_priority
 
 class PlayerControls(QWidget):
     update_signal = pyqtSignal()
 
-    def __init__(self, sp, parent=None):
+    def __init__(self, sp, parent=None, playback_ttl=0.5):
         super().__init__(parent)
         self.sp = sp
+        # Playback is read and controlled on the asyncio loop, never blocking the GUI
+        self.client = get_async_spotify(with_priority(sp, PLAYBACK)) if sp is not None else None
+        # The timer, commands and update_signal often read playback within
+        # milliseconds of each other; they share one request
+        self.playback_reads = SingleFlight(ttl=playback_ttl)
+        self.polling = False
+        self.album_art_url = None
         self.current_volume = 50  # Default volume
         self.volume_changed_by_user = False
+        # Dragging the slider changes the value on every tick; only the last one is sent
+        self.volume_timer = QTimer(self)
+        self.volume_timer.setSingleShot(True)
+        self.volume_timer.setInterval(200)
+        self.volume_timer.timeout.connect(self.send_volume)
+        self.images = get_image_loader()
+        self.images.image_loaded.connect(self.on_image_loaded)
         self.setup_ui()
         if self.sp is not None:
             self.timer = QTimer(self)
             self.timer.timeout.connect(self.update_playback)
-            self.timer.start(1000)
             self.update_signal.connect(self.update_playback)
-            # Set initial volume
-            try:
-                playback = self.sp.current_playback()
-                if playback and 'device' in playback:
-                    self.current_volume = playback['device']['volume_percent']
-                    self.volume_slider.setValue(self.current_volume)
-            except Exception as e:
-                print(f"Error getting initial volume: {e}")
+            after_startup(self.start_polling)
         else:
             self.set_controls_enabled(False)
             self.track_name.setText("Spotify not connected")
 
+    def start_polling(self):
+        self.timer.start(1000)
+        self.update_playback()  # Also sets the initial volume
+
     def setup_ui(self):
         self.setStyleSheet("""
             background-color: #2A2A2A;
@@ -226,6 +241,14 @@ class PlayerControls(QWidget):
     def volume_slider_released(self):
         self.volume_changed_by_user = False
 
+    async def current_playback(self):
+        return await self.playback_reads.do_async("current_playback", self.client.current_playback)
+
+    def playback_changed(self):
+        """Re-read playback after a command changed it"""
+        self.playback_reads.invalidate()
+        self.update_signal.emit()
+
     def format_time(self, milliseconds):
         """Convert milliseconds to MM:SS format"""
         seconds = int(milliseconds / 1000)
@@ -234,8 +257,19 @@ class PlayerControls(QWidget):
         return f"{minutes}:{seconds:02d}"
 
     def update_playback(self):
+        if self.polling:
+            return  # The previous poll is still waiting on Spotify
+        self.polling = True
+        run_async(self.current_playback(), on_done=self.show_playback, on_error=self.on_playback_failed)
+
+    def on_playback_failed(self, error):
+        self.polling = False
+        print(f"Error updating playback: {error}")
+        self.show_no_playback()
+
+    def show_playback(self, current):
+        self.polling = False
         try:
-            current = self.sp.current_playback()
             if current is None:
                 self.show_no_playback()
                 return
@@ -253,7 +287,7 @@ class PlayerControls(QWidget):
             # Update album art
             album_images = track.get('album', {}).get('images', [])
             if album_images:
-                self.load_album_art(album_images[0].get('url'))
+                self.load_album_art(best_image_url(album_images, 80))
             else:
                 self.album_art.clear()
 
@@ -270,7 +304,7 @@ class PlayerControls(QWidget):
                 self.duration_time.setText(self.format_time(duration_ms))
 
             # Update volume only if not being changed by user
-            if not self.volume_changed_by_user and 'device' in current and 'volume_percent' in current['device']:
+            if not self.volume_changed_by_user and not self.volume_timer.isActive() and 'device' in current and 'volume_percent' in current['device']:
                 self.current_volume = current['device']['volume_percent']
                 self.volume_slider.setValue(self.current_volume)
 
@@ -279,26 +313,35 @@ class PlayerControls(QWidget):
             self.show_no_playback()
 
     def load_album_art(self, image_url):
-        """Load album art from URL in a thread-safe way"""
-        try:
-            response = requests.get(image_url)
-            if response.status_code == 200:
-                pixmap = QPixmap()
-                pixmap.loadFromData(response.content)
-                self.album_art.setPixmap(pixmap.scaled(
-                    80, 80, 
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation
-                ))
-        except Exception as e:
-            print(f"Error loading album art: {e}")
-            self.album_art.clear()
+        """Show the cover through the shared image loader, which downloads it off the GUI thread"""
+        if image_url == self.album_art_url:
+            return  # Polled every second; only a new track changes the cover
+        self.album_art_url = image_url
+        image = self.images.image(image_url)
+        if image is None:
+            self.album_art.clear()  # on_image_loaded shows it once downloaded
+        else:
+            self.show_album_art(image)
+
+    def on_image_loaded(self, url):
+        if url == self.album_art_url:
+            image = self.images.image(url)
+            if image is not None:
+                self.show_album_art(image)
+
+    def show_album_art(self, image):
+        self.album_art.setPixmap(QPixmap.fromImage(image).scaled(
+            80, 80,
+            Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.SmoothTransformation
+        ))
 
     def show_no_playback(self):
         """Reset UI when no playback is active"""
         self.track_name.setText("Not Playing")
         self.artist_name.setText("")
         self.album_art.clear()
+        self.album_art_url = None
         self.play_button.setText("▶")
         self.current_time.setText("0:00")
         self.duration_time.setText("0:00")
@@ -312,40 +355,35 @@ class PlayerControls(QWidget):
         self.volume_slider.setEnabled(enabled)
         self.progress_slider.setEnabled(False)
 
+    def run_command(self, coro, action):
+        run_async(coro, on_done=lambda _: self.playback_changed(),
+                  on_error=lambda e: print(f"Error {action}: {e}"))
+
     def toggle_playback(self):
-        try:
-            current = self.sp.current_playback()
-            if current is None:
-                devices = self.sp.devices()
-                if devices and devices.get('devices'):
-                    self.sp.transfer_playback(devices['devices'][0]['id'], force_play=True)
-            else:
-                if current.get('is_playing', False):
-                    self.sp.pause_playback()
-                else:
-                    self.sp.start_playback()
-            self.update_signal.emit()
-        except Exception as e:
-            print(f"Error toggling playback: {e}")
+        self.run_command(self.toggle_playback_async(), "toggling playback")
+
+    async def toggle_playback_async(self):
+        current = await self.current_playback()
+        if current is None:
+            devices = await self.client.devices()
+            if devices and devices.get('devices'):
+                await self.client.transfer_playback(devices['devices'][0]['id'], force_play=True)
+        elif current.get('is_playing', False):
+            await self.client.pause_playback()
+        else:
+            await self.client.start_playback()
 
     def next_track(self):
-        try:
-            self.sp.next_track()
-            self.update_signal.emit()
-        except Exception as e:
-            print(f"Error skipping to next track: {e}")
+        self.run_command(self.client.next_track(), "skipping to next track")
 
     def previous_track(self):
-        try:
-            self.sp.previous_track()
-            self.update_signal.emit()
-        except Exception as e:
-            print(f"Error going to previous track: {e}")
+        self.run_command(self.client.previous_track(), "going to previous track")
 
     def set_volume(self, value):
-        try:
-            if value != self.current_volume:
-                self.current_volume = value
-                self.sp.volume(value)
-        except Exception as e:
-            print(f"Error setting volume: {e}")
\ No newline at end of file
+        if value != self.current_volume:
+            self.current_volume = value
+            self.volume_timer.start()
+
+    def send_volume(self):
+        run_async(self.client.volume(self.current_volume), on_done=lambda _: self.playback_reads.invalidate(),
+                  on_error=lambda e: print(f"Error setting volume: {e}"))
@@ -1,11 +1,20 @@
 import spotipy
+from PyQt6 import sip
 from PyQt6.QtWidgets import (QLabel, QLineEdit, QPushButton, QWidget, 
-                            QHBoxLayout, QVBoxLayout, QGridLayout, 
-                            QSizePolicy, QSpacerItem, QScrollArea)
-from PyQt6.QtCore import Qt, QSize
-from PyQt6.QtGui import QPixmap, QFont
-import requests
-from io import BytesIO
+                            QHBoxLayout, QVBoxLayout)
+from PyQt6.QtCore import Qt
+
+from async_spotify import get_async_spotify
+from background import after_startup, run_async
+from card_view import CardView
+from entities import Album, TrackList
+from metadata_store import get_metadata_store
+from spotify_scheduler import INTERACTIVE, with_priority
+import tracing
+
+# Only the fields the page shows, so Spotify sends (and we parse) far less JSON
+PLAYLIST_FIELDS = ("name,owner(display_name),description,"
+                   "tracks(total,items(track(id,name,artists(name),album(id,name,images,artists(name)))))")
 
 class Playlist:
     def __init__(self, sp, market):
@@ -13,6 +22,7 @@ class Playlist:
         self.market = market
         self.min_width = 300
         self.max_image_size = 150
+        self.current_playlist_id = None
 
     def setup_ui(self, app):
         app.clear_content()
@@ -69,27 +79,46 @@ class Playlist:
         
         main_layout.addWidget(input_container)
         
-        # Create scroll area for playlist content
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setStyleSheet("border: none;")
+        # Playlist metadata (shown once a playlist is loaded)
+        self.metadata_card = QWidget()
+        self.metadata_card.setStyleSheet("""
+            background-color: #2A2A2A;
+            border-radius: 8px;
+            padding: 15px;
+            border: 1px solid #1DB954;
+        """)
+        metadata_layout = QVBoxLayout(self.metadata_card)
+        metadata_layout.setSpacing(10)
+        
+        self.name_label = QLabel()
+        self.name_label.setStyleSheet("font-size: 18px; font-weight: bold; color: #1DB954;")
+        metadata_layout.addWidget(self.name_label)
+        
+        self.details_label = QLabel()
+        self.details_label.setStyleSheet("font-size: 14px; color: #FFFFFF;")
+        self.details_label.setWordWrap(True)
+        metadata_layout.addWidget(self.details_label)
         
-        # Content container for playlist items
-        self.content_container = QWidget()
-        self.content_grid = QGridLayout(self.content_container)
-        self.content_grid.setAlignment(Qt.AlignmentFlag.AlignTop)
-        self.content_grid.setSpacing(15)
+        self.metadata_card.hide()
+        main_layout.addWidget(self.metadata_card)
         
-        scroll_area.setWidget(self.content_container)
-        main_layout.addWidget(scroll_area)
+        # Tracks are painted by a shared model/view card list
+        self.results_view = CardView(
+            mode="list",
+            columns=1,
+            max_image_size=self.max_image_size,
+            border_color="#333333"
+        )
+        main_layout.addWidget(self.results_view)
         
         # Add main container to app's content grid
         app.content_grid.addWidget(main_container, 0, 0)
         
         # Show default playlist (but don't display the URL in the input field)
         default_playlist = "https://open.spotify.com/playlist/7ghJanbkXZNnLWL7w498FZ?si=718887de62b64527"
-        self.get_playlist(default_playlist, app)  # Perform search without showing URL
+        after_startup(self.get_playlist, default_playlist, app)  # Perform search without showing URL
 
+    @tracing.traced("playlist.load")
     def get_playlist(self, playlist_id, app):
         self.clear_results()
 
@@ -101,154 +130,77 @@ class Playlist:
         if 'playlist' in playlist_id:
             playlist_id = playlist_id.split('playlist/')[1].split('?')[0]
 
-        try:
-            playlist = self.sp.playlist(playlist_id, market=self.market)
-            if not playlist:
-                self.show_message("Playlist not found.")
-                return
-
-            # Get first 5 tracks
-            tracks = []
-            for item in playlist['tracks']['items'][:5]:
-                track = item['track']
-                image_url = track['album']['images'][0]['url'] if track['album']['images'] else None
-                tracks.append({
-                    "name": track['name'],
-                    "artist": track['artists'][0]['name'],
-                    "image_url": image_url
-                })
-
-            self.display_playlist({
-                "name": playlist['name'],
-                "owner": playlist['owner']['display_name'],
-                "description": playlist['description'] or "No description",
-                "total_tracks": playlist['tracks']['total'],
-                "tracks": tracks
-            })
-
-        except spotipy.exceptions.SpotifyException as e:
-            self.show_message(f"Spotify API Error: {str(e)}")
-        except Exception as e:
-            self.show_message(f"Error: {str(e)}")
+        self.current_playlist_id = playlist_id
+        self.show_message("Loading playlist...")
+        run_async(self.fetch_playlist(playlist_id),
+                  on_done=lambda data: self.on_playlist_ready(playlist_id, data),
+                  on_error=lambda error: self.on_playlist_failed(playlist_id, error))
+
+    async def fetch_playlist(self, playlist_id):
+        """Load the playlist and store its tracks and albums"""
+        playlist = await get_async_spotify(with_priority(self.sp, INTERACTIVE)).playlist(playlist_id, fields=PLAYLIST_FIELDS, market=self.market)
+        if not playlist:
+            return None
+
+        items = playlist['tracks']['items']
+        tracks = TrackList.from_items(items, self.max_image_size)
+        albums = {}
+        for item in items:
+            album = (item.get('track') or {}).get('album')
+            if album and album.get('id'):
+                albums[album['id']] = Album.from_spotify(album, self.max_image_size)
+        store = get_metadata_store()
+        store.add("tracks", tracks)
+        store.add("albums", albums.values())
+
+        return {
+            "name": playlist['name'],
+            "owner": playlist['owner']['display_name'],
+            "description": playlist['description'] or "No description",
+            "total_tracks": playlist['tracks']['total'],
+            "tracks": tracks[:5]
+        }
+
+    def is_current(self, playlist_id):
+        return playlist_id == self.current_playlist_id and not sip.isdeleted(self.results_view)
 
+    def on_playlist_ready(self, playlist_id, playlist_data):
+        if not self.is_current(playlist_id):
+            return
+        if playlist_data is None:
+            self.show_message("Playlist not found.")
+        else:
+            self.display_playlist(playlist_data)
+
+    def on_playlist_failed(self, playlist_id, error):
+        if not self.is_current(playlist_id):
+            return
+        if isinstance(error, spotipy.exceptions.SpotifyException):
+            self.show_message(f"Spotify API Error: {str(error)}")
+        else:
+            self.show_message(f"Error: {str(error)}")
+
+    @tracing.traced("render.playlist")
     def display_playlist(self, playlist_data):
-        self.clear_results()
-        
-        # Calculate responsive layout
-        content_width = self.content_container.width() - 40
-        image_size = min(self.max_image_size, content_width // 2 - 40)
-        
         # Playlist metadata
-        metadata_card = QWidget()
-        metadata_card.setStyleSheet("""
-            background-color: #2A2A2A;
-            border-radius: 8px;
-            padding: 15px;
-            border: 1px solid #1DB954;
-        """)
-        
-        metadata_layout = QVBoxLayout(metadata_card)
-        metadata_layout.setSpacing(10)
-        
-        name_label = QLabel(playlist_data['name'])
-        name_label.setStyleSheet("font-size: 18px; font-weight: bold; color: #1DB954;")
-        metadata_layout.addWidget(name_label)
-        
-        details_label = QLabel(
+        self.name_label.setText(playlist_data['name'])
+        self.details_label.setText(
             f"👤 {playlist_data['owner']}\n"
             f"📝 {playlist_data['description']}\n"
             f"🎵 {playlist_data['total_tracks']} tracks"
         )
-        details_label.setStyleSheet("font-size: 14px; color: #FFFFFF;")
-        details_label.setWordWrap(True)
-        metadata_layout.addWidget(details_label)
-        
-        self.content_grid.addWidget(metadata_card, 0, 0, 1, 2)
+        self.metadata_card.show()
         
         # Tracks
-        for i, track in enumerate(playlist_data['tracks'], 1):
-            track_card = QWidget()
-            track_card.setStyleSheet("""
-                background-color: #2A2A2A;
-                border-radius: 8px;
-                padding: 10px;
-                border: 1px solid #333333;
-            """)
-            
-            track_layout = QHBoxLayout(track_card)
-            track_layout.setContentsMargins(5, 5, 5, 5)
-            track_layout.setSpacing(15)
-            
-            # Number
-            num_label = QLabel(f"{i}.")
-            num_label.setStyleSheet("font-size: 16px; color: #1DB954; font-weight: bold;")
-            num_label.setFixedWidth(30)
-            track_layout.addWidget(num_label)
-            
-            # Image
-            image_label = QLabel()
-            image_label.setFixedSize(image_size, image_size)
-            if track['image_url']:
-                try:
-                    response = requests.get(track['image_url'])
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(response.content)
-                    pixmap = pixmap.scaled(
-                        image_size, image_size,
-                        Qt.AspectRatioMode.KeepAspectRatio,
-                        Qt.TransformationMode.SmoothTransformation
-                    )
-                    image_label.setPixmap(pixmap)
-                except Exception:
-                    image_label.setText("No Image")
-                    image_label.setStyleSheet("color: #AAAAAA; font-size: 12px;")
-            else:
-                image_label.setText("No Image")
-                image_label.setStyleSheet("color: #AAAAAA; font-size: 12px;")
-            track_layout.addWidget(image_label)
-            
-            # Track info
-            info_widget = QWidget()
-            info_layout = QVBoxLayout(info_widget)
-            info_layout.setContentsMargins(0, 0, 0, 0)
-            info_layout.setSpacing(5)
-            
-            track_label = QLabel(track['name'])
-            track_label.setStyleSheet("font-size: 16px; font-weight: bold; color: #FFFFFF;")
-            track_label.setWordWrap(True)
-            
-            artist_label = QLabel(track['artist'])
-            artist_label.setStyleSheet("font-size: 14px; color: #AAAAAA;")
-            artist_label.setWordWrap(True)
-            
-            info_layout.addWidget(track_label)
-            info_layout.addWidget(artist_label)
-            info_layout.addStretch()
-            
-            track_layout.addWidget(info_widget, 1)
-            
-            self.content_grid.addWidget(track_card, i, 0, 1, 2)
-        
-        self.content_container.adjustSize()
+        self.results_view.set_items([
+            {"number": i, "title": track.name, "subtitle": track.artist, "image_url": track.image_url}
+            for i, track in enumerate(playlist_data['tracks'], 1)
+        ])
 
     def clear_results(self):
-        for i in range(self.content_grid.count() - 1, -1, -1):
-            widget = self.content_grid.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
-        
-        self.content_grid.addItem(
-            QSpacerItem(20, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding), 
-            0, 0, 1, 2
-        )
+        self.metadata_card.hide()
+        self.results_view.clear()
 
     def show_message(self, text):
-        self.clear_results()
-        
-        message = QLabel(text)
-        message.setStyleSheet("font-size: 14px; color: #FFFFFF; padding: 20px;")
-        message.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        message.setWordWrap(True)
-        
-        self.content_grid.addWidget(message, 0, 0, 1, 2)
-        self.content_container.adjustSize()
\ No newline at end of file
+        self.metadata_card.hide()
+        self.results_view.show_message(text)
@@ -0,0 +1,52 @@
+import json
+import os
+
+PROFILE_FIELDS = ("id", "display_name", "country", "product")
+
+
+class ProfileCache:
+    """The signed-in user's profile and the page last shown, kept on disk.
+
+    Startup reads the market and page from here, so the window can be
+    built before the profile has been fetched again. Saved only when
+    something changed.
+    """
+
+    def __init__(self, path="profile_cache.json", default_market="US", default_page="recommendations"):
+        self.path = path
+        self.default_market = default_market
+        self.profile = {}
+        self.last_page = default_page
+        self.load()
+
+    @property
+    def market(self):
+        return self.profile.get("country") or self.default_market
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.profile = data.get("profile", {})
+            self.last_page = data.get("last_page", self.last_page)
+        except Exception as e:
+            print(f"Error loading profile cache: {e}")
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"profile": self.profile, "last_page": self.last_page}, f)
+        os.replace(tmp_path, self.path)
+
+    def update_profile(self, profile):
+        profile = {key: profile.get(key) for key in PROFILE_FIELDS}
+        if profile != self.profile:
+            self.profile = profile
+            self.save()
+
+    def set_last_page(self, page):
+        if page != self.last_page:
+            self.last_page = page
+            self.save()
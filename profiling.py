@@ -0,0 +1,233 @@
+import builtins
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+
+_profiler = None
+
+
+class Profiler:
+    """Records where startup and interaction time goes, for main.py --profile.
+
+    Import times, page construction, first paint and interactions become
+    events of a Chrome trace (open trace.json in chrome://tracing or
+    Perfetto). The startup and each interaction also run under cProfile;
+    write_report() saves those as .prof files and writes a summary.
+    """
+
+    def __init__(self, started, output_dir="profile"):
+        self.started = started
+        self.output_dir = output_dir
+        self.pid = os.getpid()
+        self.events = []
+        self.imports = []  # (name, ms, finished at) of imports not nested in another
+        self.first_paint_ms = None
+        self.interactions = {}  # name -> [ms, ...]
+        self.stats = {}  # name -> pstats.Stats, "startup" included
+        self._local = threading.local()
+        self._profiling = False
+        self._startup_profile = cProfile.Profile()
+        self._startup_profile.enable()
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def _ts(self, t):
+        return (t - self.started) * 1e6
+
+    def add(self, name, category, start, end, args=None):
+        event = {"name": name, "cat": category, "ph": "X", "pid": self.pid, "tid": threading.get_ident(),
+                 "ts": self._ts(start), "dur": (end - start) * 1e6}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def mark(self, name, category="app"):
+        self.events.append({"name": name, "cat": category, "ph": "i", "s": "g", "pid": self.pid,
+                            "tid": threading.get_ident(), "ts": self._ts(time.perf_counter())})
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Only first imports take time worth recording
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        depth = getattr(self._local, "import_depth", 0)
+        self._local.import_depth = depth + 1
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            end = time.perf_counter()
+            self._local.import_depth = depth
+            self.add(f"import {name}", "import", start, end)
+            if depth == 0:
+                self.imports.append((name, (end - start) * 1000, end))
+
+    def first_paint(self):
+        if self.first_paint_ms is not None:
+            return
+        self.first_paint_ms = (time.perf_counter() - self.started) * 1000
+        self.mark("first paint")
+        self._startup_profile.disable()
+        self.stats["startup"] = pstats.Stats(self._startup_profile)
+
+    @contextlib.contextmanager
+    def interaction(self, name, timed=True):
+        # Startup is covered by its own profile until the first paint
+        if self.first_paint_ms is None:
+            yield
+            return
+        # Only one cProfile can run at a time, so an interaction inside another is only timed
+        profile = None
+        if not self._profiling:
+            profile = cProfile.Profile()
+            self._profiling = True
+        start = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                self._profiling = False
+                if name in self.stats:
+                    self.stats[name].add(profile)
+                else:
+                    self.stats[name] = pstats.Stats(profile)
+            if timed:
+                self.record_interaction(name, start, time.perf_counter())
+
+    def record_interaction(self, name, start, end):
+        self.add(name, "interaction", start, end)
+        self.interactions.setdefault(name, []).append((end - start) * 1000)
+
+    def summary(self, top=10):
+        lines = []
+        if self.first_paint_ms is not None:
+            lines.append(f"Time to first paint: {self.first_paint_ms:.0f} ms")
+        first_paint = self.started + (self.first_paint_ms or float("inf")) / 1000
+        for label, imports in (("before first paint", [i for i in self.imports if i[2] <= first_paint]),
+                               ("after first paint", [i for i in self.imports if i[2] > first_paint])):
+            if not imports:
+                continue
+            lines.append(f"\nImports {label}: {sum(i[1] for i in imports):.0f} ms in {len(imports)} top-level imports")
+            for name, ms, end in sorted(imports, key=lambda item: -item[1])[:top]:
+                lines.append(f"  {ms:8.1f} ms  {name}")
+
+        pages = [e for e in self.events if e["cat"] == "page"]
+        if pages:
+            lines.append("\nPages:")
+            for event in pages:
+                lines.append(f"  {event['dur'] / 1000:8.1f} ms  {event['name']}")
+
+        if self.interactions:
+            lines.append("\nInteractions:           count    mean ms     max ms")
+            for name, times in sorted(self.interactions.items()):
+                lines.append(f"  {name:<22} {len(times):5d} {sum(times) / len(times):10.1f} {max(times):10.1f}")
+
+        for name, stats in self.stats.items():
+            out = io.StringIO()
+            stats.stream = out
+            stats.sort_stats("cumulative").print_stats(top)
+            body = out.getvalue()
+            # Drop pstats' preamble down to the column headers
+            body = body[body.find("   ncalls"):] if "   ncalls" in body else body
+            lines.append(f"\ncProfile, {name}, top {top} by cumulative time:\n{body.rstrip()}")
+        return "\n".join(lines)
+
+    def write_report(self):
+        builtins.__import__ = self._original_import
+        os.makedirs(self.output_dir, exist_ok=True)
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        metadata = [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": names.get(tid, str(tid))}}
+                    for tid in {e["tid"] for e in self.events}]
+        with open(os.path.join(self.output_dir, "trace.json"), "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + self.events, "displayTimeUnit": "ms"}, f)
+        for name, stats in self.stats.items():
+            stats.dump_stats(os.path.join(self.output_dir, name.replace(" ", "_") + ".prof"))
+        summary = self.summary()
+        with open(os.path.join(self.output_dir, "summary.txt"), "w", encoding="utf-8") as f:
+            f.write(summary + "\n")
+        print(summary)
+        print(f"\nProfile written to {self.output_dir}/ (trace.json opens in chrome://tracing or ui.perfetto.dev)")
+
+
+def enable(started, output_dir="profile"):
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler(started, output_dir)
+    return _profiler
+
+
+def get_profiler():
+    """The active Profiler, or None when not profiling"""
+    return _profiler
+
+
+def span(name, category="app"):
+    """Context manager timing a block as a trace event; a no-op unless profiling"""
+    if _profiler is None:
+        return contextlib.nullcontext()
+    return _timed_span(name, category)
+
+
+@contextlib.contextmanager
+def _timed_span(name, category):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _profiler.add(name, category, start, time.perf_counter())
+
+
+def profiled(name, timed=True):
+    """Decorator: run the function as an interaction called name when profiling
+
+    timed=False only profiles the call, for interactions whose time is
+    recorded by a begin_interaction() that finishes in a later callback.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _profiler is None:
+                return fn(*args, **kwargs)
+            with _profiler.interaction(name, timed):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class Interaction:
+    """An interaction timed from begin_interaction() until finish() is called"""
+
+    def __init__(self, name):
+        self.name = name
+        self.start = time.perf_counter()
+        self.finished = False
+
+    def finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        _profiler.record_interaction(self.name, self.start, time.perf_counter())
+
+
+class _NoopInteraction:
+    def finish(self):
+        pass
+
+
+_NOOP_INTERACTION = _NoopInteraction()
+
+
+def begin_interaction(name):
+    """Start timing an interaction that completes in a callback (results from a worker)"""
+    if _profiler is None or _profiler.first_paint_ms is None:
+        return _NOOP_INTERACTION
+    return Interaction(name)
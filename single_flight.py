@@ -0,0 +1,107 @@
+import asyncio
+from concurrent.futures import Future
+import threading
+import time
+
+
+class SingleFlight:
+    """Collapses repeated reads of the same key.
+
+    Callers asking for a key while a fetch of it is running wait for that
+    fetch instead of starting their own, and a result younger than ttl
+    seconds is returned without fetching at all. Errors are shared with
+    the waiting callers but never cached.
+    """
+
+    def __init__(self, ttl=0.5):
+        self.ttl = ttl
+        self.fetches = 0
+        self.hits = 0
+        self._cache = {}  # key -> (time, value)
+        self._in_flight = {}  # key -> Future
+        self._generation = 0  # bumped by invalidate()
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.ttl:
+                self.hits += 1
+                return cached[1]
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                generation = self._generation
+                self.fetches += 1
+            else:
+                self.hits += 1
+        if not leader:
+            return future.result()
+
+        try:
+            value = fn(*args, **kwargs)
+        except Exception as e:
+            self._done(key, future)
+            future.set_exception(e)
+            raise
+        self._done(key, future, generation, value)
+        future.set_result(value)
+        return value
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        """do() for a coroutine function; callers must share one asyncio loop
+        and not mix do() and do_async() on the same key."""
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.ttl:
+                self.hits += 1
+                return cached[1]
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = asyncio.get_running_loop().create_future()
+                generation = self._generation
+                self.fetches += 1
+            else:
+                self.hits += 1
+        if not leader:
+            return await asyncio.shield(future)
+
+        try:
+            value = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            self._done(key, future)
+            future.cancel()
+            raise
+        except Exception as e:
+            self._done(key, future)
+            future.set_exception(e)
+            future.exception()  # Followers may be gone; don't log it as unretrieved
+            raise
+        self._done(key, future, generation, value)
+        future.set_result(value)
+        return value
+
+    def _done(self, key, future, generation=None, value=None):
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+            # A read that overlapped invalidate() may be stale
+            if generation == self._generation:
+                self._cache[key] = (time.monotonic(), value)
+
+    def invalidate(self, key=None):
+        """Drop the cached value for key (or all keys), e.g. after a write.
+
+        Reads already in flight may predate the write, so later callers
+        start a new fetch and those results are not cached.
+        """
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._cache.clear()
+                self._in_flight.clear()
+            else:
+                self._cache.pop(key, None)
+                self._in_flight.pop(key, None)
@@ -0,0 +1,132 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import time
+
+from spotify_scheduler import INTERACTIVE, with_priority
+
+# Most ids Spotify accepts per batch call
+BATCH_SIZES = {"tracks": 50, "artists": 50, "albums": 20}
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(sp, market=None):
+    """Shared batcher per market, so lookups from every page and sync coalesce
+
+    Callers may hold sp at different priority classes; each lookup names
+    its own priority instead.
+    """
+    with _batchers_lock:
+        if market not in _batchers:
+            _batchers[market] = SpotifyBatcher(sp, market)
+        return _batchers[market]
+
+
+def all_batchers():
+    with _batchers_lock:
+        return list(_batchers.values())
+
+
+class SpotifyBatcher:
+    """Coalesces track, artist and album lookups by id into batch calls.
+
+    lookup() returns a Future at once. Ids requested from any thread
+    within window seconds of each other are deduplicated and sent as
+    sp.tracks / sp.artists / sp.albums calls of up to BATCH_SIZES ids;
+    each Future then gets its object (None for an unknown id) or the
+    call's exception. A batch runs through the scheduler at the most
+    urgent priority among the lookups in it.
+    """
+
+    def __init__(self, sp, market=None, window=0.02, max_concurrency=4):
+        self.sp = sp
+        self.market = market
+        self.window = window
+        self.calls = 0
+        self.lookups = 0
+        self._pending = {kind: {} for kind in BATCH_SIZES}  # kind -> id -> [Future]
+        self._priorities = {kind: {} for kind in BATCH_SIZES}  # kind -> id -> most urgent priority
+        self._in_flight = {kind: {} for kind in BATCH_SIZES}
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="spotify-batch")
+        threading.Thread(target=self._run, name="spotify-batcher", daemon=True).start()
+
+    def lookup(self, kind, id, priority=INTERACTIVE):
+        return self.lookup_many(kind, [id], priority)[0]
+
+    def lookup_many(self, kind, ids, priority=INTERACTIVE):
+        """Futures for ids, in order"""
+        futures = []
+        with self._cond:
+            pending = self._pending[kind]
+            priorities = self._priorities[kind]
+            in_flight = self._in_flight[kind]
+            for id in ids:
+                future = Future()
+                # Ids already being fetched join that call instead of a new one
+                if id in in_flight:
+                    in_flight[id].append(future)
+                else:
+                    pending.setdefault(id, []).append(future)
+                    priorities[id] = min(priorities.get(id, priority), priority)
+                futures.append(future)
+            self.lookups += len(ids)
+            self._cond.notify()
+        return futures
+
+    def get_many(self, kind, ids, timeout=None, priority=INTERACTIVE):
+        """Objects for ids (None where unknown); blocks, so call it off the GUI thread"""
+        return [future.result(timeout) for future in self.lookup_many(kind, ids, priority)]
+
+    def _full(self):
+        return any(len(self._pending[kind]) >= size for kind, size in BATCH_SIZES.items())
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not any(self._pending.values()):
+                    self._cond.wait()
+                # Give other callers a moment to join this batch, unless one is already full
+                deadline = time.monotonic() + self.window
+                while not self._full() and time.monotonic() < deadline:
+                    self._cond.wait(deadline - time.monotonic())
+                pending, priorities = self._pending, self._priorities
+                self._pending = {kind: {} for kind in BATCH_SIZES}
+                self._priorities = {kind: {} for kind in BATCH_SIZES}
+                for kind, waiters in pending.items():
+                    self._in_flight[kind].update(waiters)
+            for kind, waiters in pending.items():
+                # Most urgent first, so interactive ids are not stuck in a background batch
+                ids = sorted(waiters, key=priorities[kind].get)
+                size = BATCH_SIZES[kind]
+                for start in range(0, len(ids), size):
+                    chunk = ids[start:start + size]
+                    self._executor.submit(self._fetch, kind, chunk, {id: waiters[id] for id in chunk},
+                                          priorities[kind][chunk[0]])
+
+    def _call(self, kind, ids, priority):
+        with self._cond:
+            self.calls += 1
+        sp = with_priority(self.sp, priority)
+        if kind == "tracks":
+            return sp.tracks(ids, market=self.market)['tracks']
+        if kind == "artists":
+            return sp.artists(ids)['artists']
+        return sp.albums(ids, market=self.market)['albums']
+
+    def _fetch(self, kind, ids, waiters, priority):
+        try:
+            objects, error = self._call(kind, ids, priority), None
+        except Exception as e:
+            objects, error = [], e
+        with self._cond:
+            # Waiters that joined while the call was in flight are in the same lists
+            for id in ids:
+                self._in_flight[kind].pop(id, None)
+        for i, id in enumerate(ids):
+            for future in waiters[id]:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(objects[i] if i < len(objects) else None)
@@ -0,0 +1,193 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from spotipy.exceptions import SpotifyException
+
+import metrics
+import tracing
+from rate_limit import TokenBucket
+
+# Priority classes, most urgent first
+INTERACTIVE = 0  # the user is waiting on the result
+PLAYBACK = 1  # player bar polling and commands
+BACKGROUND = 2  # sync, crawling, prefetch
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", PLAYBACK: "playback", BACKGROUND: "background"}
+
+
+def with_priority(sp, priority):
+    """sp at another priority class; plain spotipy clients are returned unchanged"""
+    return sp.with_priority(priority) if isinstance(sp, ScheduledSpotify) else sp
+
+
+def retry_after(error, default=1.0):
+    """Seconds to back off after a 429, from its Retry-After header"""
+    try:
+        return max(float((error.headers or {}).get("Retry-After", default)), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+
+class SpotifyScheduler:
+    """Single gate for every Spotify Web API call.
+
+    Calls share one token bucket. When several are waiting, the next
+    token goes to the most urgent priority class that is below its
+    concurrency limit, oldest caller first, so a playlist load or a
+    library sync cannot starve the player bar. A 429 pauses every class
+    for the Retry-After it carries and the call is retried; a class with
+    a max_wait gives up with the 429 instead of blocking longer than that.
+    Coroutines (async_spotify.py) wait in the same queue via acquire_async().
+    """
+
+    def __init__(self, sp, requests_per_second=10, burst=None, concurrency=None, max_wait=None, max_retries=3):
+        self.sp = sp
+        self.bucket = TokenBucket(requests_per_second, burst)
+        self.concurrency = concurrency or {INTERACTIVE: 4, PLAYBACK: 2, BACKGROUND: 2}
+        # The player bar polls every second; skipping a poll beats freezing it
+        self.max_wait = max_wait or {INTERACTIVE: 10.0, PLAYBACK: 0.5, BACKGROUND: None}
+        self.max_retries = max_retries
+        self.active = {priority: 0 for priority in PRIORITY_NAMES}
+        self.calls = {priority: 0 for priority in PRIORITY_NAMES}
+        self.throttled = 0
+        self.blocked_until = 0.0
+        self._waiting = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._clients = {}
+
+    def client(self, priority=INTERACTIVE):
+        """A spotipy.Spotify stand-in whose calls run at priority"""
+        if priority not in self._clients:
+            self._clients[priority] = ScheduledSpotify(self, priority)
+        return self._clients[priority]
+
+    def call(self, priority, method, *args, **kwargs):
+        current = tracing.current_span()
+        for attempt in range(self.max_retries + 1):
+            queued = time.monotonic()
+            self._acquire(priority)
+            if current is not None:
+                current.set("attempts", attempt + 1)
+                current.set("queued_ms", round((time.monotonic() - queued) * 1000, 1))
+            try:
+                return method(*args, **kwargs)
+            except SpotifyException as e:
+                if e.http_status != 429 or attempt == self.max_retries:
+                    raise
+                self.pause(retry_after(e))
+            finally:
+                self.release(priority)
+
+    def pause(self, seconds):
+        """Hold back every class for seconds (after a 429)"""
+        with self._cond:
+            self.throttled += 1
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def _next_eligible(self):
+        for entry in sorted(self._waiting):
+            if self.active[entry[0]] < self.concurrency[entry[0]]:
+                return entry
+        return None
+
+    def _try_acquire(self, entry, deadline):
+        """Take a token for a queued entry if it is its turn; called holding _cond.
+
+        Returns 0 once taken, else how long to wait before trying again
+        (None: until another call finishes or queues).
+        """
+        priority = entry[0]
+        now = time.monotonic()
+        wait = self.blocked_until - now
+        if wait <= 0 and self._next_eligible() == entry:
+            if self.bucket.try_acquire():
+                self.active[priority] += 1
+                self.calls[priority] += 1
+                return 0
+            wait = max(self.bucket.wait_time(), 0.001)
+        elif wait <= 0:
+            wait = None
+        if deadline is not None:
+            if now >= deadline:
+                raise SpotifyException(429, -1, "Rate limited by the request scheduler",
+                                       headers={"Retry-After": f"{max(self.blocked_until - now, 0):.1f}"})
+            wait = deadline - now if wait is None else min(wait, deadline - now)
+        return wait
+
+    def _enqueue(self, priority):
+        max_wait = self.max_wait.get(priority)
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        entry = (priority, next(self._seq))
+        heapq.heappush(self._waiting, entry)
+        return entry, deadline
+
+    def _dequeue(self, entry):
+        self._waiting.remove(entry)
+        heapq.heapify(self._waiting)
+        self._cond.notify_all()
+
+    def _acquire(self, priority):
+        with self._cond:
+            entry, deadline = self._enqueue(priority)
+            try:
+                while True:
+                    wait = self._try_acquire(entry, deadline)
+                    if wait == 0:
+                        return
+                    self._cond.wait(wait)
+            finally:
+                self._dequeue(entry)
+
+    async def acquire_async(self, priority):
+        """Wait in the queue without blocking the event loop; pair with release()"""
+        with self._cond:
+            entry, deadline = self._enqueue(priority)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_acquire(entry, deadline)
+                if wait == 0:
+                    return
+                # Threads are woken through _cond; a coroutine checks again shortly
+                await asyncio.sleep(wait if wait is not None else 0.005)
+        finally:
+            with self._cond:
+                self._dequeue(entry)
+
+    def release(self, priority):
+        with self._cond:
+            self.active[priority] -= 1
+            self._cond.notify_all()
+
+
+class ScheduledSpotify:
+    """Wraps a spotipy.Spotify so every API method goes through a SpotifyScheduler"""
+
+    def __init__(self, scheduler, priority):
+        self.scheduler = scheduler
+        self.priority = priority
+
+    def with_priority(self, priority):
+        return self.scheduler.client(priority)
+
+    def __getattr__(self, name):
+        attr = getattr(self.scheduler.sp, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            started = time.perf_counter()
+            error = None
+            try:
+                with tracing.span(f"spotify.{name}", priority=PRIORITY_NAMES[self.priority]):
+                    return self.scheduler.call(self.priority, attr, *args, **kwargs)
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                metrics.record_api_call(name, "sync", time.perf_counter() - started, error)
+        return call
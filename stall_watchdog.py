@@ -0,0 +1,182 @@
+from collections import Counter, deque
+import os
+import sys
+import threading
+import time
+from PyQt6.QtCore import QObject, QTimer
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# Plumbing that wraps the real work; a stall is blamed on the code it calls
+SKIP_FILES = {"background.py", "profiling.py", "stall_watchdog.py", "tracing.py"}
+# Upper bounds, in ms, of the event-loop latency histogram buckets
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_watchdog = None
+
+
+def start_watchdog(**kwargs):
+    """Start the shared watchdog; call on the GUI thread once the event loop runs"""
+    global _watchdog
+    if _watchdog is None:
+        _watchdog = StallWatchdog(**kwargs)
+        _watchdog.start()
+    return _watchdog
+
+
+def get_watchdog():
+    """The running watchdog, or None"""
+    return _watchdog
+
+
+def describe(frame):
+    code = frame.f_code
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def locate(frame):
+    """(app function, innermost function) of a stack, as printable strings.
+
+    The app function is the innermost frame in this app's own modules,
+    i.e. the code that made the blocking call.
+    """
+    leaf = describe(frame)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_DIR) and os.path.basename(filename) not in SKIP_FILES:
+            return describe(frame), leaf
+        frame = frame.f_back
+    return leaf, leaf
+
+
+class StallWatchdog(QObject):
+    """Measures GUI event-loop latency and finds what blocks the GUI thread.
+
+    A QTimer beats every interval seconds; how late each beat fires is
+    the event-loop latency, kept in a histogram. A watchdog thread checks
+    the last beat every sample_interval seconds. While the GUI thread has
+    missed beats for over threshold seconds, it samples the GUI thread's
+    Python stack. When the stall ends, the function seen most often is
+    logged and counted against the stall's duration.
+    """
+
+    def __init__(self, threshold=0.2, interval=0.05, sample_interval=0.02, max_stalls=100):
+        super().__init__()
+        self.threshold = threshold
+        self.interval = interval
+        self.sample_interval = sample_interval
+        self.beats = 0
+        self.max_latency_ms = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.stalls = deque(maxlen=max_stalls)  # recent {"at", "duration_ms", "culprit", "leaf"}
+        self.stall_count = 0
+        self.culprits = Counter()  # app function -> total stalled ms
+        self._lock = threading.Lock()
+        self._gui_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._running = False
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._beat)
+
+    def start(self):
+        self._last_beat = time.monotonic()
+        self._running = True
+        self.timer.start(int(self.interval * 1000))
+        threading.Thread(target=self._run, name="stall-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._running = False
+        self.timer.stop()
+
+    def _beat(self):
+        now = time.monotonic()
+        latency_ms = max(now - self._last_beat - self.interval, 0.0) * 1000
+        self._last_beat = now
+        bucket = 0
+        while bucket < len(LATENCY_BUCKETS) and latency_ms > LATENCY_BUCKETS[bucket]:
+            bucket += 1
+        with self._lock:
+            self.beats += 1
+            self.histogram[bucket] += 1
+            self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+
+    def _run(self):
+        stalled_since = None  # the last beat before the current stall
+        samples = Counter()
+        while self._running:
+            time.sleep(self.sample_interval)
+            beat = self._last_beat
+            if stalled_since is not None and beat != stalled_since:
+                self._stall_ended((beat - stalled_since - self.interval) * 1000, samples)
+                stalled_since, samples = None, Counter()
+            if time.monotonic() - beat > self.threshold:
+                stalled_since = beat
+                frame = sys._current_frames().get(self._gui_thread)
+                if frame is not None:
+                    samples[locate(frame)] += 1
+                del frame
+
+    def _stall_ended(self, duration_ms, samples):
+        culprit, leaf = samples.most_common(1)[0][0] if samples else ("unknown", "unknown")
+        with self._lock:
+            self.stall_count += 1
+            self.culprits[culprit] += duration_ms
+            self.stalls.append({"at": time.time(), "duration_ms": duration_ms, "culprit": culprit, "leaf": leaf})
+        where = culprit if leaf == culprit else f"{culprit}, in {leaf}"
+        print(f"GUI thread stalled for {duration_ms:.0f} ms: {where}")
+
+    def percentile(self, q):
+        """Upper bound (ms) of the histogram bucket holding the q-th latency percentile"""
+        with self._lock:
+            counts, total, worst = list(self.histogram), self.beats, self.max_latency_ms
+        if not total:
+            return 0.0
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, counts):
+            seen += count
+            if seen >= q / 100 * total:
+                return min(float(bound), worst)
+        return worst
+
+    def stats(self):
+        with self._lock:
+            histogram = {f"<={bound}ms": count for bound, count in zip(LATENCY_BUCKETS, self.histogram)}
+            histogram[f">{LATENCY_BUCKETS[-1]}ms"] = self.histogram[-1]
+            stats = {
+                "beats": self.beats,
+                "max_latency_ms": self.max_latency_ms,
+                "histogram": histogram,
+                "stalls": self.stall_count,
+                "stalled_ms": sum(self.culprits.values()),
+                "top_culprits": self.culprits.most_common(10),
+                "recent_stalls": list(self.stalls)[-10:],
+            }
+        for q in (50, 95, 99):
+            stats[f"p{q}_ms"] = self.percentile(q)
+        return stats
+
+    def collect(self):
+        """Samples for metrics.Metrics.add_collector"""
+        with self._lock:
+            beats, stalls, stalled_ms = self.beats, self.stall_count, sum(self.culprits.values())
+            worst = self.max_latency_ms
+        samples = [
+            ("gui_event_loop_beats_total", "counter", "Watchdog timer beats on the GUI thread", {}, beats),
+            ("gui_stalls_total", "counter", f"GUI thread stalls over {self.threshold * 1000:.0f} ms", {}, stalls),
+            ("gui_stalled_seconds_total", "counter", "Time the GUI thread spent stalled", {}, stalled_ms / 1000),
+            ("gui_event_loop_latency_max_seconds", "gauge", "Worst event-loop latency seen", {}, worst / 1000),
+        ]
+        for q in (50, 95, 99):
+            samples.append(("gui_event_loop_latency_seconds", "gauge", "Event-loop latency percentiles (bucket upper bounds)",
+                            {"quantile": q / 100}, self.percentile(q) / 1000))
+        return samples
+
+    def summary(self):
+        stats = self.stats()
+        lines = [f"Event-loop latency over {stats['beats']} beats: p50 <= {stats['p50_ms']:.0f} ms, "
+                 f"p95 <= {stats['p95_ms']:.0f} ms, p99 <= {stats['p99_ms']:.0f} ms, max {stats['max_latency_ms']:.0f} ms"]
+        for bucket, count in stats["histogram"].items():
+            lines.append(f"  {bucket:>9} {count:7d}")
+        lines.append(f"Stalls over {self.threshold * 1000:.0f} ms: {stats['stalls']}, {stats['stalled_ms']:.0f} ms in total")
+        for culprit, ms in stats["top_culprits"]:
+            lines.append(f"  {ms:8.0f} ms  {culprit}")
+        return "\n".join(lines)
@@ -0,0 +1,62 @@
+import argparse
+import os
+import subprocess
+import sys
+
+
+def import_times(module, python=sys.executable):
+    """Run `python -X importtime -c "import module"` in a fresh interpreter.
+
+    Returns [(name, self_us, cumulative_us, depth), ...] in import order.
+    """
+    result = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def by_package(rows):
+    """Self time summed per top-level package, largest first"""
+    totals = {}
+    for name, self_us, cumulative_us, depth in rows:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+
+def report(module="main", top=15, runs=3):
+    # The fastest run is the least disturbed by the OS file cache and other processes
+    best = None
+    for _ in range(runs):
+        rows = import_times(module)
+        if best is None or rows[-1][2] < best[-1][2]:
+            best = rows
+    total_ms = best[-1][2] / 1000
+    print(f"import {module}: {total_ms:.0f} ms, {len(best)} modules (best of {runs})")
+
+    print(f"\nSlowest imports by cumulative time (modules {module} imports directly):")
+    direct = [row for row in best if row[3] == 1]
+    for name, self_us, cumulative_us, depth in sorted(direct, key=lambda row: -row[2])[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    print("\nSelf time by package:")
+    for package, self_us in by_package(best)[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {100 * self_us / best[-1][2]:5.1f}%  {package}")
+    return total_ms
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start import time report, from python -X importtime")
+    parser.add_argument("module", nargs="?", default="main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    report(args.module, args.top, args.runs)
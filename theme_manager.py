@@ -1,5 +1,7 @@
 from PyQt6.QtWidgets import QLabel, QPushButton
 
+from profiling import profiled
+
 class ThemeManager:
     def __init__(self, app):
         self.app = app
@@ -149,6 +151,7 @@ class ThemeManager:
         colors = self.get_theme_colors()
         return "font-size: 18px; font-weight: bold; color: %s !important; padding: 10px;" % colors['text-primary']
 
+    @profiled("theme toggle")
     def toggle_theme(self):
         self.app.is_dark_mode = not self.app.is_dark_mode
         self.app.theme_toggle_button.setStyleSheet(self.get_theme_toggle_button_stylesheet())  # Update stylesheet to reflect new icon
@@ -164,7 +167,8 @@ class ThemeManager:
         self.app.content_area.setStyleSheet(self.get_content_area_stylesheet())
         self.app.sidebar_title.setStyleSheet(self.get_sidebar_title_stylesheet())
 
-        for button in [self.app.recommend_button, self.app.catalog_button, self.app.trends_button, self.app.playlist_button]:
+        for button in [self.app.recommend_button, self.app.catalog_button, self.app.trends_button, self.app.playlist_button,
+                       self.app.performance_button]:
             if button != self.app.active_button:
                 button.setStyleSheet(self.get_button_stylesheet())
             else:
@@ -0,0 +1,71 @@
+import threading
+import time
+
+
+class TokenProvider:
+    """Keeps the Spotify OAuth token in memory and refreshes it before it expires.
+
+    Use it as the auth manager in place of SpotifyOAuth. get_access_token()
+    returns the held token without reading the cache file or going to the
+    network. A daemon thread refreshes the token refresh_margin seconds
+    before expiry, and the OAuth cache handler saves the new one. A call
+    only waits for a refresh when the token has already expired, e.g.
+    after the machine slept.
+    """
+
+    def __init__(self, oauth, refresh_margin=300, retry_interval=30):
+        self.oauth = oauth
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self.refreshes = 0
+        self._token_info = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def get_access_token(self, as_dict=False):
+        token_info = self._token_info
+        if token_info is None or token_info["expires_at"] <= time.time():
+            token_info = self._load()
+        return dict(token_info) if as_dict else token_info["access_token"]
+
+    def peek(self):
+        """The held token while it is valid, else None; never blocks"""
+        token_info = self._token_info
+        if token_info is not None and token_info["expires_at"] > time.time():
+            return token_info["access_token"]
+        return None
+
+    def _load(self):
+        with self._lock:
+            token_info = self._token_info
+            if token_info is None:
+                # First use: the cache file, or the browser login if there is none
+                token_info = self.oauth.validate_token(self.oauth.cache_handler.get_cached_token())
+                if token_info is None:
+                    self.oauth.get_access_token(as_dict=False, check_cache=False)
+                    token_info = self.oauth.cache_handler.get_cached_token()
+            elif token_info["expires_at"] <= time.time():
+                token_info = self._refresh(token_info)
+            self._token_info = token_info
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="token-refresh", daemon=True)
+                self._thread.start()
+            return token_info
+
+    def _refresh(self, token_info):
+        self.refreshes += 1
+        return self.oauth.refresh_access_token(token_info["refresh_token"])
+
+    def _run(self):
+        while True:
+            wait = self._token_info["expires_at"] - self.refresh_margin - time.time()
+            if wait > 0:
+                # Re-check every minute; sleep() does not count time the machine was suspended
+                time.sleep(min(wait, 60))
+                continue
+            try:
+                with self._lock:
+                    self._token_info = self._refresh(self._token_info)
+            except Exception as e:
+                print(f"Error refreshing Spotify token: {e}")
+                time.sleep(self.retry_interval)
@@ -0,0 +1,193 @@
+import contextlib
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import threading
+import time
+from collections import deque
+
+_current = contextvars.ContextVar("current_span", default=None)
+_exporters = []  # tracing is off while this is empty
+_ids = itertools.count(1)
+
+
+class Span:
+    """One timed operation. Spans started while it is current become its children"""
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "duration_ms", "attributes",
+                 "error", "thread", "_started")
+
+    def __init__(self, name, parent, attributes):
+        self.name = name
+        self.span_id = next(_ids)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        self.start = time.time()
+        self.duration_ms = None
+        self.attributes = attributes
+        self.error = None
+        self.thread = threading.current_thread().name
+        self._started = time.perf_counter()
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def finish(self):
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+
+    def to_dict(self):
+        return {"name": self.name, "trace_id": self.trace_id, "span_id": self.span_id,
+                "parent_id": self.parent_id, "start": self.start, "duration_ms": self.duration_ms,
+                "thread": self.thread, "error": self.error, "attributes": self.attributes}
+
+
+class _NoopSpan:
+    """What span() returns while tracing is off"""
+
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class JsonLinesExporter:
+    """Appends each finished span to a file as one JSON object per line"""
+
+    def __init__(self, path="trace.jsonl"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class RingBufferExporter:
+    """Keeps the last size finished spans in memory"""
+
+    def __init__(self, size=2000):
+        self.spans = deque(maxlen=size)
+
+    def export(self, span):
+        self.spans.append(span)
+
+    def trace(self, trace_id):
+        """Spans of one trace, in the order they finished"""
+        return [span for span in list(self.spans) if span.trace_id == trace_id]
+
+    def slowest(self, n=10, name=None):
+        spans = [span for span in list(self.spans) if name is None or span.name == name]
+        return sorted(spans, key=lambda span: -span.duration_ms)[:n]
+
+
+def add_exporter(exporter):
+    _exporters.append(exporter)
+    return exporter
+
+
+def remove_exporter(exporter):
+    if exporter in _exporters:
+        _exporters.remove(exporter)
+
+
+def enabled():
+    return bool(_exporters)
+
+
+def current_span():
+    return _current.get()
+
+
+def span(name, **attributes):
+    """Context manager timing a block as a child of the current span.
+
+    With no exporter registered this returns a shared no-op object, so
+    instrumented code costs one function call.
+    """
+    if not _exporters:
+        return _NOOP
+    return _span(name, attributes)
+
+
+@contextlib.contextmanager
+def _span(name, attributes):
+    current = Span(name, _current.get(), attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        current.finish()
+        for exporter in list(_exporters):
+            try:
+                exporter.export(current)
+            except Exception as e:
+                print(f"Error exporting span: {e}")
+
+
+def bind(fn):
+    """fn, run with the current span as parent wherever it is called later.
+
+    Used where work hops threads: worker pools, GUI callbacks.
+    """
+    parent = _current.get()
+    if parent is None:
+        return fn
+
+    @functools.wraps(fn)
+    def bound(*args, **kwargs):
+        token = _current.set(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return bound
+
+
+def traced(name, **attributes):
+    """Decorator: run each call of the function (or coroutine function) in a span"""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, **attributes):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, **attributes):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+if __name__ == "__main__":
+    def timed(label, runs=200000):
+        start = time.perf_counter()
+        for _ in range(runs):
+            with span("bench", key="value") as current:
+                current.set("n", 1)
+        print(f"{label}: {(time.perf_counter() - start) / runs * 1e9:.0f} ns per span")
+
+    timed("disabled")
+    ring = add_exporter(RingBufferExporter())
+    timed("enabled, ring buffer")
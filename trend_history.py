@@ -0,0 +1,168 @@
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    market TEXT NOT NULL,
+    taken_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_market_time ON snapshots (market, taken_at);
+CREATE TABLE IF NOT EXISTS snapshot_items (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id),
+    album_id TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    name TEXT,
+    artist TEXT,
+    PRIMARY KEY (snapshot_id, album_id)
+);
+CREATE TABLE IF NOT EXISTS snapshot_deltas (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id),
+    album_id TEXT NOT NULL,
+    change TEXT NOT NULL,
+    old_rank INTEGER,
+    new_rank INTEGER
+);
+CREATE INDEX IF NOT EXISTS snapshot_deltas_snapshot ON snapshot_deltas (snapshot_id);
+-- Ranks of the most recent snapshot per market, so a new snapshot is
+-- diffed against one small table instead of the history
+CREATE TABLE IF NOT EXISTS latest (
+    market TEXT NOT NULL,
+    album_id TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    name TEXT,
+    artist TEXT,
+    PRIMARY KEY (market, album_id)
+);
+"""
+
+
+def diff_ranks(old, new):
+    """Compare two {album_id: rank} maps.
+
+    Returns {"new": [...], "dropped": [...], "moved": {album_id: (old, new)}}.
+    """
+    return {
+        "new": [album_id for album_id in new if album_id not in old],
+        "dropped": [album_id for album_id in old if album_id not in new],
+        "moved": {album_id: (old[album_id], rank) for album_id, rank in new.items()
+                  if album_id in old and old[album_id] != rank},
+    }
+
+
+class TrendHistory:
+    """Local store of periodic new-release snapshots per market.
+
+    record() keeps at most one snapshot per interval seconds and stores
+    the delta against the previous snapshot alongside it. changes_since()
+    chains the deltas stored after the snapshot that was current at a
+    given time, without reading any full snapshot. Each thread uses its
+    own connection, so record() can run on a worker thread.
+    """
+
+    def __init__(self, path="trends_history.db", interval=6 * 3600):
+        self.path = path
+        self.interval = interval
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self.conn.executescript(SCHEMA)
+
+    @property
+    def conn(self):
+        if getattr(self._local, "conn", None) is None:
+            self._local.conn = sqlite3.connect(self.path)
+        return self._local.conn
+
+    def last_snapshot_time(self, market):
+        row = self.conn.execute(
+            "SELECT MAX(taken_at) FROM snapshots WHERE market = ?", (market,)
+        ).fetchone()
+        return row[0]
+
+    def latest_ranks(self, market):
+        return dict(self.conn.execute(
+            "SELECT album_id, rank FROM latest WHERE market = ?", (market,)
+        ))
+
+    def record(self, market, releases, now=None):
+        """Store a snapshot of releases if the last one is older than interval.
+
+        Returns the delta against the previous snapshot, or None if no
+        snapshot was taken.
+        """
+        now = time.time() if now is None else now
+        with self._write_lock:
+            return self._record(market, releases, now)
+
+    def _record(self, market, releases, now):
+        last = self.last_snapshot_time(market)
+        if last is not None and now - last < self.interval:
+            return None
+
+        unique = {}
+        for rank, release in enumerate(releases):
+            if release.get('id') and release['id'] not in unique:
+                unique[release['id']] = (rank, release)
+        new_ranks = {album_id: rank for album_id, (rank, _) in unique.items()}
+        old_ranks = self.latest_ranks(market)
+        delta = diff_ranks(old_ranks, new_ranks)
+
+        with self.conn:
+            snapshot_id = self.conn.execute(
+                "INSERT INTO snapshots (market, taken_at) VALUES (?, ?)", (market, now)
+            ).lastrowid
+            rows = [(snapshot_id, album_id, rank, release['name'], release['artist'])
+                    for album_id, (rank, release) in unique.items()]
+            self.conn.executemany("INSERT INTO snapshot_items VALUES (?, ?, ?, ?, ?)", rows)
+            self.conn.executemany(
+                "INSERT INTO snapshot_deltas VALUES (?, ?, ?, ?, ?)",
+                [(snapshot_id, a, "new", None, new_ranks[a]) for a in delta["new"]] +
+                [(snapshot_id, a, "dropped", old_ranks[a], None) for a in delta["dropped"]] +
+                [(snapshot_id, a, "moved", old, new) for a, (old, new) in delta["moved"].items()]
+            )
+            self.conn.execute("DELETE FROM latest WHERE market = ?", (market,))
+            self.conn.executemany(
+                "INSERT INTO latest VALUES (?, ?, ?, ?, ?)",
+                [(market, album_id, rank, name, artist) for _, album_id, rank, name, artist in rows]
+            )
+        return delta
+
+    def baseline_snapshot(self, market, since):
+        """(id, taken_at) of the snapshot that was current at time since (or the oldest one)"""
+        row = self.conn.execute(
+            "SELECT id, taken_at FROM snapshots WHERE market = ? AND taken_at <= ? ORDER BY taken_at DESC LIMIT 1",
+            (market, since)
+        ).fetchone()
+        if row is None:
+            row = self.conn.execute(
+                "SELECT id, taken_at FROM snapshots WHERE market = ? ORDER BY taken_at LIMIT 1", (market,)
+            ).fetchone()
+        return row
+
+    def changes_since(self, market, since):
+        """Delta between the snapshot current at since and the latest one"""
+        baseline = self.baseline_snapshot(market, since)
+        if baseline is None:
+            return diff_ranks({}, {})
+        rows = self.conn.execute(
+            "SELECT d.album_id, d.change, d.old_rank, d.new_rank FROM snapshot_deltas d "
+            "JOIN snapshots s ON s.id = d.snapshot_id "
+            "WHERE s.market = ? AND s.taken_at > ? ORDER BY s.taken_at, s.id",
+            (market, baseline[1])
+        )
+        # Rank before the first delta and after the last one; None where absent
+        first, last = {}, {}
+        for album_id, change, old_rank, new_rank in rows:
+            if album_id not in first:
+                first[album_id] = None if change == "new" else old_rank
+            last[album_id] = None if change == "dropped" else new_rank
+        old = {album_id: rank for album_id, rank in first.items() if rank is not None}
+        new = {album_id: rank for album_id, rank in last.items() if rank is not None}
+        return diff_ranks(dict(sorted(old.items(), key=lambda item: item[1])),
+                          dict(sorted(new.items(), key=lambda item: item[1])))
+
+    def changes_since_yesterday(self, market, now=None):
+        now = time.time() if now is None else now
+        return self.changes_since(market, now - 24 * 3600)
+
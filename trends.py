@@ -1,94 +1,181 @@
-import spotipy
-from PyQt6.QtWidgets import (QLabel, QWidget, QHBoxLayout, QGridLayout)
+from PyQt6 import sip
+from PyQt6.QtWidgets import QLabel, QPushButton, QWidget, QHBoxLayout
 from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QPixmap
-import requests
-from io import BytesIO
+
+from background import run_in_background
+from card_view import CardView
+from spotify_scheduler import BACKGROUND, with_priority
+import tracing
+from trends_feed import TrendsFeed
+from trend_history import TrendHistory
+
+# Markets compared by the "All markets" view
+TREND_MARKETS = ["US", "GB", "DE", "FR", "JP", "BR", "MX", "CA", "AU", "IN"]
 
 class Trends:
-    def __init__(self, sp, market):
+    def __init__(self, sp, market, markets=None):
         self.sp = sp
         self.market = market
+        self.markets = markets or TREND_MARKETS
+        self.show_all_markets = False
+        self.results_view = None
+        self.changes = None
+        self.loading_changes = False
+        self.history = TrendHistory()
+        self.feed = TrendsFeed(with_priority(sp, BACKGROUND))
+        self.feed.releases_updated.connect(self.record_snapshot)
+        self.feed.releases_updated.connect(self.on_releases_updated)
+        self.feed.refresh_failed.connect(self.on_refresh_failed)
+        self.feed.aggregate_updated.connect(self.on_aggregate_updated)
 
     def setup_ui(self, app):
         app.clear_content()
 
         trends_label = QLabel("Music Trends", alignment=Qt.AlignmentFlag.AlignCenter)
         trends_label.setStyleSheet("font-size: 24px; font-weight: bold; color: #FFFFFF; padding: 10px; background-color: #1DB954; border-radius: 10px;")
-        app.content_grid.addWidget(trends_label, 0, 0)
 
+        self.markets_button = QPushButton("🌍 All markets")
+        self.markets_button.setCheckable(True)
+        self.markets_button.setChecked(self.show_all_markets)
+        self.markets_button.setFixedHeight(45)
+        self.markets_button.setStyleSheet("""
+            QPushButton {
+                font-size: 14px; font-weight: bold; padding: 0 15px;
+                color: #FFFFFF; background-color: #2A2A2A;
+                border-radius: 5px; border: 2px solid #1DB954;
+            }
+            QPushButton:checked { background-color: #1DB954; }
+        """)
+        self.markets_button.toggled.connect(lambda checked: self.set_show_all_markets(checked, app))
+
+        header = QWidget()
+        header_layout = QHBoxLayout(header)
+        header_layout.setContentsMargins(0, 0, 0, 0)
+        header_layout.addWidget(trends_label, 1)
+        header_layout.addWidget(self.markets_button)
+        app.content_grid.addWidget(header, 0, 0)
+
+        self.changes_label = QLabel()
+        self.changes_label.setStyleSheet("font-size: 14px; color: #AAAAAA; padding: 0 5px;")
+        self.changes_label.hide()
+        app.content_grid.addWidget(self.changes_label, 1, 0)
+
+        self.results_view = CardView(mode="list", columns=2, max_image_size=150)
+        app.content_grid.addWidget(self.results_view, 2, 0)
+
+        self.get_new_releases(app)
+
+    def set_show_all_markets(self, show_all, app):
+        self.show_all_markets = show_all
         self.get_new_releases(app)
 
     def get_new_releases(self, app):
-        try:
-            trends = self.sp.new_releases(limit=10, country=self.market)
-            new_releases = []
-            for item in trends['albums']['items']:
-                release_info = {
-                    "name": item['name'],
-                    "artist": item['artists'][0]['name'],
-                    "date": item['release_date'],
-                    "image_url": item['images'][0]['url'] if item['images'] else None
-                }
-                new_releases.append(release_info)
-            self.set_new_releases(new_releases, app)
-        except Exception as e:
-            self.set_trends_output(f"Error fetching new releases: {str(e)}", app)
+        # Render whatever is cached right away; fresh data arrives via the feed's signals
+        if self.show_all_markets:
+            releases = self.feed.aggregate(self.markets)
+        else:
+            releases = self.feed.get(self.market)
+        if releases is not None:
+            self.set_new_releases(releases, app)
+        else:
+            self.set_trends_output("Loading new releases...", app)
+
+    def record_snapshot(self, market, releases):
+        # SQLite writes run on a worker thread; the badges update when the new changes arrive
+        run_in_background(self.record_and_diff, market, releases,
+                          on_done=lambda changes: self.on_changes_ready(market, changes),
+                          on_error=lambda error: print(f"Error recording trends snapshot: {error}"))
+
+    def record_and_diff(self, market, releases):
+        self.history.record(market, releases)
+        return self.history.changes_since_yesterday(market)
+
+    def load_changes(self):
+        # Releases rendered from cache never pass through record_snapshot
+        if self.loading_changes:
+            return
+        self.loading_changes = True
+        market = self.market
+        run_in_background(self.history.changes_since_yesterday, market,
+                          on_done=lambda changes: self.on_changes_ready(market, changes),
+                          on_error=self.on_changes_failed)
+
+    def on_changes_failed(self, error):
+        self.loading_changes = False
+        print(f"Error loading trends history: {error}")
+
+    def on_changes_ready(self, market, changes):
+        self.loading_changes = False
+        if market != self.market or changes == self.changes:
+            return
+        self.changes = changes
+        releases = self.feed.cached(market)
+        if releases is not None and not self.show_all_markets and self.is_visible():
+            self.set_new_releases(releases, None)
+
+    def change_badge(self, release):
+        if self.changes is None or self.show_all_markets:
+            return None
+        album_id = release.get('id')
+        if album_id in self.changes["new"]:
+            return "NEW"
+        if album_id in self.changes["moved"]:
+            old, new = self.changes["moved"][album_id]
+            return f"▲{old - new}" if new < old else f"▼{new - old}"
+        return None
+
+    def update_changes_label(self):
+        if self.changes is None or self.show_all_markets:
+            self.changes_label.hide()
+            return
+        self.changes_label.setText(
+            f"Since yesterday: {len(self.changes['new'])} new · "
+            f"{len(self.changes['dropped'])} dropped · {len(self.changes['moved'])} moved"
+        )
+        self.changes_label.show()
+
+    def is_visible(self):
+        return self.results_view is not None and not sip.isdeleted(self.results_view)
+
+    def on_releases_updated(self, market, releases):
+        if market == self.market and not self.show_all_markets and self.is_visible():
+            self.set_new_releases(releases, None)
+
+    def on_aggregate_updated(self, releases):
+        if self.show_all_markets and self.is_visible():
+            self.set_new_releases(releases, None)
+
+    def on_refresh_failed(self, market, error):
+        if not self.is_visible():
+            return
+        if self.show_all_markets:
+            if all(self.feed.cached(m) is None for m in self.markets):
+                self.set_trends_output(f"Error fetching new releases: {error}", None)
+        elif market == self.market and self.feed.cached(market) is None:
+            self.set_trends_output(f"Error fetching new releases: {error}", None)
+
+    def release_subtitle(self, release):
+        subtitle = f"by {release['artist']} (Released: {release['date']})"
+        if 'markets' in release:
+            count = len(release['markets'])
+            subtitle += f"\n🌍 {count} market{'s' if count != 1 else ''}"
+        return subtitle
 
+    @tracing.traced("render.trends")
     def set_new_releases(self, releases, app):
-        for i in range(1, app.content_grid.count()):
-            widget = app.content_grid.itemAt(i).widget()
-            if widget is not None:
-                widget.deleteLater()
-
-        content_width = app.content_area.width() - 30  # Subtract some padding
-        image_max_size = min(content_width // 4, 150)  # Responsive max image size
-
-        for i, release in enumerate(releases):
-            release_container = QWidget()
-            release_layout = QHBoxLayout(release_container)
-            release_layout.setContentsMargins(5, 5, 5, 5)
-
-            image_label = QLabel()
-            if release['image_url']:
-                try:
-                    response = requests.get(release['image_url'])
-                    image_data = BytesIO(response.content)
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(image_data.read())
-                    scaled_pixmap = pixmap.scaled(image_max_size, image_max_size, Qt.AspectRatioMode.KeepAspectRatioByExpanding, Qt.TransformationMode.SmoothTransformation)
-                    image_label.setPixmap(scaled_pixmap)
-                except Exception:
-                    image_label.setText("Image not available")
-            else:
-                image_label.setText("No image")
-            image_label.setMaximumSize(image_max_size, image_max_size)
-            image_label.setStyleSheet(f"border: 1px solid #1DB954; border-radius: 5px; max-width: {image_max_size}px; max-height: {image_max_size}px;")
-            release_layout.addWidget(image_label)
-
-            info_label = QLabel(f"{release['name']} by {release['artist']} (Released: {release['date']})")
-            info_label.setStyleSheet("font-size: 14px; color: #FFFFFF;")
-            info_label.setWordWrap(True)
-            release_layout.addWidget(info_label)
-
-            row = (i // 2) + 1
-            col = (i % 2) * 2
-            app.content_grid.addWidget(release_container, row, col, 1, 2)
-
-        app.content_container.adjustSize()
+        if self.changes is None and not self.show_all_markets:
+            self.load_changes()
+        self.update_changes_label()
+        self.results_view.set_items([
+            {
+                "title": release['name'],
+                "subtitle": self.release_subtitle(release),
+                "image_url": release['image_url'],
+                "badge": self.change_badge(release)
+            }
+            for release in releases
+        ])
 
     def set_trends_output(self, text, app):
-        for i in range(1, app.content_grid.count()):
-            widget = app.content_grid.itemAt(i).widget()
-            if widget is not None:
-                widget.deleteLater()
-
-        container = QWidget()
-        layout = QHBoxLayout(container)
-        layout.setContentsMargins(5, 5, 5, 5)
-        label = QLabel(text)
-        label.setStyleSheet("font-size: 14px; color: #FFFFFF;")
-        label.setWordWrap(True)
-        layout.addWidget(label)
-        app.content_grid.addWidget(container, 1, 0, 1, 2)
-        app.content_container.adjustSize()
\ No newline at end of file
+        self.changes_label.hide()
+        self.results_view.show_message(text)
@@ -0,0 +1,195 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from background import after_startup, run_in_background
+from entities import Album
+from image_loader import get_image_loader
+from image_urls import best_image_url
+from metadata_store import get_metadata_store
+from rate_limit import TokenBucket
+
+
+def aggregate_releases(releases_by_market):
+    """Merge per-market release lists into one ranked list.
+
+    Albums are deduplicated by id and ranked by the number of markets they
+    appear in, then by their best position in any market. Each merged
+    release gains "markets" (sorted market codes) and "best_rank".
+    """
+    merged = {}
+    for market, releases in releases_by_market.items():
+        for rank, release in enumerate(releases or []):
+            key = release.get('id') or (release['name'], release['artist'])
+            entry = merged.get(key)
+            if entry is None:
+                entry = merged[key] = dict(release, markets=[], best_rank=rank)
+            entry['markets'].append(market)
+            entry['best_rank'] = min(entry['best_rank'], rank)
+    for entry in merged.values():
+        entry['markets'].sort()
+    return sorted(merged.values(), key=lambda r: (-len(r['markets']), r['best_rank'], r['name']))
+
+
+class TrendsFeed(QObject):
+    """New-releases feed with a per-market TTL cache.
+
+    get() answers from the cache immediately and refreshes stale markets
+    in the background; refreshed data is announced through
+    releases_updated(market, releases). A timer keeps every market that
+    has been viewed fresh while the app is running, and cover art for a
+    fresh page of releases is prefetched concurrently.
+
+    refresh_markets() fans out over several markets at once, at most
+    max_concurrency requests in flight and all requests drawn from a
+    shared token bucket of requests_per_second; aggregate_updated(list)
+    then carries the merged ranking from aggregate_releases().
+    """
+    releases_updated = pyqtSignal(str, list)
+    refresh_failed = pyqtSignal(str, str)
+    aggregate_updated = pyqtSignal(list)
+
+    def __init__(self, sp, ttl=900, max_releases=100, page_size=50, image_size=150,
+                 max_concurrency=4, requests_per_second=5):
+        super().__init__()
+        self.sp = sp
+        self.ttl = ttl
+        self.max_releases = max_releases
+        self.page_size = min(page_size, 50)  # Spotify's maximum page size
+        self.image_size = image_size
+        self.max_concurrency = max_concurrency
+        self.rate_budget = TokenBucket(requests_per_second)
+        self._cache = {}  # market -> (fetched_at, releases)
+        self._in_flight = set()
+        self._aggregated = []  # markets of the last aggregate(), kept fresh together
+        self._lock = threading.Lock()
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh_stale)
+        self.refresh_timer.start(int(ttl * 1000 / 2))
+
+    def cached(self, market):
+        """Cached releases for market (possibly stale), or None"""
+        with self._lock:
+            entry = self._cache.get(market)
+        return entry[1] if entry else None
+
+    def is_fresh(self, market):
+        with self._lock:
+            entry = self._cache.get(market)
+        return entry is not None and time.time() - entry[0] < self.ttl
+
+    def get(self, market):
+        """Return cached releases right away, refreshing them if stale"""
+        if not self.is_fresh(market):
+            self.refresh(market)
+        return self.cached(market)
+
+    def refresh(self, market):
+        with self._lock:
+            if market in self._in_flight:
+                return
+            self._in_flight.add(market)
+        after_startup(
+            run_in_background, self.fetch_releases, market,
+            on_done=lambda releases: self._store(market, releases),
+            on_error=lambda error: self._failed(market, error)
+        )
+
+    def refresh_stale(self):
+        with self._lock:
+            markets = list(self._cache)
+        stale = [market for market in markets if not self.is_fresh(market)]
+        # Aggregated markets are refreshed together, so the merged ranking is emitted again
+        together = [market for market in stale if market in self._aggregated]
+        if together:
+            self.refresh_markets(together, self._aggregated)
+        for market in stale:
+            if market not in together:
+                self.refresh(market)
+
+    def fetch_releases(self, market):
+        """Page through new releases for market; runs on a worker thread"""
+        releases = []
+        offset = 0
+        while len(releases) < self.max_releases:
+            limit = min(self.page_size, self.max_releases - len(releases))
+            self.rate_budget.acquire()
+            page = self.sp.new_releases(country=market, limit=limit, offset=offset)['albums']
+            for item in page['items']:
+                releases.append({
+                    "id": item.get('id'),
+                    "name": item['name'],
+                    "artist": item['artists'][0]['name'] if item['artists'] else "Unknown Artist",
+                    "date": item['release_date'],
+                    "image_url": best_image_url(item['images'], self.image_size)
+                })
+            offset += len(page['items'])
+            if not page.get('next') or not page['items']:
+                break
+        return releases
+
+    def aggregate(self, markets):
+        """Merged ranking over the cached releases of markets, refreshing stale ones.
+
+        Returns None when no market has been fetched yet.
+        """
+        self._aggregated = list(markets)
+        stale = [market for market in markets if not self.is_fresh(market)]
+        if stale:
+            self.refresh_markets(stale, markets)
+        cached = {market: self.cached(market) for market in markets}
+        if not any(releases is not None for releases in cached.values()):
+            return None
+        return aggregate_releases(cached)
+
+    def refresh_markets(self, markets, aggregate_over=None):
+        """Fetch several markets concurrently, then emit aggregate_updated"""
+        with self._lock:
+            markets = [market for market in markets if market not in self._in_flight]
+            self._in_flight.update(markets)
+        if not markets:
+            return
+        aggregate_over = list(aggregate_over or markets)
+        after_startup(
+            run_in_background, self._fetch_markets, markets,
+            on_done=lambda results: self._store_markets(results, aggregate_over),
+            on_error=lambda error: [self._failed(market, error) for market in markets]
+        )
+
+    def _fetch_markets(self, markets):
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="trends-fanout") as pool:
+            futures = {market: pool.submit(self.fetch_releases, market) for market in markets}
+            for market, future in futures.items():
+                try:
+                    results[market] = future.result()
+                except Exception as e:
+                    results[market] = e
+        return results
+
+    def _store_markets(self, results, aggregate_over):
+        for market, releases in results.items():
+            if isinstance(releases, Exception):
+                self._failed(market, releases)
+            else:
+                self._store(market, releases)
+        cached = {market: self.cached(market) for market in aggregate_over}
+        if any(releases is not None for releases in cached.values()):
+            self.aggregate_updated.emit(aggregate_releases(cached))
+
+    def _store(self, market, releases):
+        with self._lock:
+            self._in_flight.discard(market)
+            self._cache[market] = (time.time(), releases)
+        get_metadata_store().add("albums", [Album(r['id'], r['name'], r['artist'], r['image_url']) for r in releases])
+        # Warm the image cache for the first screenful while the page renders
+        get_image_loader().prefetch(r['image_url'] for r in releases[:20] if r['image_url'])
+        self.releases_updated.emit(market, releases)
+
+    def _failed(self, market, error):
+        with self._lock:
+            self._in_flight.discard(market)
+        print(f"Error refreshing new releases for {market}: {error}")
+        self.refresh_failed.emit(market, str(error))
@@ -26,7 +26,7 @@ def setup_ui(app):
     app.theme_toggle_button = QPushButton()  # Remove text, will use stylesheet for icon
     app.theme_toggle_button.setFixedSize(30, 30)
     app.theme_toggle_button.setStyleSheet(app.theme_manager.get_theme_toggle_button_stylesheet())
-    app.theme_toggle_button.clicked.connect(app.theme_manager.toggle_theme)
+    app.theme_toggle_button.clicked.connect(lambda: app.theme_manager.toggle_theme())
     app.title_bar_layout.addWidget(app.theme_toggle_button)
 
     # Minimize Button
@@ -88,6 +88,14 @@ def setup_ui(app):
     app.playlist_button.clicked.connect(lambda: app.set_active_button(app.playlist_button))
     sidebar.addWidget(app.playlist_button)
 
+    # Hidden until Ctrl+Shift+P
+    app.performance_button = QPushButton("⏱ Performance")
+    app.performance_button.setStyleSheet(app.theme_manager.get_button_stylesheet())
+    app.performance_button.setProperty("active", False)
+    app.performance_button.clicked.connect(lambda: app.set_active_button(app.performance_button))
+    app.performance_button.hide()
+    sidebar.addWidget(app.performance_button)
+
     sidebar.addStretch()
 
     app.sidebar_widget = QWidget()